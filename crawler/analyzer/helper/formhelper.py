@@ -18,13 +18,13 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import logging
 from models.form import HtmlForm, FormInput
 
-def extract_forms(frame):
+def extract_forms(extraction):
     result = []
-    forms = frame.findAllElements("form")
+    forms = extraction.findAllElements("form")
     for form in forms:
         action = form.attribute("action")
         method = form.attribute("method") if form.attribute("method") == "post" else "get"
-        dom_address = form.evaluateJavaScript("getXPath(this)")
+        dom_address = form.dom_address
         form_params = _extracting_information(form)
         result.append(HtmlForm(form_params, action, method, dom_address))
     return result
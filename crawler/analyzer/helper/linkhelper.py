@@ -21,14 +21,14 @@ from models.link import Link
 from models.url import Url
 from urllib.parse import urlparse, urljoin
 
-def extract_links(frame, requested_url):
+def extract_links(extraction, requested_url):
     try:
         requested_url = requested_url.toString()
     except AttributeError:
         requested_url = requested_url
-    anchor_tags = frame.findAllElements("a")
+    anchor_tags = extraction.findAllElements("a")
     new_links, new_clickables = _extract_new_links_from_links(anchor_tags, requested_url)
-    iframes = frame.findAllElements("iframe") + frame.findAllElements("frame")
+    iframes = extraction.findAllElements("iframe") + extraction.findAllElements("frame")
     new_links = new_links + extract_links_from_iframe(iframes)
     return new_links, new_clickables
 
@@ -47,21 +47,21 @@ def _extract_new_links_from_links(elements, requested_url):
             elif "javascript:" in href: #We assume it as clickable
                 html_id = elem.attribute("id")
                 html_class = elem.attribute("class")
-                dom_address = elem.evaluateJavaScript("getXPath(this)")
+                dom_address = elem.dom_address
                 event = href
                 tag = "a"
                 new_clickables.append(Clickable(event, tag, dom_address, html_id, html_class, None, None))
             elif "#" in href:
                 html_id = elem.attribute("id")
                 html_class = elem.attribute("class")
-                dom_address = elem.evaluateJavaScript("getXPath(this)")
+                dom_address = elem.dom_address
                 event = "click"
                 tag = "a"
                 new_clickables.append(Clickable(event, tag, dom_address, html_id, html_class, None, None))
             elif len(href) > 0:
                 html_id = elem.attribute("id")
                 html_class = elem.attribute("class")
-                dom_address = elem.evaluateJavaScript("getXPath(this)")
+                dom_address = elem.dom_address
                 url = href
                 link = Link(url, dom_address, html_id, html_class)
                 found_links.append(link)
@@ -77,7 +77,7 @@ def extract_links_from_iframe(elements):
         src = element.attribute("src")
         html_id = element.attribute("id")
         html_class = element.attribute("class")
-        dom_address = element.evaluateJavaScript("getXPath(this)")
+        dom_address = element.dom_address
         link = Link(src, dom_address, html_id, html_class)
         found_links.append(link)
     return found_links
\ No newline at end of file
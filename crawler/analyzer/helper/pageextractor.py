@@ -0,0 +1,70 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Extracts the links, forms and elements with event properties of a page with one call into the page (js/page_extractor.js)
+instead of one call per element. The elements offer the part of the QWebElement interface, that the helpers use.
+'''
+
+import json
+import logging
+
+__author__ = 'constantin'
+
+
+class ExtractedElement():
+
+    def __init__(self, record):
+        self._record = record
+        self.dom_address = record["dom_address"]
+        self.properties = record.get("properties", [])
+
+    def tagName(self):
+        return self._record["tag"]
+
+    def hasAttribute(self, name):
+        return self._record["attributes"].get(name) is not None or name in self.properties
+
+    def attribute(self, name):
+        value = self._record["attributes"].get(name)
+        return "" if value is None else value
+
+    def findAll(self, tag):
+        return [ExtractedElement(record) for record in self._record.get(tag.upper(), [])]
+
+
+class PageExtraction():
+
+    def __init__(self, result):
+        self._result = result
+
+    def findAllElements(self, tag):
+        return [ExtractedElement(record) for record in self._result.get(tag.upper(), [])]
+
+    def elements_with_properties(self):
+        return [ExtractedElement(record) for record in self._result["properties"]]
+
+
+def extract_page(frame, extractor_js):
+    """
+    :param extractor_js: source of js/page_extractor.js, it is evaluated together with the extraction, so it works
+    without injecting it first
+    """
+    result = frame.evaluateJavaScript(extractor_js + "\njaek_extractor.extract()")
+    try:
+        return PageExtraction(json.loads(result))
+    except (TypeError, ValueError):
+        logging.debug("Page extraction failed, page has no document...")
+        return PageExtraction({"properties": []})
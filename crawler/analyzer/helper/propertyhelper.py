@@ -21,8 +21,8 @@ from models.clickable import Clickable
 __author__ = 'constantin'
 
 
-def property_helper(frame):
-    all_elements = frame.findAllElements("*")
+def property_helper(extraction):
+    all_elements = extraction.elements_with_properties()
     result = []
     properties = ['onclick', "onmouseover", "onabort", "onblur", "onchange", "onblclick", "onerror", "onfocus", "onkeydown",
                   "onkeypress", "onkeyup", "onmousedown", "onmousemove", "onmouseout", "onmouseup"]
@@ -33,10 +33,8 @@ def property_helper(frame):
             element_id = element.attribute("id")
         if element.hasAttribute("class"):
             element_class = element.attribute("class")
-        element_dom_address = None
+        element_dom_address = element.dom_address
         for prop in properties:
             if element.hasAttribute(prop):
-                if element_dom_address is None:
-                    element_dom_address = element.evaluateJavaScript("getXPath(this)")
                 result.append(Clickable(prop, element.tagName(), element_dom_address, element_id, element_class, function_id="None"))
     return result
\ No newline at end of file
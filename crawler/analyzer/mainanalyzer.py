@@ -23,8 +23,10 @@ from PyQt5.Qt import QUrl
 from analyzer.helper.propertyhelper import property_helper
 
 from core.interactioncore import InteractionCore
+from core.jsbundle import BundleMode, get_bundle
 from analyzer.helper.formhelper import extract_forms
 from analyzer.helper.linkhelper import extract_links
+from analyzer.helper.pageextractor import extract_page
 from models.timingrequest import TimingRequest
 from models.utils import CrawlSpeed, purge_dublicates
 
@@ -33,8 +35,16 @@ from models.webpage import WebPage
 
 
 class MainAnalyzer(InteractionCore):
-    def __init__(self, parent, proxy="", port=0, crawl_speed=CrawlSpeed.Medium, network_access_manager=None):
+    max_virtual_timer_runs = 1000  # Stops timers, that set themselves again without delay
+
+    def __init__(self, parent, proxy="", port=0, crawl_speed=CrawlSpeed.Medium, network_access_manager=None,
+                 virtual_time=False):
+        """
+        :param virtual_time: if True, the timers of the page are run one after another by the analyzer, instead of
+        waiting for them (js/virtual_clock.js)
+        """
         super(MainAnalyzer, self).__init__(parent, proxy, port, crawl_speed, network_access_manager)
+        self.virtual_time = virtual_time
         self._loading_complete = False
         self._analyzing_finished = False
         self._timing_requests = []
@@ -66,10 +76,7 @@ class MainAnalyzer(InteractionCore):
             self.mainFrame().load(request,
                                   QNetworkAccessManager.PostOperation,
                                   data)
-        t = 0
-        while (not self._loading_complete and t < timeout ):  # Waiting for finish processing
-            self._wait(self.wait_for_processing)
-            t += self.wait_for_processing
+        t = self._wait_for_loading(timeout)  # Waiting for finish processing
 
         videos = self.mainFrame().findAllElements("video")
         if len(videos) > 0:
@@ -79,7 +86,9 @@ class MainAnalyzer(InteractionCore):
 
         overall_waiting_time = t
         buffer = 250
-        while len(self._timeming_events) > 0 and overall_waiting_time < timeout:
+        if self.virtual_time:
+            self._run_virtual_timers(timeout)
+        while not self.virtual_time and len(self._timeming_events) > 0 and overall_waiting_time < timeout:
             self._current_timeming_event = self._timeming_events.pop(0)  # Take the first event(ordered by needed time
             self._waiting_for = self._current_timeming_event['event_type']  # Setting kind of event
             waiting_time_in_milliseconds = (self._current_timeming_event[
@@ -90,7 +99,7 @@ class MainAnalyzer(InteractionCore):
             self._wait(waiting_time_in_milliseconds)  # Waiting for 100 millisecond before expected event
             overall_waiting_time += waiting_time_in_milliseconds
         if overall_waiting_time < 0.5:
-            self._wait((0.5 - overall_waiting_time))
+            self._wait_until_idle((0.5 - overall_waiting_time))
 
         # Just for debugging
         #f = open("text.txt", "w")
@@ -100,9 +109,10 @@ class MainAnalyzer(InteractionCore):
         if base_url is not None:
             base_url = base_url.attribute("href")
 
-        links, clickables = extract_links(self.mainFrame(), url_to_request)
-        forms = extract_forms(self.mainFrame())
-        elements_with_event_properties = property_helper(self.mainFrame())
+        extraction = extract_page(self.mainFrame(), self._page_extractor_js)
+        links, clickables = extract_links(extraction, url_to_request)
+        forms = extract_forms(extraction)
+        elements_with_event_properties = property_helper(extraction)
         self.mainFrame().evaluateJavaScript(self._property_obs_js)
         self._wait(0.1)
 
@@ -140,11 +150,27 @@ class MainAnalyzer(InteractionCore):
     def jsWinObjClearedHandler(self):  # Adding here the js-scripts I need
         if not self._analyzing_finished:
             self.mainFrame().addToJavaScriptWindowObject("jswrapper", self._js_bridge)
-            self.mainFrame().evaluateJavaScript(self._md5)
-            self.mainFrame().evaluateJavaScript(self._lib_js)
-            self.mainFrame().evaluateJavaScript(self._timeming_wrapper_js)
-            self.mainFrame().evaluateJavaScript(self._xhr_observe_js)
-            self.mainFrame().evaluateJavaScript(self._addEventListener)
+            mode = BundleMode.AnalyzerVirtualTime if self.virtual_time else BundleMode.Analyzer
+            self.mainFrame().evaluateJavaScript(get_bundle(mode).source)
+
+    def _run_virtual_timers(self, timeout):
+        """
+        Runs the queued timers of the page in the order they are due, until the next one is due after timeout. The
+        analyzer only waits, if a timer started requests.
+        """
+        for i in range(self.max_virtual_timer_runs):
+            timer = self.mainFrame().evaluateJavaScript("typeof jaek_clock !== 'undefined' ? jaek_clock.peek() : null")
+            if timer is None or timer['time'] > timeout * 1000:
+                return
+            # Requests of the timer are assigned to it by capturing_requests
+            self._current_timeming_event = {"time": timer['time'], "event_type": timer['type'],
+                                            "event_id": timer['function_id']}
+            self._waiting_for = timer['type']
+            self.mainFrame().evaluateJavaScript("jaek_clock.run_next()")
+            self.drain_js_messages()
+            if self.has_running_requests():
+                self._wait_until_idle(self.wait_for_event)
+        logging.debug("Stopped running the timers of the page after {} runs...".format(self.max_virtual_timer_runs))
 
     def capturing_requests(self, request):
         # logging.debug("Event captured..." + str(request))
@@ -47,10 +47,7 @@ class XSSAttacker(InteractionCore):
         self.networkAccessManager().finished.connect(self.load_complete)
         self.mainFrame().load(QUrl(url))
 
-        t = 0
-        while not self._loading_complete and t < timeout:
-            self._wait(self.wait_for_processing)
-            t += self.wait_for_processing
+        self._wait_for_loading(timeout)
 
         if not self._loading_complete:
             logging.debug("Timeout Error occurs...")
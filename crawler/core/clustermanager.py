@@ -15,11 +15,13 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
-import itertools
 import logging
+from array import array
 from copy import deepcopy
+from core.distancematrix import DistanceMatrix
+from core.similaritycache import SimilarityCache
 from models.url import Url
-from utils.utils import calculate_similarity_between_pages
+from utils.pagesimilarity import PageFeatures, similarity_of_features
 
 
 __author__ = 'constantin'
@@ -31,9 +33,11 @@ class ClusterManager():
     A cluster is a collection of similar pages, defined through a cluster function
     """
 
-    def __init__(self, persistence_manager):
+    def __init__(self, persistence_manager, similarity_cache_size=100000):
         self._persistence_manager = persistence_manager
-        self._similarity_cache = {} #Stores in a tripple: List(ids), result
+        self._similarity_cache = SimilarityCache(persistence_manager, similarity_cache_size)
+        self._clusters = {} # url_hash -> UnionFindClusters, loaded from the database once
+        self._distance_matrices = {} # url_hash -> DistanceMatrix of the pages in the clusters
 
     @property
     def get_clusters(self):
@@ -41,95 +45,89 @@ class ClusterManager():
 
     def get_cluster(self, url_description):
         try:
-            return self._clusters[url_description].values()
+            return self._clusters[url_description].as_lists()
         except:
             raise KeyError("No cluster with that id found")
 
     def add_webpage_to_cluster(self, webpage):
+        """
+        Single linkage clustering: The page joins every cluster with a member, that is not more than CLUSTER_THRESHOLD
+        away, so only the distances between the new page and the pages of the url are needed.
+        """
         url = Url(webpage.url)
-        clusters = self._persistence_manager.get_clusters(url.url_hash)
-        if clusters is None:
-            #self._clusters[url.url_hash] = [webpage.id]
-            self._persistence_manager.write_clusters(url.url_hash, [webpage.id])
-        else:
-            tmp = []
-            for c in clusters:
-                if isinstance(c, list):
-                    tmp.extend(c)
-                else:
-                    tmp.append(c)
-            tmp.append(webpage.id)
-            new_clusters = self.hierarchical_clustering(tmp, CLUSTER_THRESHOLD)
-            for c in new_clusters:
-                if isinstance(c, int): # Konvert integer to list, so mongo store all seperate single clusters in its own lists.
-                    new_clusters.remove(c)
-                    new_clusters.insert(0, [c])
-            self._persistence_manager.write_clusters(url.url_hash, new_clusters)
-
-
-    def hierarchical_clustering(self, clusters, threshold):
-        result = []
-        rest_clusters = clusters
-        while len(rest_clusters) > 1:
-            combinations_of_clusters = list(itertools.combinations(rest_clusters, 2))
-            distances = []
-            for combi in combinations_of_clusters:
-                distance = self.calculate_minimum_distance(combi[0], combi[1])
-                distances.append((distance, combi[0], combi[1]))
-            #distances = sorted(distances, key=lambda x: x[0])
-            min_distance = min(distances, key=lambda x: x[0])
-            if min_distance[0] > threshold:
-                break
-            else:
-                rest_clusters.remove(min_distance[1])
-                rest_clusters.remove(min_distance[2])
-                if isinstance(min_distance[1], int):
-                    a = min_distance[1],
-                else:
-                    a = min_distance[1]
-                if isinstance(min_distance[2], int):
-                    b = min_distance[2],
-                else:
-                    b = min_distance[2]
-                new_cluster = a + b
-                rest_clusters.append(new_cluster)
-        return rest_clusters
-
-    def calculate_minimum_distance(self, cluster1, cluster2):
-        if isinstance(cluster1, int):
-            cluster1 = [cluster1]
-        else:
-            cluster1 = list(cluster1)
-        if isinstance(cluster2, int):
-            cluster2 = [cluster2]
+        clusters = self._get_hash_clusters(url.url_hash)
+        if webpage.id in clusters:
+            return
+        distance_matrix = self._distance_matrices[url.url_hash]
+        features = PageFeatures(webpage)
+        row = self._calculate_distances(distance_matrix, webpage.id, features)
+        roots = set()
+        for page_id, distance in zip(distance_matrix.page_ids, row):
+            if distance <= CLUSTER_THRESHOLD:
+                roots.add(clusters.find(page_id))
+        distance_matrix.add_page(webpage.id, features, row)
+        if len(roots) == 0:
+            clusters.add_cluster(webpage.id)
+            self._persistence_manager.add_cluster(url.url_hash, [webpage.id])
+        elif len(roots) == 1:
+            root = roots.pop()
+            clusters.add_to_cluster(root, webpage.id)
+            self._persistence_manager.add_page_to_cluster(url.url_hash, clusters.index_of(root), webpage.id)
         else:
-            cluster2 = list(cluster2)
-        all_nodes =  cluster1 + cluster2
-        all_combinations = list(itertools.combinations(all_nodes, 2))
-        distances = []
-        for combi in all_combinations:
-            if combi[0] in cluster1 and combi[1] in cluster1 or combi[0] in cluster2 and combi[1] in cluster2:
-                continue
-            distance = self.calculate_distance(combi[0], combi[1])
-            distances.append((combi[0], combi[1], distance))
-        min_distance = min(distances, key=lambda x: x[2])
-        return min_distance[2]
+            clusters.merge(roots, webpage.id)
+            self._persistence_manager.write_clusters(url.url_hash, clusters.as_lists())
+
+    def _get_hash_clusters(self, url_hash):
+        if url_hash not in self._clusters:
+            stored_clusters = self._persistence_manager.get_clusters(url_hash) or []
+            clusters = UnionFindClusters()
+            distance_matrix = DistanceMatrix()
+            # Older crawls stored single clusters as integers
+            normalized = all(isinstance(c, list) for c in stored_clusters)
+            stored_clusters = [c if isinstance(c, list) else [c] for c in stored_clusters]
+            self._similarity_cache.load([page_id for c in stored_clusters for page_id in c])
+            for c in stored_clusters:
+                clusters.add_cluster(c[0])
+                for page_id in c[1:]:
+                    clusters.add_to_cluster(c[0], page_id)
+                for page_id in c:
+                    page = self._persistence_manager.get_web_page_to_id(page_id)
+                    if page is not None:
+                        features = PageFeatures(page)
+                        distance_matrix.add_page(page_id, features,
+                                                 self._calculate_distances(distance_matrix, page_id, features))
+            if not normalized:
+                self._persistence_manager.write_clusters(url_hash, clusters.as_lists())
+            self._clusters[url_hash] = clusters
+            self._distance_matrices[url_hash] = distance_matrix
+        return self._clusters[url_hash]
+
+    def _calculate_distances(self, distance_matrix, page_id, features):
+        """
+        :return: distances of a new page to all pages of the matrix
+        """
+        row = array("d")
+        for other_id, other_features in zip(distance_matrix.page_ids, distance_matrix.features):
+            similarity = self._similarity_cache.get(page_id, other_id)
+            if similarity is None:
+                similarity = similarity_of_features(features, other_features)
+                self._similarity_cache.put(page_id, other_id, similarity)
+            row.append(1 - similarity)
+        return row
+
+    def flush_similarities(self):
+        """
+        Writes the similarities, that are not in the database yet
+        """
+        self._similarity_cache.flush()
 
     def calculate_distance(self, x, y):
-        name = self.get_similarity_identifier(x, y)
-        if name in self._similarity_cache:
-            result = self._similarity_cache[name]
-        else:
-            page_x = self._persistence_manager.get_web_page_to_id(x)
-            page_y = self._persistence_manager.get_web_page_to_id(y)
-            result = calculate_similarity_between_pages(page_x, page_y, verbose=True)
-            self._similarity_cache[name] = result
-        return 1 - result
-
-    def get_similarity_identifier(self, x, y):
-        name = (x, y)
-        name = sorted(name)
-        return str(name[0])+"$"+str(name[1])
+        for distance_matrix in self._distance_matrices.values():
+            if x in distance_matrix and y in distance_matrix:
+                return distance_matrix.distance(x, y)
+        page_x = self._persistence_manager.get_web_page_to_id(x)
+        page_y = self._persistence_manager.get_web_page_to_id(y)
+        return 1 - similarity_of_features(PageFeatures(page_x), PageFeatures(page_y))
 
     def calculate_cluster_per_visited_urls(self, url_hash):
         try:
@@ -138,6 +136,11 @@ class ClusterManager():
             return 1.0
 
     def num_of_clusters(self, url_hash):
+        if url_hash in self._clusters:
+            clusters = self._clusters[url_hash]
+            if len(clusters) > 0:
+                return len(clusters)
+            return 1.0
         clusters = self._persistence_manager.get_clusters(url_hash)
         if clusters is not None:
             return len(clusters)
@@ -158,3 +161,62 @@ class ClusterManager():
 
 
 
+
+
+class UnionFindClusters():
+    """
+    Clusters of one url hash. Every cluster is identified by its root in the union find structure, the clusters keep the
+    order, in which they are stored in the database.
+    """
+
+    def __init__(self):
+        self._parent = {}
+        self._members = {}  # root -> page ids of the cluster
+        self._roots = []  # Order of the clusters in the database
+
+    def __len__(self):
+        return len(self._roots)
+
+    def __contains__(self, page_id):
+        return page_id in self._parent
+
+    def page_ids(self):
+        return list(self._parent)
+
+    def find(self, page_id):
+        root = page_id
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[page_id] != root:
+            self._parent[page_id], page_id = root, self._parent[page_id]
+        return root
+
+    def add_cluster(self, page_id):
+        self._parent[page_id] = page_id
+        self._members[page_id] = [page_id]
+        self._roots.append(page_id)
+
+    def add_to_cluster(self, root, page_id):
+        self._parent[page_id] = root
+        self._members[root].append(page_id)
+
+    def merge(self, roots, page_id):
+        """
+        Merges the clusters of roots into the biggest of them and adds page_id to it
+        """
+        roots = sorted(roots, key=lambda root: self._roots.index(root))
+        new_root = max(roots, key=lambda root: len(self._members[root]))
+        for root in roots:
+            if root == new_root:
+                continue
+            self._parent[root] = new_root
+            self._members[new_root].extend(self._members.pop(root))
+            self._roots.remove(root)
+        self.add_to_cluster(new_root, page_id)
+        return new_root
+
+    def index_of(self, root):
+        return self._roots.index(root)
+
+    def as_lists(self):
+        return [list(self._members[root]) for root in self._roots]
@@ -0,0 +1,70 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Distances between the pages of one url hash. The matrix is stored condensed (lower triangle, row by row) in one
+contiguous array of doubles and grows by one row for every new page. The features of the pages are kept alongside, so
+the distances of the next page can be computed without the database.
+'''
+
+from array import array
+
+__author__ = 'constantin'
+
+
+class DistanceMatrix():
+
+    def __init__(self):
+        self.page_ids = []
+        self.features = []
+        self._indices = {}  # page id -> row
+        self._distances = array("d")
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def __contains__(self, page_id):
+        return page_id in self._indices
+
+    def add_page(self, page_id, features, row):
+        """
+        :param row: distances of the page to all pages of the matrix, in the order of page_ids
+        """
+        if len(row) != len(self.page_ids):
+            raise ValueError("Row has {} distances, but there are {} pages".format(len(row), len(self.page_ids)))
+        self._distances.extend(row)
+        self._indices[page_id] = len(self.page_ids)
+        self.page_ids.append(page_id)
+        self.features.append(features)
+
+    def row(self, page_id):
+        """
+        :return: distances of page_id to the pages, that were added before it
+        """
+        index = self._indices[page_id]
+        start = index * (index - 1) // 2
+        return self._distances[start:start + index]
+
+    def distance(self, x, y):
+        i = self._indices[x]
+        j = self._indices[y]
+        if i == j:
+            return 0.0
+        if i < j:
+            i, j = j, i
+        return self._distances[i * (i - 1) // 2 + j]
+
+    def features_of(self, page_id):
+        return self.features[self._indices[page_id]]
@@ -24,6 +24,7 @@ from PyQt5.Qt import QUrl
 from PyQt5.QtWebKitWidgets import QWebPage
 from analyzer.helper.formhelper import extract_forms
 from analyzer.helper.linkhelper import extract_links
+from analyzer.helper.pageextractor import extract_page
 
 from analyzer.helper.propertyhelper import property_helper
 from models.ajaxrequest import AjaxRequest
@@ -31,6 +32,7 @@ from models.deltapage import DeltaPage
 from models.enumerations import XHRBehavior
 from models.keyclickable import KeyClickable
 from core.interactioncore import InteractionCore
+from core.jsbundle import BundleMode, get_bundle
 from models.utils import CrawlSpeed, purge_dublicates
 
 
@@ -50,8 +52,41 @@ class EventExecutor(InteractionCore):
         self.seen_timeouts = {}
         self.popup = None # reference if a popup occurs...
         self.mainFrame().urlChanged.connect(self._url_changes)
+        self._snapshot_key = None  # The page stays at the delta page between two executions, if this is set
+        self._next_snapshot_key = None
+        self._event_listener_wrapped = False
+        self.restored_from_snapshot = False
+        self._webpage = None
+        self._is_key_event = False
+        self._random_char = None
 
     def execute(self, webpage, timeout=5, element_to_click=None, xhr_options=XHRBehavior.ObserveXHR, pre_clicks=[]):
+        result = self.prepare_execution(webpage, element_to_click, xhr_options, pre_clicks)
+        if result is not None:
+            return result
+        if not self.restored_from_snapshot:
+            self._wait_for_loading(timeout)  # Waiting for finish processing
+            if not self._loading_complete:
+                logging.debug("Timeout occurs while initial page loading...")
+                return EventResult.ErrorWhileInitialLoading, None
+            # Prepare Page for clicking...
+            self._wait(0.1)
+            for click in pre_clicks:
+                result = self.execute_pre_click(click)
+                if result is not None:
+                    return result
+                self._wait_until_idle(self.wait_for_event)
+            self.finish_pre_clicks()
+
+        result = self.fire_event()
+        if result is not None:
+            return result
+        self._wait_until_idle(0.5)
+        return self.collect_event_result()
+
+    # The steps of execute. They are public, so that the EventExecutorPool can run them on several executors at the
+    # same time and has to wait only once for all of them.
+    def prepare_execution(self, webpage, element_to_click, xhr_options=XHRBehavior.ObserveXHR, pre_clicks=[]):
         logging.debug(
             "EventExecutor test started on {}...".format(webpage.url) + " with " + element_to_click.toString())
         self._analyzing_finished = False
@@ -59,53 +94,68 @@ class EventExecutor(InteractionCore):
         self.xhr_options = xhr_options
         self.element_to_click = None
         self.ajax_requests = []
+        self._url_changed = False
         self._new_url = None
         self.timeming_events = None
         self._capturing_ajax = False
         self._new_clickables = []
         self.element_to_click = element_to_click
         self.popup = None
-        self.mainFrame().setHtml(webpage.html, QUrl(webpage.url))
+        self.restored_from_snapshot = False
+        self._webpage = webpage
         target_tag = element_to_click.dom_address.split("/")
         target_tag = target_tag[-1]
         if target_tag in ['video']:
             return EventResult.UnsupportedTag, None
 
-        t = 0.0
-        while (not self._loading_complete and t < timeout ):  # Waiting for finish processing
-            self._wait(0.1)
-            t += 0.1
-        if not self._loading_complete:
-            logging.debug("Timeout occurs while initial page loading...")
-            return EventResult.ErrorWhileInitialLoading, None
-        # Prepare Page for clicking...
-        self._wait(0.1)
-        for click in pre_clicks:
-            pre_click_elem = None
-            logging.debug("Click on: " + click.toString())
-            if click.id != None and click.id != "":
-                pre_click_elem = self.search_element_with_id(click.id)
-            if click.html_class != None and pre_click_elem == None:
-                pre_click_elem = self.search_element_with_class(click.html_class, click.dom_address)
-            if pre_click_elem == None:
-                pre_click_elem = self.search_element_without_id_and_class(click.dom_address)
-
-            if pre_click_elem is None:
-                logging.debug("Preclicking element not found")
-                return EventResult.PreviousClickNotFound, None
-
-            if "javascript:" not in click.event:
-                js_code = click.event
-                if js_code[0:2] == "on":
-                    js_code = js_code[2:]  # if event beginns with on, escape it
-                js_code = "Simulate." + js_code + "(this);"
-                pre_click_elem.evaluateJavaScript(js_code)  # Waiting for finish processing
-            else:
-                pre_click_elem.evaluateJavaScript(click.event[len("javascript:"):])
-            self._wait(self.wait_for_event)
+        self._next_snapshot_key = self._get_snapshot_key(webpage, pre_clicks, xhr_options)
+        if self._next_snapshot_key is not None and self._next_snapshot_key == self._snapshot_key and self._restore_snapshot():
+            logging.debug("Deltapage restored from snapshot, no need to replay {} clicks...".format(len(pre_clicks)))
+            self.restored_from_snapshot = True
+        else:
+            self._snapshot_key = None
+            self._event_listener_wrapped = False
+            self.mainFrame().setHtml(webpage.html, QUrl(webpage.url))
+        return None
+
+    def loading_complete(self):
+        return self._loading_complete
+
+    def execute_pre_click(self, click):
+        logging.debug("Click on: " + click.toString())
+        pre_click_elem = self._find_element(click)
 
-        is_key_event = False
-            # Now execute the target event
+        if pre_click_elem is None:
+            logging.debug("Preclicking element not found")
+            return EventResult.PreviousClickNotFound, None
+
+        if "javascript:" not in click.event:
+            js_code = click.event
+            if js_code[0:2] == "on":
+                js_code = js_code[2:]  # if event beginns with on, escape it
+            js_code = "Simulate." + js_code + "(this);"
+            pre_click_elem.evaluateJavaScript(js_code)  # Waiting for finish processing
+        else:
+            pre_click_elem.evaluateJavaScript(click.event[len("javascript:"):])
+        return None
+
+    def _find_element(self, clickable):
+        element = None
+        if clickable.id != None and clickable.id != "":
+            element = self.search_element_with_id(clickable.id)
+        if element == None:
+            # Looking up the classes first would find the same element, so the dom address is enough
+            element = self.locate_element(clickable.dom_address)
+        return element
+
+    def finish_pre_clicks(self):
+        if self._next_snapshot_key is not None and self._take_snapshot():
+            self._snapshot_key = self._next_snapshot_key
+
+    def fire_event(self):
+        element_to_click = self.element_to_click
+        self._is_key_event = False
+        # Now execute the target event
         if "javascript:" not in element_to_click.event:
             self._url_changed = False
             js_code = element_to_click.event
@@ -113,24 +163,21 @@ class EventExecutor(InteractionCore):
                 js_code = js_code[2:]  # if event begins with on, escape it
 
             if js_code in self.key_events:
-                is_key_event = True
-                random_char = random.choice(string.ascii_letters)
-                js_code = "Simulate." + js_code + "(this, '" + random_char + "');"
+                self._is_key_event = True
+                self._random_char = random.choice(string.ascii_letters)
+                js_code = "Simulate." + js_code + "(this, '" + self._random_char + "');"
             else:
                 js_code = "Simulate." + js_code + "(this);"
         else:
             js_code = element_to_click.event[len("javascript:"):]
 
-        self.mainFrame().evaluateJavaScript(
-            self._addEventListener)  # This time it is here, because I dont want to have the initial addings
+        if not self._event_listener_wrapped:
+            # Restored pages are already wrapped, wrapping again would report every listener twice
+            self.mainFrame().evaluateJavaScript(
+                self._addEventListener)  # This time it is here, because I dont want to have the initial addings
+            self._event_listener_wrapped = True
 
-        real_clickable = None
-        if element_to_click.id != None and element_to_click.id != "":
-            real_clickable = self.search_element_with_id(element_to_click.id)
-        if element_to_click.html_class != None and real_clickable == None:
-            real_clickable = self.search_element_with_class(element_to_click.html_class, element_to_click.dom_address)
-        if real_clickable == None:
-            real_clickable = self.search_element_without_id_and_class(element_to_click.dom_address)
+        real_clickable = self._find_element(element_to_click)
 
         if real_clickable is None:
             logging.debug("Target Clickable not found")
@@ -138,26 +185,32 @@ class EventExecutor(InteractionCore):
 
         self._capturing_ajax = True
         real_clickable.evaluateJavaScript(js_code)
-        self._wait(0.5)
+        return None
+
+    def collect_event_result(self):
+        webpage = self._webpage
+        element_to_click = self.element_to_click
         self._capturing_ajax = False
-        links, clickables = extract_links(self.mainFrame(), webpage.url)
+        extraction = extract_page(self.mainFrame(), self._page_extractor_js)
+        links, clickables = extract_links(extraction, webpage.url)
 
-        forms = extract_forms(self.mainFrame())
-        elements_with_event_properties = property_helper(self.mainFrame())
+        forms = extract_forms(extraction)
+        elements_with_event_properties = property_helper(extraction)
         self.mainFrame().evaluateJavaScript(self._property_obs_js)
         self._wait(0.1)
 
         html = self.mainFrame().toHtml()
         url = self.mainFrame().url().toString()
 
-        if is_key_event:
-            generator = KeyClickable(element_to_click, random_char)
+        if self._is_key_event:
+            generator = KeyClickable(element_to_click, self._random_char)
         else:
             generator = element_to_click
         if self._url_changed and self._new_url.toString() != webpage.url:
             delta_page = DeltaPage(-1, self._new_url.toString(), html=None, generator=generator, parent_id=webpage.id,
                                    cookiesjar=webpage.cookiejar)
             self._analyzing_finished = True
+            self._snapshot_key = None
             self.mainFrame().setHtml(None)
             return EventResult.URLChanged, delta_page
         elif self.popup is not None:
@@ -166,6 +219,7 @@ class EventExecutor(InteractionCore):
             delta_page = DeltaPage(-1, popup_url, html=None, generator=generator, parent_id=webpage.id)
             self.popup = None
             self._analyzing_finished = True
+            self._snapshot_key = None
             self.mainFrame().setHtml(None)
             return EventResult.CreatesPopup, delta_page
         else:
@@ -183,9 +237,32 @@ class EventExecutor(InteractionCore):
             delta_page.forms = forms
             delta_page.ajax_requests = self.ajax_requests
             self._analyzing_finished = True
-            self.mainFrame().setHtml(None)
+            if self._snapshot_key is None:
+                self.mainFrame().setHtml(None)
             return EventResult.Ok, delta_page
 
+    def _get_snapshot_key(self, webpage, pre_clicks, xhr_options):
+        """
+        Only delta pages are snapshotted, normal pages are reached with one load anyway
+        """
+        if len(pre_clicks) == 0:
+            return None
+        return webpage.id, webpage.url, tuple(click.toString() for click in pre_clicks), xhr_options
+
+    def _take_snapshot(self):
+        self.mainFrame().evaluateJavaScript(self._dom_snapshot_js)
+        return self.mainFrame().evaluateJavaScript("jaek_snapshot.take()") is True
+
+    def _restore_snapshot(self):
+        """
+        Undoes the changes of the last event. If this fails, the page is loaded again and the pre clicks are replayed.
+        """
+        if self.mainFrame().evaluateJavaScript("typeof jaek_snapshot !== 'undefined' && jaek_snapshot.restore()") is True:
+            return True
+        logging.debug("Restoring snapshot failed...")
+        self._snapshot_key = None
+        return False
+
     def javaScriptAlert(self, frame, msg):
         logging.debug("Alert occurs in frame: {} with message: {}".format(frame.baseUrl().toString(), msg))
 
@@ -199,13 +276,14 @@ class EventExecutor(InteractionCore):
 
     def jsWinObjClearedHandler(self):  # Adding here the js-scripts corresponding to the phases
         if not self._analyzing_finished:
-            self.mainFrame().evaluateJavaScript(self._lib_js)
-            self.mainFrame().evaluateJavaScript(self._md5)
             self.mainFrame().addToJavaScriptWindowObject("jswrapper", self._js_bridge)
             if self.xhr_options == XHRBehavior.ObserveXHR:
-                self.mainFrame().evaluateJavaScript(self._xhr_observe_js)
-            if self.xhr_options == XHRBehavior.InterceptXHR:
-                self.mainFrame().evaluateJavaScript(self._xhr_interception_js)
+                bundle = get_bundle(BundleMode.ExecutorObserveXHR)
+            elif self.xhr_options == XHRBehavior.InterceptXHR:
+                bundle = get_bundle(BundleMode.ExecutorInterceptXHR)
+            else:
+                bundle = get_bundle(BundleMode.Executor)
+            self.mainFrame().evaluateJavaScript(bundle.source)
 
     def createWindow(self, win_type):
         logging.debug("Creating new window...{}".format(win_type))
@@ -0,0 +1,131 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Executes the clickables of one page on several EventExecutors at the same time. Everything runs in the Qt event loop
+of the crawler, the executors are driven step by step and the crawler waits only once per step for all of them.
+'''
+
+import logging
+from time import time
+
+from core.eventexecutor import EventExecutor, EventResult
+from core.interactioncore import wait_in_event_loop
+from models.enumerations import XHRBehavior
+from models.utils import CrawlSpeed
+
+__author__ = 'constantin'
+
+
+def first_executions(clickables, supported_events):
+    """
+    :return: list of (clickable, xhr_behavior) with the xhr behavior the crawler chooses for the first execution
+    """
+    result = []
+    for clickable in clickables:
+        event = clickable.event
+        if event[0:2] == "on":
+            event = event[2:]
+        if event not in supported_events and "javascript:" not in event:
+            continue
+        if clickable.clickable_type is not None:
+            result.append((clickable, XHRBehavior.ObserveXHR))
+        else:
+            result.append((clickable, XHRBehavior.InterceptXHR))
+    return result
+
+
+class EventExecutorPool():
+
+    def __init__(self, parent, size, proxy="", port=0, crawl_speed=CrawlSpeed.Medium, network_access_manager=None):
+        # All executors use the same network access manager, so they share the cookie jar
+        self._executors = [EventExecutor(parent, proxy, port, crawl_speed=crawl_speed,
+                                         network_access_manager=network_access_manager) for i in range(size)]
+        self.wait_for_event = self._executors[0].wait_for_event
+        self.supported_events = self._executors[0].supported_events
+
+    def executors(self):
+        return list(self._executors)
+
+    def execute(self, webpage, executions, pre_clicks=[], timeout=5):
+        """
+        :param executions: list of (clickable, xhr_behavior)
+        :return: list of (event_result, delta_page) in the same order as executions
+        """
+        results = [None] * len(executions)
+        size = len(self._executors)
+        for start in range(0, len(executions), size):
+            batch = list(zip(range(start, start + size), self._executors, executions[start:start + size]))
+            self._execute_batch(webpage, batch, pre_clicks, timeout, results)
+        logging.debug("{} events executed with {} executors...".format(len(executions), size))
+        return results
+
+    def _execute_batch(self, webpage, batch, pre_clicks, timeout, results):
+        active = []
+        for index, executor, (clickable, xhr_behavior) in batch:
+            result = executor.prepare_execution(webpage, clickable, xhr_behavior, pre_clicks)
+            if result is not None:
+                results[index] = result
+            else:
+                active.append((index, executor))
+
+        loading = [(index, executor) for index, executor in active if not executor.restored_from_snapshot]
+        if len(loading) > 0:
+            t = 0.0
+            while not all(executor.loading_complete() for index, executor in loading) and t < timeout:
+                self._wait(0.1)
+                t += 0.1
+            for index, executor in loading:
+                if not executor.loading_complete():
+                    logging.debug("Timeout occurs while initial page loading...")
+                    results[index] = EventResult.ErrorWhileInitialLoading, None
+            loading = [(index, executor) for index, executor in loading if results[index] is None]
+            self._wait(0.1)
+            for click in pre_clicks:
+                for index, executor in loading:
+                    if results[index] is None:
+                        results[index] = executor.execute_pre_click(click)
+                self._wait_until_idle([executor for index, executor in loading], self.wait_for_event)
+            for index, executor in loading:
+                if results[index] is None:
+                    executor.finish_pre_clicks()
+            active = [(index, executor) for index, executor in active if results[index] is None]
+
+        for index, executor in active:
+            results[index] = executor.fire_event()
+        active = [(index, executor) for index, executor in active if results[index] is None]
+        if len(active) > 0:
+            self._wait_until_idle([executor for index, executor in active], 0.5)
+        for index, executor in active:
+            results[index] = executor.collect_event_result()
+
+    def _wait_until_idle(self, executors, max_waiting_time):
+        deadline = time() + max_waiting_time
+        idle_since = time()
+        idle_window = self._executors[0].idle_window
+        while time() < deadline:
+            self._wait(min(0.05, deadline - time()))
+            # Every executor has to be asked, otherwise it would not notice the DOM changes until the next call
+            busy = [executor.is_busy() for executor in executors]
+            if any(busy):
+                idle_since = time()
+            elif time() - idle_since >= idle_window:
+                return True
+        return False
+
+    def _wait(self, waiting_time=1):
+        wait_in_event_loop(waiting_time)
+        for executor in self._executors:
+            executor.drain_js_messages()
@@ -20,9 +20,11 @@ import logging
 from PyQt5.Qt import QUrl
 
 from core.interactioncore import InteractionCore
+from core.jsbundle import BundleMode, get_bundle
 from core.eventexecutor import EventResult
 from analyzer.helper.formhelper import extract_forms
 from analyzer.helper.linkhelper import extract_links
+from analyzer.helper.pageextractor import extract_page
 from models.clickable import Clickable
 from models.utils import CrawlSpeed, purge_dublicates
 
@@ -47,10 +49,7 @@ class FormHandler(InteractionCore):
         self.mainFrame().setHtml(webpage.html, QUrl(url))
         self._new_clickables = []
 
-        t = 0.0
-        while not self._loading_complete and t < timeout: # Waiting for finish processing
-            self._wait(0.1)
-            t += 0.1
+        self._wait_for_loading(timeout) # Waiting for finish processing
         if not self._loading_complete:
             logging.debug("Timeout occurs while initial page loading...")
             return EventResult.ErrorWhileInitialLoading, None
@@ -106,9 +105,9 @@ class FormHandler(InteractionCore):
                     continue
                 logging.debug("Eval: {}".format(snippet+";"))
                 self.mainFrame().evaluateJavaScript(snippet+";")
-                self._wait(3)
+                self._wait_until_idle(3)
             self.mainFrame().evaluateJavaScript(self._addEventListener)
-            self._wait(3)
+            self._wait_until_idle(3)
         else:
             #TODO: Implement way for sending forms without onsubmit-method
             # check between: target_form.evaluateJavaScript("Simulate or document.?form?.submit())
@@ -116,14 +115,15 @@ class FormHandler(InteractionCore):
             if q_submit_button is not None:
                 logging.debug("Click on submit button...")
                 q_submit_button.evaluateJavaScript("Simulate.click(this);")
-                self._wait(3)
+                self._wait_until_idle(3)
             else:
                 logging.debug("Trigger submit event on form...")
                 target_form.evaluateJavaScript("Simulate.submit(this);")
-                self._wait(3)
+                self._wait_until_idle(3)
 
-        links, clickables = extract_links(self.mainFrame(), url)
-        forms = extract_forms(self.mainFrame())
+        extraction = extract_page(self.mainFrame(), self._page_extractor_js)
+        links, clickables = extract_links(extraction, url)
+        forms = extract_forms(extraction)
         html = self.mainFrame().toHtml()
         #f = open("html.txt", "w")
         #f.write(html)
@@ -135,9 +135,8 @@ class FormHandler(InteractionCore):
 
     def jsWinObjClearedHandler(self): #Adding here the js-scripts corresponding to the phases
         if not self._analyzing_finished:
-            self.mainFrame().evaluateJavaScript(self._lib_js)
-            self.mainFrame().evaluateJavaScript(self._md5)
             self.mainFrame().addToJavaScriptWindowObject("jswrapper", self._js_bridge)
+            self.mainFrame().evaluateJavaScript(get_bundle(BundleMode.FormHandler).source)
 
     def javaScriptConsoleMessage(self, message, lineNumber, sourceID):
         #logging.debug("Console(FormHandler): " + message + " at: " + str(lineNumber))
@@ -17,15 +17,35 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 from PyQt5.Qt import QWebPage, QWebSettings
-from PyQt5.QtNetwork import QNetworkProxy, QNetworkRequest
-from PyQt5.QtCore import QSize, QUrl, QByteArray
+from PyQt5.QtNetwork import QNetworkProxy, QNetworkRequest, QNetworkReply
+from PyQt5.QtCore import QSize, QUrl, QByteArray, QEventLoop, QTimer
 
-from time import time, sleep
+from time import time
 from core.jsbridge import JsBridge
+from core.jsbundle import read_script
 from models.clickable import Clickable
 from models.utils import CrawlSpeed
+import json
 import logging
 
+def wait_in_event_loop(waiting_time, until=None):
+    """
+    Runs the Qt event loop for waiting_time seconds. The process sleeps until Qt has something to do instead of
+    spinning on processEvents. If the signal until is emitted, the waiting ends earlier.
+    """
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+    if until is not None:
+        until.connect(loop.quit)
+    timer.start(max(0, int(waiting_time * 1000)))
+    loop.exec_()
+    timer.stop()
+    if until is not None:
+        until.disconnect(loop.quit)
+
+
 class InteractionCore(QWebPage):
     '''
     This is the main class for interacting with a webpage, here are all necessary js-files loaded, and signal connections build
@@ -39,47 +59,36 @@ class InteractionCore(QWebPage):
         self.frameCreated.connect(self.frameCreatedHandler)
         self.setViewportSize(QSize(1024, 800))
 
+        # The waiting times are upper bounds, the page counts as done if it was idle for idle_window seconds
         if crawl_speed == CrawlSpeed.Slow:
             self.wait_for_processing = 1
             self.wait_for_event = 2
+            self.idle_window = 0.5
         if crawl_speed == CrawlSpeed.Medium:
             self.wait_for_processing = 0.3
             self.wait_for_event = 1
+            self.idle_window = 0.3
         if crawl_speed == CrawlSpeed.Fast:
             self.wait_for_processing = 0.1
             self.wait_for_event = 0.5
+            self.idle_window = 0.2
         if crawl_speed == CrawlSpeed.Speed_of_Lightning:
             self.wait_for_processing = 0.01
             self.wait_for_event = 0.1
+            self.idle_window = 0.05
+        self._last_mutations = None
         
-        f = open("js/lib.js", "r")
-        self._lib_js = f.read()
-        f.close()
-        
-        f = open("js/ajax_observer.js")
-        self._xhr_observe_js = f.read()
-        f.close()
-        
-        f = open("js/timing_wrapper.js")
-        self._timeming_wrapper_js = f.read()
-        f.close()
-        
-        
-        f = open("js/ajax_interceptor.js")
-        self._xhr_interception_js = f.read()
-        f.close()
-        
-        f = open("js/addeventlistener_wrapper.js")
-        self._addEventListener = f.read()
-        f.close()
-        
-        f = open("js/md5.js")
-        self._md5 = f.read()
-        f.close()
-
-        f = open("js/property_obs.js")
-        self._property_obs_js = f.read()
-        f.close()
+        self._lib_js = read_script("lib.js")
+        self._xhr_observe_js = read_script("ajax_observer.js")
+        self._timeming_wrapper_js = read_script("timing_wrapper.js")
+        self._xhr_interception_js = read_script("ajax_interceptor.js")
+        self._addEventListener = read_script("addeventlistener_wrapper.js")
+        self._md5 = read_script("md5.js")
+        self._property_obs_js = read_script("property_obs.js")
+        self._dom_snapshot_js = read_script("dom_snapshot.js")
+        self._quiescence_js = read_script("quiescence.js")
+        self._element_locator_js = read_script("element_locator.js")
+        self._page_extractor_js = read_script("page_extractor.js")
 
         enablePlugins = True
         loadImages = False
@@ -126,14 +135,59 @@ class InteractionCore(QWebPage):
     def javaScriptPrompt(self, *args, **kwargs):
         return True
             
-    def _wait(self, waiting_time=1):
-        """Wait for delay time
+    def _wait(self, waiting_time=1, until=None):
+        """Wait for delay time, the messages of the page, that are still buffered, are handled afterwards
         """
-        deadline = time() + waiting_time
-        while time() < deadline:
-            sleep(0)
-            self.app.processEvents()
+        wait_in_event_loop(waiting_time, until)
+        self.drain_js_messages()
+
+    def drain_js_messages(self):
+        self.mainFrame().evaluateJavaScript("if (typeof jaek_channel !== 'undefined') { jaek_channel.flush() }")
+
+    def _wait_for_loading(self, timeout):
+        """Wait until loadFinishedHandler sets _loading_complete, but not longer than timeout
+        :return: the waited time in seconds
+        """
+        start = time()
+        deadline = start + timeout
+        while not self._loading_complete and time() < deadline:
+            self._wait(deadline - time(), until=self.loadFinished)
+        return time() - start
             
+    def _wait_until_idle(self, max_waiting_time):
+        """Wait until the page is idle, but not longer than max_waiting_time
+        """
+        deadline = time() + max_waiting_time
+        idle_since = time()
+        self._last_mutations = None
+        while time() < deadline:
+            self._wait(min(0.05, deadline - time()))
+            if self.is_busy():
+                idle_since = time()
+            elif time() - idle_since >= self.idle_window:
+                return True
+        return False
+
+    def is_busy(self):
+        """
+        A page is busy, if one of its network replies is running, a short timeout is pending or the DOM was changed
+        since the last call. Timeouts and DOM changes are counted by quiescence.js.
+        """
+        if self.has_running_requests():
+            return True
+        activity = self.mainFrame().evaluateJavaScript("typeof jaek_activity !== 'undefined' ? jaek_activity.state() : null")
+        if activity is None:
+            return False
+        busy = activity['timers'] > 0 or activity['mutations'] != self._last_mutations
+        self._last_mutations = activity['mutations']
+        return busy
+
+    def has_running_requests(self):
+        for reply in self.networkAccessManager().findChildren(QNetworkReply):
+            if reply.isRunning():
+                return True
+        return False
+
     def javaScriptConsoleMessage(self, message, lineNumber, sourceID):
         #logging.debug("Console: " + message + " at: " + str(lineNumber))
         pass
@@ -142,6 +196,21 @@ class InteractionCore(QWebPage):
         pass
 
     def add_eventlistener_to_element(self, msg):
+        self.add_eventlisteners_to_elements([msg])
+
+    def add_eventlisteners_to_elements(self, msgs):
+        """
+        The known clickables are put into a set once per call, so a whole batch is checked against them without
+        scanning the list for every message
+        """
+        known_clickables = set(self._new_clickables)
+        for msg in msgs:
+            clickable = self._clickable_of_event_listener(msg)
+            if clickable is not None and clickable not in known_clickables:
+                self._new_clickables.append(clickable)
+                known_clickables.add(clickable)
+
+    def _clickable_of_event_listener(self, msg):
         #logging.debug(msg)
         if "id" in msg and msg['id'] != "":
             id = msg['id']
@@ -158,9 +227,8 @@ class InteractionCore(QWebPage):
             html_class = None
         function_id = msg['function_id']
         if tag is not None and dom_address != "":
-            tmp = Clickable(event, tag, dom_address, id, html_class, function_id=function_id)
-            if tmp not in self._new_clickables:
-                self._new_clickables.append(tmp)
+            return Clickable(event, tag, dom_address, id, html_class, function_id=function_id)
+        return None
 
 
     def search_element_with_id(self, element_id):
@@ -171,79 +239,26 @@ class InteractionCore(QWebPage):
             return None
 
     def search_element_with_class(self, cls, dom_adress):
-        css_cls_definition = ""
-        classes = cls.split(" ")
-        for cls in classes: #converting class names in css-compatible classnames
-            cls = "." + cls
-            css_cls_definition = css_cls_definition + cls + " "
-        elems = self.mainFrame().findAllElements(css_cls_definition)
-        for elem in elems:
-            if dom_adress == elem.evaluateJavaScript("getXPath(this)"):
-                return elem
+        return self.locate_element(dom_adress, cls)
 
     def search_element_without_id_and_class(self, dom_adress):
-        check_dom_adress = dom_adress
-        dom_address = dom_adress.split("/")
-        current_element_in_dom = self.mainFrame().documentElement() #Is HTML-Element
-        while len(dom_address) > 0 and current_element_in_dom is not None:
-            target_tag_name = dom_address.pop(0) # Get and remove the first element
-            target_tag_name = target_tag_name.upper()
-            if len(target_tag_name) == 0:
-                continue
-            elif target_tag_name == "HTML": #or target_tag_name == "body":
-                continue
-            else:
-                tmp = target_tag_name.find("[")
-                if tmp > 0: # target_tag_name looks like tagname[index]
-                    target_tag_name = target_tag_name.split("[")
-                    index = int(target_tag_name[1].split("]")[0]) # get index out of target_tag_name
-                    target_tag_name = target_tag_name[0] # target_tag_name name
-                    last_child = current_element_in_dom.lastChild()
-                    tmp_element = current_element_in_dom.findFirst(target_tag_name) # takes first child
-                    if tmp_element.tagName() == target_tag_name: # if firstchild is from type of target_tag_name, subtrakt 1 from index
-                        index -= 1;
-                    counter = 100 #Sometimes comparing with last child went wrong, therefore we have an backup fragment_counter
-                    while index > 0 and tmp_element != last_child: # take next sibbling until index is 0, if target_tag_name is equal subtrakt one
-                        tmp_element = tmp_element.nextSibling() #
-                        if tmp_element.tagName() == target_tag_name:
-                            index -= 1
-                        counter -= 1
-                        if counter == 0: #If fragment_counter 0 then break, we wont find it anymore
-                            current_element_in_dom = None
-                            break
-                    if index == 0 and tmp_element.tagName() == target_tag_name:
-                        current_element_in_dom = tmp_element
-                    else: #We miss the element
-                        current_element_in_dom = None
-                else: #target_tag_name is the only of his type, or the first...is die hell
-                    tmp_element = current_element_in_dom.firstChild()
-                    last_child = current_element_in_dom.lastChild()
-                    counter = 100
-                    while tmp_element.tagName() != target_tag_name and tmp_element != last_child and counter > 0:
-                        #logging.debug(tmp_element.tagName())
-                        counter -= 1
-                        if tmp_element.tagName() == target_tag_name:
-                            current_element_in_dom = tmp_element
-                            break
-                        else:
-                            tmp_element = tmp_element.nextSibling()
-                    if tmp_element.tagName() != target_tag_name or counter == 0:
-                        current_element_in_dom = None
-                    else:
-                        current_element_in_dom = tmp_element
+        return self.locate_element(dom_adress)
 
-        tmp_element = None
-        last_child = None
-        dom_address = None
-
-        if current_element_in_dom == None:
+    def locate_element(self, dom_address, html_class=None):
+        """
+        Resolves the dom address with one call of jaek_locate inside the page, instead of walking the DOM from python
+        :return: QWebElement or None, if there is no element with this address (and these classes)
+        """
+        mark = self.mainFrame().evaluateJavaScript("jaek_locate({}, {})".format(json.dumps(dom_address),
+                                                                               json.dumps(html_class)))
+        if mark is None:
+            logging.debug("Element not found: {}".format(dom_address))
             return None
-        if current_element_in_dom.evaluateJavaScript("getXPath(this)") != check_dom_adress:
-            logging.debug("Element not found: " + str(current_element_in_dom.evaluateJavaScript("getXPath(this)")) + " : " + str(check_dom_adress))
+        element = self.mainFrame().findFirstElement('[data-jaek-locate="{}"]'.format(mark))
+        if element.isNull():
             return None
-        else:
-            return current_element_in_dom
-
+        element.removeAttribute("data-jaek-locate")
+        return element
 
     def make_request(self, url):
         request = QNetworkRequest()
@@ -18,13 +18,14 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 from asyncio.tasks import sleep
 import logging
 from PyQt5.Qt import QApplication, QObject
-from PyQt5.QtNetwork import QNetworkAccessManager
 import sys
 from copy import deepcopy
 from analyzer.mainanalyzer import MainAnalyzer
 from core.eventexecutor import EventResult, EventExecutor
 from core.formhandler import FormHandler
 from models.webpage import WebPage
+from network.network import NetWorkAccessManager
+from network.requestfilter import RequestFilter
 from utils.asyncrequesthandler import AsyncRequestHandler
 from utils.execptions import LoginFailed
 from utils.utils import count_cookies, calculate_similarity_between_pages
@@ -34,10 +35,10 @@ __author__ = 'constantin'
 class JaekCore(QObject):
 
 
-    def __init__(self, config, proxy="", port=0, database_manager=None):
+    def __init__(self, config, proxy="", port=0, database_manager=None, cache_dir=None):
         QObject.__init__(self)
         self.app = QApplication(sys.argv)
-        self._network_access_manager = QNetworkAccessManager(self)
+        self._network_access_manager = self._create_network_access_manager(config, cache_dir)
         self.user = None
         self.proxy = proxy
         self.port = port
@@ -50,13 +51,20 @@ class JaekCore(QObject):
         self._event_executor = EventExecutor(self, proxy, port, crawl_speed=config.process_speed,
                                              network_access_manager=self._network_access_manager)
         self._dynamic_analyzer = MainAnalyzer(self, proxy, port, crawl_speed=config.process_speed,
-                                          network_access_manager=self._network_access_manager)
+                                          network_access_manager=self._network_access_manager,
+                                          virtual_time=config.virtual_time)
         self._form_handler = FormHandler(self, proxy, port, crawl_speed=config.process_speed,
                                              network_access_manager=self._network_access_manager)
 
         self.cookie_num = -1
         self.interactive_login_form_search = False
 
+    def _create_network_access_manager(self, config, cache_dir=None):
+        request_filter = RequestFilter(config.blocked_resource_types, config.blocked_hosts)
+        if cache_dir is None:
+            cache_dir = config.network_cache_dir
+        return NetWorkAccessManager(self, config.network_cache_size, cache_dir, request_filter=request_filter)
+
     def _find_form_with_special_parameters(self, page, login_data, interactive_search=True):
         keys = list(login_data.keys())
         data1 = keys[0]
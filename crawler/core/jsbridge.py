@@ -26,6 +26,25 @@ class JsBridge(QObject):
         QObject.__init__(self)
         self.analyzer = analyzer
         self._ajax_request = []
+        self._handlers = {"xmlHTTPRequestOpen": self._xml_http_request_open,
+                          "xmlHTTPRequestSend": self._xml_http_request_send,
+                          "timeout": self._timeout,
+                          "intervall": self._intervall}
+
+    @pyqtSlot(str)
+    def batch(self, msg):
+        """
+        Messages sent by jaek_channel in lib.js, a list of {"type": name of the slot, "msg": message}. The event listeners
+        of a batch are handed over with one call, the other messages one by one in their order.
+        """
+        event_listeners = []
+        for record in json.loads(msg):
+            if record['type'] in ("add_eventListener_to_element", "add_eventlistener_to_element"):
+                event_listeners.append(record['msg'])
+            else:
+                self._handlers[record['type']](record['msg'])
+        if len(event_listeners) > 0:
+            self.analyzer.add_eventlisteners_to_elements(event_listeners)
 
     @pyqtSlot(str)
     def add_eventListener_to_element(self, msg):
@@ -34,31 +53,19 @@ class JsBridge(QObject):
 
     @pyqtSlot(str)
     def xmlHTTPRequestOpen(self, msg):
-        msg = json.loads(msg)
-        self._ajax_request.append(msg)
+        self._xml_http_request_open(json.loads(msg))
 
     @pyqtSlot(str)
     def xmlHTTPRequestSend(self, msg):
-        msg = json.loads(msg)
-        according_open = self._ajax_request.pop(0)
-        try:
-            according_open['parameters'] = msg['parameters'][0]
-        except IndexError:
-            according_open['parameters'] = ""
-        self.analyzer.capturing_requests(according_open)
+        self._xml_http_request_send(json.loads(msg))
 
     @pyqtSlot(str)
     def timeout(self, msg):
-        msg = json.loads(msg)
-        msg['type'] = "timeout"
-        self.analyzer.capture_timeout_call(msg)
+        self._timeout(json.loads(msg))
 
     @pyqtSlot(str)
     def intervall(self, msg):
-        msg = json.loads(msg)
-        msg['type'] = "intervall"
-        #logging.debug(msg)
-        self.analyzer.capture_timeout_call(msg)
+        self._intervall(json.loads(msg))
 
     @pyqtSlot(str)
     def add_eventlistener_to_element(self, msg):
@@ -68,4 +75,24 @@ class JsBridge(QObject):
 
     @pyqtSlot(str)
     def attack(self, msg):
-        self.analyzer.xss_callback(msg)
\ No newline at end of file
+        self.analyzer.xss_callback(msg)
+
+    def _xml_http_request_open(self, msg):
+        self._ajax_request.append(msg)
+
+    def _xml_http_request_send(self, msg):
+        according_open = self._ajax_request.pop(0)
+        try:
+            according_open['parameters'] = msg['parameters'][0]
+        except IndexError:
+            according_open['parameters'] = ""
+        self.analyzer.capturing_requests(according_open)
+
+    def _timeout(self, msg):
+        msg['type'] = "timeout"
+        self.analyzer.capture_timeout_call(msg)
+
+    def _intervall(self, msg):
+        msg['type'] = "intervall"
+        #logging.debug(msg)
+        self.analyzer.capture_timeout_call(msg)
@@ -0,0 +1,95 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The js-files are read once per process. The scripts, that are injected into every frame, are concatenated to one bundle
+per mode, so a frame gets them with one evaluateJavaScript call. The bundle carries the hash of its content in its
+sourceURL, so a changed bundle is never mistaken for an old one.
+'''
+
+import hashlib
+import os
+from enum import Enum
+
+__author__ = 'constantin'
+
+JS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "js")
+
+
+class BundleMode(Enum):
+    Analyzer = 0
+    Executor = 1
+    ExecutorObserveXHR = 2
+    ExecutorInterceptXHR = 3
+    FormHandler = 4
+    AnalyzerVirtualTime = 5
+
+
+_BUNDLE_SCRIPTS = {
+    BundleMode.Analyzer: ["md5.js", "lib.js", "quiescence.js", "timing_wrapper.js", "ajax_observer.js",
+                          "addeventlistener_wrapper.js"],
+    BundleMode.Executor: ["lib.js", "md5.js", "quiescence.js", "element_locator.js"],
+    BundleMode.ExecutorObserveXHR: ["lib.js", "md5.js", "quiescence.js", "element_locator.js", "ajax_observer.js"],
+    BundleMode.ExecutorInterceptXHR: ["lib.js", "md5.js", "quiescence.js", "element_locator.js",
+                                      "ajax_interceptor.js"],
+    BundleMode.FormHandler: ["lib.js", "md5.js", "quiescence.js"],
+    BundleMode.AnalyzerVirtualTime: ["md5.js", "lib.js", "quiescence.js", "virtual_clock.js", "timing_wrapper.js",
+                                     "ajax_observer.js", "addeventlistener_wrapper.js"],
+}
+
+_scripts = {}  # file name -> source
+_bundles = {}  # mode -> JsBundle
+
+
+class JsBundle():
+
+    def __init__(self, mode, scripts):
+        """
+        :param scripts: list of (file name, source)
+        """
+        self.mode = mode
+        self.file_names = [file_name for file_name, source in scripts]
+        # The separator ends a last statement without semicolon, that would run into the next script otherwise
+        source = "\n;\n".join(source for file_name, source in scripts)
+        self.hash = hashlib.md5(source.encode("utf-8")).hexdigest()
+        self.source = source + "\n//# sourceURL=jaek-{}-{}.js\n".format(mode.name.lower(), self.hash)
+
+
+def read_script(file_name):
+    """
+    :return: source of js/file_name, the file is read only once per process
+    """
+    source = _scripts.get(file_name)
+    if source is None:
+        with open(os.path.join(JS_DIR, file_name)) as f:
+            source = f.read()
+        _scripts[file_name] = source
+    return source
+
+
+def get_bundle(mode):
+    bundle = _bundles.get(mode)
+    if bundle is None:
+        bundle = JsBundle(mode, [(file_name, read_script(file_name)) for file_name in _BUNDLE_SCRIPTS[mode]])
+        _bundles[mode] = bundle
+    return bundle
+
+
+def clear_cache():
+    """
+    Forgets all read files and bundles, the next call reads the files again
+    """
+    _scripts.clear()
+    _bundles.clear()
@@ -0,0 +1,88 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Similarities between two pages, keyed by the page ids packed into one integer. The cache holds at most max_entries and
+evicts the least recently used. New similarities are written to the database in batches, so a resumed crawl or the
+attacker can load them again instead of computing them.
+'''
+
+from collections import OrderedDict
+
+__author__ = 'constantin'
+
+
+def similarity_key(x, y):
+    """
+    :return: both page ids in one integer, the bigger one in the upper 32 bits
+    """
+    if x < y:
+        x, y = y, x
+    return (x << 32) | y
+
+
+class SimilarityCache():
+
+    def __init__(self, persistence_manager=None, max_entries=100000, batch_size=1000):
+        self._persistence_manager = persistence_manager
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self._entries = OrderedDict()
+        self._unwritten = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, x, y):
+        """
+        :return: the similarity or None, if it is not cached
+        """
+        key = similarity_key(x, y)
+        similarity = self._entries.get(key)
+        if similarity is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return similarity
+
+    def put(self, x, y, similarity):
+        key = similarity_key(x, y)
+        self._insert(key, similarity)
+        self._unwritten[key] = similarity
+        if len(self._unwritten) >= self.batch_size:
+            self.flush()
+
+    def load(self, page_ids):
+        """
+        Loads the stored similarities between the given pages
+        """
+        if self._persistence_manager is None:
+            return
+        for key, similarity in self._persistence_manager.get_similarities(page_ids).items():
+            self._insert(key, similarity)
+
+    def flush(self):
+        if self._persistence_manager is not None and len(self._unwritten) > 0:
+            self._persistence_manager.write_similarities(self._unwritten)
+        self._unwritten = {}
+
+    def _insert(self, key, similarity):
+        self._entries[key] = similarity
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
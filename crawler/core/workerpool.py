@@ -0,0 +1,204 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Worker pool for the crawler. Every worker is an own process with its own QApplication, MainAnalyzer and
+EventExecutor. The crawler (coordinator) leases urls and delta pages to the workers, the workers analyze the page,
+execute all of its clickables and send everything back. Only the coordinator talks to the database.
+'''
+
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from queue import Empty
+
+from core.eventexecutorpool import EventExecutorPool, first_executions
+from core.jaekcore import JaekCore
+
+__author__ = 'constantin'
+
+
+class PageLease():
+    """
+    A normal url, that is analyzed by a worker
+    """
+    def __init__(self, url, current_depth):
+        self.lease_id = None
+        self.url = url
+        self.current_depth = current_depth
+        self.result = None
+
+    def to_task(self):
+        return "page", self.lease_id, self.url.toString(), self.current_depth
+
+
+class DeltaPageLease():
+    """
+    A delta page, whose clickables are executed by a worker. parent_page and previous_pages stay at the coordinator.
+    """
+    def __init__(self, delta_page, necessary_clicks, parent_page, previous_pages):
+        self.lease_id = None
+        self.delta_page = delta_page
+        self.necessary_clicks = necessary_clicks
+        self.parent_page = parent_page
+        self.previous_pages = previous_pages
+        self.result = None
+
+    def to_task(self):
+        return "delta_page", self.lease_id, self.delta_page, self.necessary_clicks
+
+
+class LeaseResult():
+
+    def __init__(self, lease_id, response_code=None, page=None, event_results=None):
+        self.lease_id = lease_id
+        self.response_code = response_code
+        self.page = page
+        self.event_results = event_results if event_results is not None else {}
+
+
+def event_result_key(clickable, xhr_behavior):
+    return clickable.dom_address, clickable.event, xhr_behavior
+
+
+class CrawlWorker(JaekCore):
+    """
+    Runs inside the worker process. It analyzes pages and executes the clickables, everything else is done by the
+    coordinator.
+    """
+
+    def __init__(self, crawl_config, proxy="", port=0, cache_dir=None):
+        super(CrawlWorker, self).__init__(crawl_config, proxy, port, database_manager=None, cache_dir=cache_dir)
+        self._event_executor_pool = None
+        if crawl_config.num_event_executors > 1:
+            self._event_executor_pool = EventExecutorPool(self, crawl_config.num_event_executors, proxy, port,
+                                                          crawl_speed=crawl_config.process_speed,
+                                                          network_access_manager=self._network_access_manager)
+
+    def process(self, task):
+        kind, lease_id, payload, argument = task
+        if kind == "page":
+            response_code, page = self._dynamic_analyzer.analyze(payload, current_depth=argument)
+            if page is None:
+                return LeaseResult(lease_id, response_code)
+            for clickable in page.clickables:
+                clickable.clickable_depth = 0
+            event_results = self.execute_clickables(page, [])
+            return LeaseResult(lease_id, response_code, page, event_results)
+        else:
+            event_results = self.execute_clickables(payload, argument)
+            return LeaseResult(lease_id, None, None, event_results)
+
+    def execute_clickables(self, page, pre_clicks):
+        """
+        Executes every clickable once, with the xhr behavior the crawler would choose for the first execution
+        """
+        executions = first_executions(page.clickables, self._event_executor.supported_events)
+        if self._event_executor_pool is not None:
+            event_results = self._event_executor_pool.execute(page, executions, pre_clicks)
+        else:
+            event_results = []
+            for clickable, xhr_behavior in executions:
+                event_results.append(self._event_executor.execute(page, element_to_click=clickable,
+                                                                  pre_clicks=pre_clicks, xhr_options=xhr_behavior))
+        result = {}
+        for (clickable, xhr_behavior), event_result in zip(executions, event_results):
+            result[event_result_key(clickable, xhr_behavior)] = event_result
+        return result
+
+
+def _worker_main(crawl_config, proxy, port, task_queue, result_queue, worker_number):
+    # A disk cache must not be used by two processes, so every worker has its own
+    cache_dir = os.path.join(crawl_config.network_cache_dir, "worker{}".format(worker_number))
+    worker = CrawlWorker(crawl_config, proxy, port, cache_dir)
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        try:
+            result = worker.process(task)
+        except Exception as err:
+            # The coordinator falls back to its own analyzer, so a broken page must not kill the worker
+            logging.debug("Worker failed on lease {}: {}".format(task[1], err))
+            result = LeaseResult(task[1])
+        result_queue.put(result)
+
+
+class WorkerPool():
+    """
+    Hands out leases to the worker processes and returns the results in the order the leases were given.
+    """
+
+    def __init__(self, crawl_config, num_workers, proxy="", port=0):
+        # Forking a process with a running QApplication is not safe, so every worker starts from scratch
+        context = multiprocessing.get_context("spawn")
+        self.num_workers = num_workers
+        self._task_queue = context.Queue()
+        self._result_queue = context.Queue()
+        self._pending_leases = OrderedDict()
+        self._finished_results = {}
+        self._lease_counter = 0
+        self._workers = []
+        for i in range(num_workers):
+            worker = context.Process(target=_worker_main, args=(crawl_config, proxy, port, self._task_queue,
+                                                                self._result_queue, i), daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logging.debug("{} crawl workers started...".format(num_workers))
+
+    def has_capacity(self):
+        return len(self._pending_leases) < self.num_workers
+
+    def has_pending_leases(self):
+        return len(self._pending_leases) > 0
+
+    def pending_delta_pages(self):
+        return [lease.delta_page for lease in self._pending_leases.values() if isinstance(lease, DeltaPageLease)]
+
+    def submit(self, lease):
+        lease.lease_id = self._lease_counter
+        self._lease_counter += 1
+        self._pending_leases[lease.lease_id] = lease
+        self._task_queue.put(lease.to_task())
+
+    def next_result(self, timeout=300):
+        """
+        :return: the oldest lease with its result attached, None if no lease is pending
+        """
+        if len(self._pending_leases) == 0:
+            return None
+        lease_id, lease = next(iter(self._pending_leases.items()))
+        while lease_id not in self._finished_results:
+            try:
+                result = self._result_queue.get(timeout=timeout)
+            except Empty:
+                logging.debug("No result from workers for lease {}, continue without it...".format(lease_id))
+                result = LeaseResult(lease_id)
+                if not any(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError("All crawl workers are dead...")
+            self._finished_results[result.lease_id] = result
+        del self._pending_leases[lease_id]
+        lease.result = self._finished_results.pop(lease_id)
+        return lease
+
+    def shutdown(self):
+        for i in range(len(self._workers)):
+            self._task_queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        self._workers = []
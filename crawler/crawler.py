@@ -18,19 +18,20 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from asyncio.tasks import sleep
 import logging
-import random
 import sys
 from enum import Enum
 from copy import deepcopy
 from urllib.parse import urljoin
 
-from PyQt5.Qt import QApplication, QObject
-from PyQt5.QtNetwork import QNetworkAccessManager
+from PyQt5.Qt import QApplication, QObject, QEvent
 
 from core.eventexecutor import EventExecutor, XHRBehavior, EventResult
+from core.eventexecutorpool import EventExecutorPool, first_executions
 from core.formhandler import FormHandler
 from core.clustermanager import ClusterManager
 from core.jaekcore import JaekCore
+from core.workerpool import WorkerPool, PageLease, DeltaPageLease, event_result_key
+from database.deltapagequeue import DeltaPageQueue
 from models.url import Url
 from utils.asyncrequesthandler import AsyncRequestHandler
 from utils.execptions import PageNotFound, LoginFailed
@@ -39,7 +40,9 @@ from models.webpage import WebPage
 from models.clickabletype import ClickableType
 from utils.domainhandler import DomainHandler
 from analyzer.mainanalyzer import MainAnalyzer
-from utils.utils import calculate_similarity_between_pages, subtract_parent_from_delta_page, count_cookies
+from utils.memory import current_rss, count_qobjects, to_mb
+from utils.pagesimilarity import PageFeatures, similarity_of_features
+from utils.utils import subtract_parent_from_delta_page, count_cookies
 
 
 potential_logout_urls = []
@@ -49,16 +52,16 @@ class Crawler(JaekCore):
     def __init__(self, crawl_config, proxy="", port=0, database_manager=None):
         QObject.__init__(self)
         self.app = QApplication(sys.argv)
-        self._network_access_manager = QNetworkAccessManager(self)
-        #self._network_access_manager = self._dynamic_analyzer.networkAccessManager()
+        self._network_access_manager = self._create_network_access_manager(crawl_config)
 
         self._event_executor = EventExecutor(self, proxy, port, crawl_speed=crawl_config.process_speed,
                                              network_access_manager=self._network_access_manager)
         self._dynamic_analyzer = MainAnalyzer(self, proxy, port, crawl_speed=crawl_config.process_speed,
-                                          network_access_manager=self._network_access_manager)
+                                          network_access_manager=self._network_access_manager,
+                                          virtual_time=crawl_config.virtual_time)
         self._form_handler = FormHandler(self, proxy, port, crawl_speed=crawl_config.process_speed,
                                              network_access_manager=self._network_access_manager)
-
+        self._event_executor_pool = self._create_event_executor_pool(crawl_config, proxy, port)
 
 
         self.domain_handler = None
@@ -70,16 +73,32 @@ class Crawler(JaekCore):
 
         self.crawler_state = CrawlState.NormalPage
         self.crawl_config = crawl_config
-        self.tmp_delta_page_storage = []  # holds the deltapages for further analyses
+        self.tmp_delta_page_storage = DeltaPageQueue(crawl_config.delta_page_memory * 1024 * 1024)  # holds the deltapages for further analyses
+        self._next_delta_page_key = 0  # position of the next waiting delta page in the database
+        self._taken_delta_page_ids = set()  # delta pages taken from the queue, that are still in the database
         self.url_frontier = []
         self.user = None
         self.page_id = 0
         self.current_depth = 0
         self.database_manager = database_manager
 
-        self.cluster_manager = ClusterManager(self.database_manager) # dict with url_hash and
-
-    def crawl(self, user):
+        self.cluster_manager = ClusterManager(self.database_manager, crawl_config.similarity_cache_size) # dict with url_hash and
+        self._worker_pool = None
+        self._prefetched_page = None  # (response_code, page) analyzed by a worker
+        self._prefetched_event_results = {}  # Clickables of the current page, executed by a worker
+        self._rss_after_recycling = None
+        self._last_rss = None
+
+    def resume(self, user):
+        """
+        Continues an aborted crawl from its last checkpoint. The database manager must be created with dropping=False.
+        """
+        checkpoint = self.database_manager.get_checkpoint()
+        if checkpoint is None:
+            logging.debug("No checkpoint for {} found, start from the beginning...".format(user.username))
+        self.crawl(user, checkpoint)
+
+    def crawl(self, user, checkpoint=None):
         logging.debug("Crawl with userId: {}".format(user.username))
         self.user = user
         self.domain_handler = DomainHandler(self.crawl_config.start_page_url, self.database_manager, self.cluster_manager)
@@ -91,8 +110,20 @@ class Crawler(JaekCore):
             self.crawl_with_login = True
             successfull, self.interactive_login_form_search = self._initial_login()
 
+        if self.crawl_config.num_workers > 1:
+            if self.crawl_with_login:
+                # The workers have their own cookie jars, so they would crawl as logged out user
+                logging.debug("Crawling with login is not supported by the worker pool, crawl with one process...")
+            else:
+                self._worker_pool = WorkerPool(self.crawl_config, self.crawl_config.num_workers, self.proxy, self.port)
+
+        if checkpoint is not None:
+            self._restore_checkpoint(checkpoint)
 
         round_counter = 0
+        self._network_access_manager.reset_statistics()
+        self._rss_after_recycling = current_rss()
+        self._last_rss = self._rss_after_recycling
         while True:
             logging.debug("=======================New Round=======================")
             current_page = None
@@ -100,94 +131,75 @@ class Crawler(JaekCore):
             parent_page = None  # Saves the parent of the delta-page (not other delta pages)
             previous_pages = []  # Saves all the pages the crawler have to pass to reach my delta-page
             delta_page = None
+            self._prefetched_page = None
+            self._prefetched_event_results = {}
+            self._write_checkpoint()
+
+            round_counter += 1
+            rss, qobjects = self._log_memory(round_counter)
+            if self._needs_recycling(rss, qobjects):
+                self._recycle_browser_objects()
+
+            if self._worker_pool is not None:
+                lease = self._next_finished_lease()
+                if lease is None:
+                    break
+                if isinstance(lease, DeltaPageLease):
+                    self.crawler_state = CrawlState.DeltaPage
+                    current_page = lease.delta_page
+                    necessary_clicks = lease.necessary_clicks
+                    parent_page = lease.parent_page
+                    previous_pages = lease.previous_pages
+                    self.current_depth = parent_page.current_depth
+                    url_to_request = parent_page.url
+                else:
+                    self.crawler_state = CrawlState.NormalPage
+                    url_to_request = lease.url
+                    self.current_depth = lease.current_depth
+                    if lease.result.page is not None:
+                        self._prefetched_page = lease.result.response_code, lease.result.page
+                self._prefetched_event_results = lease.result.event_results
 
-
-            if round_counter < 10:
-                round_counter += 1
-            else:
-                # Need to do this to prevent memory leckages, issued by PyQT bindings or something else
-                logging.debug("10 rounds over, renew critical classes...")
-                round_counter = 0
-                self._network_access_manager = None
-                self._event_executor = None
-                self._form_handler = None
-                self._event_executor = None
-                self._network_access_manager = QNetworkAccessManager(self)
-                self._event_executor = EventExecutor(self, self.proxy, self.port, crawl_speed=self.crawl_config.process_speed,
-                                             network_access_manager=self._network_access_manager)
-                self._dynamic_analyzer = MainAnalyzer(self, self.proxy, self.port, crawl_speed=self.crawl_config.process_speed,
-                                          network_access_manager=self._network_access_manager)
-                self._form_handler = FormHandler(self, self.proxy, self.port, crawl_speed=self.crawl_config.process_speed,
-                                             network_access_manager=self._network_access_manager)
-
-
-            if len(self.tmp_delta_page_storage) > 0:
+            elif len(self.tmp_delta_page_storage) > 0:
                 self.crawler_state = CrawlState.DeltaPage
-                current_page = self.tmp_delta_page_storage.pop(0)
+                current_page = self.tmp_delta_page_storage.pop()
+                self._taken_delta_page_ids.add(current_page.id)
                 logging.debug("Processing Deltapage with ID: {}, {} deltapages left...".format(str(current_page.id),
                                                                                                str(len(
                                                                                                    self.tmp_delta_page_storage))))
-                parent_page = current_page
-                while isinstance(parent_page, DeltaPage):
-                    necessary_clicks.insert(0,
-                                            parent_page.generator)  # Insert as first element because of reverse order'
-                    parent_page = self.database_manager.get_page_to_id(parent_page.parent_id)
-                    if parent_page is None:
-                        raise PageNotFound("This exception should never be raised...")
-                    previous_pages.append(parent_page)
+                preparation = self._prepare_delta_page(current_page)
+                if preparation is None:
+                    continue
+                necessary_clicks, parent_page, previous_pages = preparation
                 # Now I'm reaching a non delta-page
                 self.current_depth = parent_page.current_depth
                 url_to_request = parent_page.url
-                if current_page.generator.clickable_depth + 1 > self.crawl_config.max_click_depth:
-                    logging.debug("Don't proceed with Deltapage(max click depth)...")
-                    self.database_manager.store_delta_page(current_page)
-                    continue
 
             else:
                 logging.debug("Looking for the next url...")
-                possible_urls = self.database_manager.get_all_unvisited_urls_sorted_by_hash()
-                if len(possible_urls) > 0:
+                url_to_request = self._select_next_url()
+                if url_to_request is not None:
                     self.crawler_state = CrawlState.NormalPage
-                    cluster_per_urls = []
-                    for key in possible_urls:
-                        cluster_per_urls.append((key, self.cluster_manager.calculate_cluster_per_visited_urls(key)))
-                    next_url_hash, max_cluster_per_url = max(cluster_per_urls, key=lambda x: x[1])
-                    possible_urls = possible_urls[next_url_hash]
-                    url_to_request = possible_urls.pop(random.randint(0, len(possible_urls) - 1))
-                    if url_to_request.depth_of_finding is None:
-                        self.current_depth = 0
-                    else:
-                        self.current_depth = url_to_request.depth_of_finding + 1
+                    self.current_depth = self._depth_of_url(url_to_request)
                 else:
                     break
 
+            if self.crawler_state == CrawlState.DeltaPage:
+                self.database_manager.write_checkpoint({"in_progress_url": None, "in_progress_page_id": current_page.id})
+            else:
+                self.database_manager.write_checkpoint({"in_progress_url": url_to_request.toString(),
+                                                        "in_progress_page_id": None})
+
             if self.crawler_state == CrawlState.NormalPage:
-                if not self.domain_handler.is_in_scope(url_to_request):
-                    logging.debug("Ignoring {} (Not in scope)... ".format(url_to_request.toString()))
-                    self.database_manager.visit_url(url_to_request, None, 1000)
+                if self._worker_pool is None and not self._should_url_be_crawled(url_to_request):
                     continue
 
-                if url_to_request.depth_of_finding is not None:
-                    if url_to_request.depth_of_finding + 1 > self.crawl_config.max_depth:
-                        logging.debug("Ignoring {} (Max crawl depth)... ".format(url_to_request.toString()))
-                        self.database_manager.visit_url(url_to_request, None, 1001)
-                        continue
-
                 plain_url_to_request = url_to_request.toString()
-                if self.database_manager.url_visited(url_to_request):
-                    logging.debug("Crawler tries to use url: {} twice".format(url_to_request.toString()))
-                    continue
-
-                if not self.cluster_manager.need_more_urls_of_this_type(url_to_request.url_hash):
-                    self.database_manager.visit_url(url_to_request, None, 1002)
-                    logging.debug("Seen enough urls from {} ".format(url_to_request.toString()))
-                    continue
-
                 current_page = None
                 num_of_tries = 0
                 logging.debug("Next Url is: {}".format(url_to_request.toString()))
                 while current_page is None and num_of_tries < 3:
-                    response_code, current_page = self._dynamic_analyzer.analyze(url_to_request, current_depth=self.current_depth)
+                    response_code, current_page = self._analyze_url(url_to_request)
                     self.domain_handler.complete_urls_in_page(current_page)
                     self.domain_handler.analyze_urls(current_page)
                     self.domain_handler.set_url_depth(current_page, self.current_depth)
@@ -265,6 +277,9 @@ class Crawler(JaekCore):
                 logging.debug("Now at Deltapage: {}".format(current_page.id))
                 self.database_manager.store_delta_page(current_page)
 
+            if self._event_executor_pool is not None and len(self._prefetched_event_results) == 0:
+                self._prefetched_event_results = self._execute_events_in_parallel(current_page, necessary_clicks)
+
             num_clickables = len(current_page.clickables)
             counter = 1  # Just a counter for displaying progress
             errors = 0  # Count the errors(Missing preclickable or target elements)
@@ -316,17 +331,15 @@ class Crawler(JaekCore):
                     The clickable was executed in the past, and has triggered an backend request. Know execute it again and let that request pass
                     """
                     xhr_behavior = XHRBehavior.ObserveXHR
-                    event_result, delta_page = self._event_executor.execute(current_page, element_to_click=current_clickable_to_work_on,
-                                                                           pre_clicks=necessary_clicks,
-                                                                           xhr_options=xhr_behavior)
+                    event_result, delta_page = self._execute_event(current_page, current_clickable_to_work_on,
+                                                                   necessary_clicks, xhr_behavior)
                 else:
                     """
                     The clickable was never executed, so execute it with intercepting all backend requests.
                     """
                     xhr_behavior = XHRBehavior.InterceptXHR
-                    event_result, delta_page = self._event_executor.execute(current_page, element_to_click=current_clickable_to_work_on,
-                                                                           pre_clicks=necessary_clicks,
-                                                                           xhr_options=xhr_behavior)
+                    event_result, delta_page = self._execute_event(current_page, current_clickable_to_work_on,
+                                                                   necessary_clicks, xhr_behavior)
 
                 if event_result == EventResult.UnsupportedTag:
                     current_clickable_to_work_on.clicked = True
@@ -552,8 +565,213 @@ class Crawler(JaekCore):
 
             if self.crawler_state == CrawlState.NormalPage:
                 self.cluster_manager.add_webpage_to_cluster(current_page)
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown()
+            self._worker_pool = None
+        self.database_manager.remove_checkpoint()
+        self.cluster_manager.flush_similarities()
+        self.tmp_delta_page_storage.close()
+        self.database_manager.flush()
+        self._network_access_manager.log_statistics()
+        self.database_manager.report_slow_queries()
         logging.debug("Crawling is done...")
 
+    def _browser_pages(self):
+        pages = [self._event_executor, self._dynamic_analyzer, self._form_handler]
+        if self._event_executor_pool is not None:
+            pages.extend(self._event_executor_pool.executors())
+        return pages
+
+    def _log_memory(self, round_counter):
+        """
+        :return: (rss in bytes, QObjects of the page with the most QObjects)
+        """
+        rss = current_rss()
+        qobjects = max(count_qobjects(page) for page in self._browser_pages())
+        logging.debug("Round {}: {:.1f} MB rss ({:+.1f} MB since last round, {:+.1f} MB since last recycling), "
+                      "max {} QObjects per page".format(round_counter, to_mb(rss), to_mb(rss - self._last_rss),
+                                                        to_mb(rss - self._rss_after_recycling), qobjects))
+        self._last_rss = rss
+        return rss, qobjects
+
+    def _needs_recycling(self, rss, qobjects):
+        if to_mb(rss - self._rss_after_recycling) > self.crawl_config.recycle_rss_growth:
+            return True
+        return qobjects > self.crawl_config.recycle_max_qobjects
+
+    def _recycle_browser_objects(self):
+        """
+        Renews the pages and the network access manager to get rid of memory leaks, issued by PyQT bindings or
+        something else. Cookies and cache are handed over to the new network access manager.
+        """
+        rss_before = current_rss()
+        old_network_access_manager = self._network_access_manager
+        old_pages = self._browser_pages()
+        self._network_access_manager = old_network_access_manager.renew(self)
+        self._event_executor = EventExecutor(self, self.proxy, self.port, crawl_speed=self.crawl_config.process_speed,
+                                             network_access_manager=self._network_access_manager)
+        self._dynamic_analyzer = MainAnalyzer(self, self.proxy, self.port, crawl_speed=self.crawl_config.process_speed,
+                                              network_access_manager=self._network_access_manager,
+                                              virtual_time=self.crawl_config.virtual_time)
+        self._form_handler = FormHandler(self, self.proxy, self.port, crawl_speed=self.crawl_config.process_speed,
+                                         network_access_manager=self._network_access_manager)
+        self._event_executor_pool = self._create_event_executor_pool(self.crawl_config, self.proxy, self.port)
+        # The crawler is their parent, so dropping the references alone would keep them alive
+        for page in old_pages:
+            page.deleteLater()
+        old_network_access_manager.deleteLater()
+        # deleteLater is only carried out by a running event loop, so trigger the deletion here
+        self.app.sendPostedEvents(None, QEvent.DeferredDelete)
+        self._rss_after_recycling = current_rss()
+        logging.debug("Browser objects recycled, rss {:.1f} MB -> {:.1f} MB".format(to_mb(rss_before),
+                                                                                 to_mb(self._rss_after_recycling)))
+
+    def _write_checkpoint(self):
+        """
+        Saves the counters, that are only in memory, next to the session. Called at the beginning of every round, so a
+        resumed crawl continues with the url or delta page, that was in progress. The waiting delta pages are stored,
+        when they are queued. The ones, that were crawled since the last checkpoint, are removed here.
+        """
+        finished = self._taken_delta_page_ids
+        if self._worker_pool is not None:
+            finished = finished - set(page.id for page in self._worker_pool.pending_delta_pages())
+        self.database_manager.remove_waiting_delta_pages(finished)
+        self._taken_delta_page_ids -= finished
+        checkpoint = {"page_id": self.page_id,
+                      "current_depth": self.current_depth,
+                      "next_delta_page_key": self._next_delta_page_key,
+                      "in_progress_url": None,
+                      "in_progress_page_id": None}
+        self.database_manager.write_checkpoint(checkpoint)
+
+    def _restore_checkpoint(self, checkpoint):
+        logging.debug("Resume crawling at page id {}...".format(checkpoint['page_id']))
+        self.database_manager.rollback_to_checkpoint(checkpoint['page_id'], checkpoint['in_progress_url'],
+                                                     checkpoint['in_progress_page_id'])
+        self.page_id = checkpoint['page_id']
+        self.current_depth = checkpoint['current_depth']
+        self._next_delta_page_key = checkpoint['next_delta_page_key']
+        for delta_page in self.database_manager.get_waiting_delta_pages():
+            self.tmp_delta_page_storage.push(delta_page)
+        logging.debug("{} deltapages restored...".format(len(self.tmp_delta_page_storage)))
+
+    def _prepare_delta_page(self, delta_page):
+        """
+        Collects the clicks and pages that are needed to reach the delta page
+        :return: (necessary_clicks, parent_page, previous_pages) or None if the delta page reaches the max click depth
+        """
+        necessary_clicks = []
+        previous_pages = []
+        parent_page = delta_page
+        while isinstance(parent_page, DeltaPage):
+            necessary_clicks.insert(0, parent_page.generator)  # Insert as first element because of reverse order'
+            parent_page = self.database_manager.get_page_to_id(parent_page.parent_id)
+            if parent_page is None:
+                raise PageNotFound("This exception should never be raised...")
+            previous_pages.append(parent_page)
+        if delta_page.generator.clickable_depth + 1 > self.crawl_config.max_click_depth:
+            logging.debug("Don't proceed with Deltapage(max click depth)...")
+            self.database_manager.store_delta_page(delta_page)
+            return None
+        return necessary_clicks, parent_page, previous_pages
+
+    def _select_next_url(self):
+        return self.database_manager.pop_next_url_from_frontier()
+
+    def _depth_of_url(self, url):
+        if url.depth_of_finding is None:
+            return 0
+        return url.depth_of_finding + 1
+
+    def _should_url_be_crawled(self, url_to_request):
+        if not self.domain_handler.is_in_scope(url_to_request):
+            logging.debug("Ignoring {} (Not in scope)... ".format(url_to_request.toString()))
+            self.database_manager.visit_url(url_to_request, None, 1000)
+            return False
+
+        if url_to_request.depth_of_finding is not None:
+            if url_to_request.depth_of_finding + 1 > self.crawl_config.max_depth:
+                logging.debug("Ignoring {} (Max crawl depth)... ".format(url_to_request.toString()))
+                self.database_manager.visit_url(url_to_request, None, 1001)
+                return False
+
+        if self.database_manager.url_visited(url_to_request):
+            logging.debug("Crawler tries to use url: {} twice".format(url_to_request.toString()))
+            return False
+
+        if not self.cluster_manager.need_more_urls_of_this_type(url_to_request.url_hash):
+            self.database_manager.visit_url(url_to_request, None, 1002)
+            logging.debug("Seen enough urls from {} ".format(url_to_request.toString()))
+            return False
+        return True
+
+    def _fill_worker_pool(self):
+        """
+        Leases delta pages and urls to the workers until every worker has something to do
+        """
+        while self._worker_pool.has_capacity():
+            if len(self.tmp_delta_page_storage) > 0:
+                delta_page = self.tmp_delta_page_storage.pop()
+                self._taken_delta_page_ids.add(delta_page.id)
+                preparation = self._prepare_delta_page(delta_page)
+                if preparation is None:
+                    continue
+                necessary_clicks, parent_page, previous_pages = preparation
+                delta_page.html = parent_page.html
+                self._worker_pool.submit(DeltaPageLease(delta_page, necessary_clicks, parent_page, previous_pages))
+            else:
+                url_to_request = self._select_next_url()
+                if url_to_request is None:
+                    break
+                if not self._should_url_be_crawled(url_to_request):
+                    continue
+                self._worker_pool.submit(PageLease(url_to_request, self._depth_of_url(url_to_request)))
+
+    def _next_finished_lease(self):
+        self._fill_worker_pool()
+        lease = self._worker_pool.next_result()
+        if lease is not None:
+            logging.debug("Lease {} finished by worker...".format(lease.lease_id))
+        return lease
+
+    def _create_event_executor_pool(self, crawl_config, proxy, port):
+        if crawl_config.num_event_executors < 2:
+            return None
+        return EventExecutorPool(self, crawl_config.num_event_executors, proxy, port,
+                                 crawl_speed=crawl_config.process_speed,
+                                 network_access_manager=self._network_access_manager)
+
+    def _execute_events_in_parallel(self, page, pre_clicks):
+        """
+        Executes the first run of every clickable with the pool. The clickable loop consumes the results in its own
+        order, repetitions are executed one after another.
+        """
+        executions = first_executions(page.clickables, self._event_executor.supported_events)
+        event_results = self._event_executor_pool.execute(page, executions, pre_clicks)
+        result = {}
+        for (clickable, xhr_behavior), event_result in zip(executions, event_results):
+            result[event_result_key(clickable, xhr_behavior)] = event_result
+        return result
+
+    def _analyze_url(self, url_to_request):
+        if self._prefetched_page is not None:
+            response_code, current_page = self._prefetched_page
+            self._prefetched_page = None
+            current_page.id = self.get_next_page_id()
+            return response_code, current_page
+        return self._dynamic_analyzer.analyze(url_to_request, current_depth=self.current_depth)
+
+    def _execute_event(self, current_page, clickable, pre_clicks, xhr_behavior):
+        key = event_result_key(clickable, xhr_behavior)
+        if key in self._prefetched_event_results:
+            # Each prefetched result is used once, repetitions are executed by the crawler itself
+            event_result, delta_page = self._prefetched_event_results.pop(key)
+            if delta_page is not None:
+                delta_page.parent_id = current_page.id
+            return event_result, delta_page
+        return self._event_executor.execute(current_page, element_to_click=clickable, pre_clicks=pre_clicks,
+                                            xhr_options=xhr_behavior)
+
     def handle_delta_page_has_only_new_links(self, clickable, delta_page, parent_page=None, xhr_behavior=None):
         if delta_page.id == -1:
             delta_page.id = self.get_next_page_id()
@@ -798,24 +1016,28 @@ class Crawler(JaekCore):
         f.close()
 
     def should_delta_page_be_stored_for_crawling(self, delta_page):
-        for d_pages in self.tmp_delta_page_storage:
+        # Only the candidates of the similarity indices are scored
+        features = PageFeatures(delta_page)
+        for d_pages in self.tmp_delta_page_storage.similar_pages(delta_page):
             if d_pages.url == delta_page.url:
-                page_similarity = calculate_similarity_between_pages(delta_page, d_pages, clickable_weight=1,
-                                                                     form_weight=1, link_weight=1)
+                page_similarity = similarity_of_features(features, PageFeatures(d_pages), clickable_weight=1,
+                                                         form_weight=1, link_weight=1)
                 if page_similarity >= 0.9:
                     logging.debug("Equal page is already stored...")
                     return False
-        for d_pages in self.get_all_crawled_deltapages_to_url(delta_page.url):
+        for d_pages in self.database_manager.get_similar_crawled_delta_pages(delta_page):
             if d_pages.url == delta_page.url:
-                page_similarity = calculate_similarity_between_pages(delta_page, d_pages, clickable_weight=1,
-                                                                     form_weight=1, link_weight=1)
+                page_similarity = similarity_of_features(features, PageFeatures(d_pages), clickable_weight=1,
+                                                         form_weight=1, link_weight=1)
                 if page_similarity >= 0.9:
                     logging.debug("Equal page is already seen...")
                     return False
         return True
 
     def _store_delta_page_for_crawling(self, delta_page):
-        self.tmp_delta_page_storage.append(delta_page)
+        self.tmp_delta_page_storage.push(delta_page)
+        self.database_manager.store_waiting_delta_page(self._next_delta_page_key, delta_page)
+        self._next_delta_page_key += 1
 
 
     def get_all_stored_delta_pages(self):
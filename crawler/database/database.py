@@ -18,6 +18,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import logging
 from pymongo.connection import Connection
 import pymongo
+from bson.objectid import ObjectId
 from models.asyncrequeststructure import AsyncRequestStructure
 from models.timingrequest import TimingRequest
 from models.urlstructure import UrlStructure
@@ -31,6 +32,8 @@ from models.link import Link
 from models.clickabletype import ClickableType
 from models.form import HtmlForm, FormInput
 from models.deltapage import DeltaPage
+from database.indexmanager import IndexManager
+from database.writebehind import WriteBehindBuffer
 
 # This is the database handling class. You don't really want to look down what there is.
 # Really you won't!
@@ -45,9 +48,13 @@ DOM_ADDRESS = "dom_address"
 
 class Database():
     
-    def __init__(self, db_name, drop_dbs=True):
+    def __init__(self, db_name, drop_dbs=True, slow_query_ms=None, write_behind=True):
+        """
+        :param write_behind: pages, clickables, forms and requests are written in batches by a background thread
+        """
         self.connection=Connection()
         self.database = self.connection[db_name]
+        self.index_manager = IndexManager(self.database, slow_query_ms)
         self.pages = self.database.pages
         #self.pages.ensure_index( "id", pymongo.ASCENDING, unique=True)
         self.urls = self.database.urls
@@ -60,6 +67,9 @@ class Database():
         self.attack = self.database.attack
         self.async_requests = self.database.asyncrequests
         self.async_request_structure = self.database.asyncrequeststructure
+        self.checkpoints = self.database.checkpoints
+        self.similarities = self.database.similarities
+        self.waiting_delta_pages = self.database.waiting_delta_pages
 
         self._per_session_url_counter = 0
 
@@ -75,12 +85,75 @@ class Database():
             self.attack.drop()
             self.async_requests.drop()
             self.async_request_structure.drop()
-            self.urls.ensure_index("url", pymongo.ASCENDING, unique=True)
-            #self.url_descriptions.ensure_index("hash", pymongo.ASCENDING, unique=True)
+            self.checkpoints.drop()
+            self.similarities.drop()
+            self.waiting_delta_pages.drop()
+        else:
+            # Continue counting, otherwise the order of the urls gets lost on resume
+            last_url = self.urls.find_one(sort=[('url_counter', pymongo.DESCENDING)])
+            if last_url is not None and last_url.get('url_counter') is not None:
+                self._per_session_url_counter = last_url['url_counter'] + 1
+        self.index_manager.create_indexes()
+        self.index_manager.start_profiling()
+        self._write_buffer = None
+        if write_behind:
+            self._write_buffer = WriteBehindBuffer(self.database)
 
         
     def __del__(self):
+        self.close_write_buffer()
         self.connection.close()
+
+    def flush(self, *collections):
+        """
+        Writes the buffered operations of the collections, or of all collections if none is given
+        """
+        names = [collection.name for collection in collections]
+        if self._write_buffer is not None and self._write_buffer.has_pending(*names):
+            self._write_buffer.flush(*names)
+
+    def close_write_buffer(self):
+        if self._write_buffer is not None:
+            self._write_buffer.close()
+            self._write_buffer = None
+
+    def _insert(self, collection, document, key=None):
+        if self._write_buffer is None:
+            collection.insert(document)
+        else:
+            self._write_buffer.insert(collection.name, document, key)
+
+    def _replace(self, collection, query, document, key=None):
+        if self._write_buffer is None:
+            collection.update(query, document, upsert=True)
+        else:
+            self._write_buffer.replace(collection.name, query, document, key)
+
+    def _update(self, collection, query, update, upsert=False, barrier=False):
+        """
+        :param barrier: the update is written after all operations, that were buffered before
+        """
+        if self._write_buffer is None:
+            collection.update(query, update, upsert=upsert)
+        else:
+            self._write_buffer.update(collection.name, query, update, upsert, barrier)
+
+    def _remove(self, collection, query, barrier=False):
+        if self._write_buffer is None:
+            collection.remove(query)
+        else:
+            self._write_buffer.remove(collection.name, query, barrier)
+
+    def _pending(self, key):
+        if self._write_buffer is None:
+            return None
+        return self._write_buffer.pending(key)
+
+    def _find_clickable(self, current_session, web_page_id, dom_address, event):
+        clickable = self._pending(("clickables", current_session, web_page_id, dom_address, event))
+        if clickable is not None:
+            return clickable
+        return self.clickables.find_one({"session": current_session, "web_page_id": web_page_id, "dom_address": dom_address, "event": event})
      
     def prepare_for_new_crawling(self):
         self._per_session_url_counter = 0
@@ -93,6 +166,8 @@ class Database():
         return user['session']
 
     def insert_user_into_db(self, user):
+        if self.users.find_one({'username': user.username, 'session': user.session}) is not None:
+            return
         num_of_users = self.users.count()
         user_id = num_of_users + 1
         doc = self._user_to_doc(user)
@@ -162,6 +237,13 @@ class Database():
                 result[tmp.url_hash] = [tmp]
         return result
 
+    def get_all_unvisited_urls(self, current_session):
+        raw_data = self.urls.find({"session": current_session, "visited": False}).sort([('url_counter', pymongo.ASCENDING)])
+        result = []
+        for url in raw_data:
+            result.append(self._parse_url_from_db_withou_abstract_url(url))
+        return result
+
     def _parse_url_from_db_withou_abstract_url(self, url):
         result = Url(url['url'], url['depth_of_finding'])
         result.parameters = self.unescape_unloved_signs(result.parameters)
@@ -202,6 +284,16 @@ class Database():
                 counter += 1
         return counter
 
+    def count_visited_urls_of_all_hashes(self, current_session):
+        """
+        @:returns dict(url_hash) = number of visited urls, counted like count_visited_urls_per_hash
+        """
+        raw_data = self.urls.find({"session": current_session, "visited": True, "response_code": {"$gt": 100, "$lt": 1000}},
+                                  {"url_hash": True})
+        result = {}
+        for url in raw_data:
+            result[url['url_hash']] = result.get(url['url_hash'], 0) + 1
+        return result
 
     def get_url_to_id(self, current_session, id):
         result = self.urls.find_one({"session":current_session, "page_id": id})
@@ -218,9 +310,10 @@ class Database():
         document = self._create_webpage_doc(web_page, current_session)
         document['ajax_requests'] = []
         document['session'] = current_session
-        self.pages.save(document)
+        self._insert(self.pages, document)
 
     def get_all_pages(self, current_session):
+        self.flush(self.pages)
         results = []
         pages = self.pages.find({"session": current_session})
         for page in pages:
@@ -238,10 +331,12 @@ class Database():
             url = url.toString()
         except AttributeError:
             url = url
+        self.flush(self.pages)
         return self.pages.find_one({"session": current_session, "url": url, "visited": True}) is not None
 
         
     def _get_web_page_from_db(self, current_session, page_id=None, url=None, page=None):
+        self.flush(self.pages)
         if page is None:
             if page_id is not None:
                 page = self.pages.find_one({"session": current_session, "web_page_id": page_id })
@@ -270,24 +365,27 @@ class Database():
         result.ajax_requests = ajax
         return result
 
-    def insert_asyncrequest(self, current_session, ajax_request, web_page_id):
+    def insert_asyncrequest(self, current_session, ajax_request, web_page_id, page_id=None):
+        """
+        :param web_page_id: page of the trigger
+        :param page_id: page, the request belongs to, default is web_page_id
+        """
         url_doc = {"url": ajax_request.url.complete_url, "abstract_url": ajax_request.url.abstract_url, "url_hash": ajax_request.url.url_hash}
         structure_doc = {}
         structure_doc['request_hash'] = ajax_request.request_hash
         structure_doc["session"] = current_session
         structure_doc['parameters'] = ajax_request.request_structure.parameters
-        previous_doc = self.async_request_structure.find_one({"session": current_session, "request_hash": ajax_request.request_hash})
-        if previous_doc is not None:
-            structure_doc["_id"] = previous_doc['_id']
-        res = self.async_request_structure.save(structure_doc)
+        self._replace(self.async_request_structure, {"session": current_session, "request_hash": ajax_request.request_hash}, structure_doc)
 
         doc = {}
+        doc["_id"] = ObjectId()
         doc["request_hash"] = ajax_request.request_hash
         doc["url"] = url_doc
         doc["method"] = ajax_request.method
         doc["session"] = current_session
+        doc["web_page_id"] = page_id if page_id is not None else web_page_id
         try:
-            trigger_id = self.clickables.find_one({"session": current_session, "dom_address" : ajax_request.trigger.dom_address, "web_page_id": web_page_id, "event": ajax_request.trigger.event})
+            trigger_id = self._find_clickable(current_session, web_page_id, ajax_request.trigger.dom_address, ajax_request.trigger.event)
             trigger_id = trigger_id["_id"]
             doc["trigger"] = trigger_id
         except AttributeError:
@@ -299,9 +397,11 @@ class Database():
             find_string = "session: " + str(current_session) + " - dom_address: " + str(ajax_request.trigger.dom_address) + " - web_page_id: " + str(web_page_id) + " - event: "+ (ajax_request.trigger.event)
             logging.debug("Try to find: {}".format(find_string))
         doc['parameters'] = ajax_request.parameters
-        return self.async_requests.save(doc)
+        self._insert(self.async_requests, doc)
+        return doc["_id"]
 
     def get_asyncrequest_to_id(self, current_session, async_id):
+        self.flush(self.async_requests, self.async_request_structure, self.clickables)
         raw_data = self.async_requests.find_one({"session": current_session, "_id": async_id})
         if raw_data is None:
             return None
@@ -344,7 +444,9 @@ class Database():
         if hasattr(clickable, "random_char"):
             document['random_char'] = clickable.random_char  
         document['session'] = current_session
-        self.clickables.save(document)
+        document['_id'] = ObjectId()
+        # Keyed for the lookups of triggers and generators, until it is written
+        self._insert(self.clickables, document, ("clickables", current_session, web_page_id, clickable.dom_address, clickable.event))
         
     def insert_delta_page_into_db(self, current_session, delta_page):
         for clickable in delta_page.clickables:
@@ -353,12 +455,12 @@ class Database():
             self.insert_form(current_session, form, delta_page.id)
             
         document = self._create_webpage_doc(delta_page, current_session)
-        clickable_id = self.clickables.find_one({"session" : current_session, "web_page_id": delta_page.parent_id, "dom_address":delta_page.generator.dom_address, "event":delta_page.generator.event})
+        clickable_id = self._find_clickable(current_session, delta_page.parent_id, delta_page.generator.dom_address, delta_page.generator.event)
         clickable_id = clickable_id["_id"]
         document['generator'] = clickable_id
         generator_request_doc = []
         for r in delta_page.generator_requests:
-            generator_request_doc.append(self.insert_asyncrequest(current_session, r, delta_page.parent_id))
+            generator_request_doc.append(self.insert_asyncrequest(current_session, r, delta_page.parent_id, delta_page.id))
         document["generator_requests"] = generator_request_doc
         
         document['delta_depth'] = delta_page.delta_depth
@@ -368,9 +470,10 @@ class Database():
             ajax_request_docs.append(self.insert_asyncrequest(current_session, ajax, delta_page.id))
         document["ajax_requests"] = ajax_request_docs
         document['session'] = current_session
-        self.delta_pages.save(document)
+        self._insert(self.delta_pages, document)
     
     def get_delta_page_to_id(self, current_session, page_id):
+        self.flush(self.delta_pages)
         page = self.delta_pages.find_one({"session": current_session,"web_page_id":page_id })
         if page is None:
             return None
@@ -395,7 +498,10 @@ class Database():
     
     def insert_form(self, current_session, form, page_id):
         form_hash = form.get_hash()
-        result = self.forms.find_one({"form_hash": form_hash, "session": current_session, "web_page_id": page_id})
+        key = ("forms", current_session, page_id, form_hash)
+        result = self._pending(key)
+        if result is None:
+            result = self.forms.find_one({"form_hash": form_hash, "session": current_session, "web_page_id": page_id})
         form_doc = {}
         
         if result is not None:
@@ -405,6 +511,8 @@ class Database():
                         parameter_from_new_form.values.extend(parameter_from_db_form['values'])
                     parameter_from_new_form.values = sorted(set(parameter_from_new_form.values), key=lambda x: parameter_from_new_form.values.index(x)) #Deduplicates the list
             form_doc['_id'] = result["_id"]
+        else:
+            form_doc['_id'] = ObjectId()
         form_doc["web_page_id"] = page_id
         form_doc["method"] = form.method
         action_doc = {"url": form.action.complete_url, "abstract_url": form.action.abstract_url, "url_hash": form.action.url_hash}
@@ -416,7 +524,7 @@ class Database():
         form_doc['parameters'] = param_doc
         form_doc['session'] = current_session
         form_doc['form_hash'] = form_hash
-        self.forms.save(form_doc)
+        self._replace(self.forms, {"_id": form_doc['_id']}, form_doc, key)
 
     def _parse_link_to_db_doc(self, link):
         res = {}
@@ -463,8 +571,7 @@ class Database():
             
         set_doc["clicked"] = True
         set_doc = {"$set": set_doc}
-        result = self.clickables.update(search_doc, set_doc)
-        return result
+        self._update(self.clickables, search_doc, set_doc)
     
     def set_clickable_ignored(self, current_session, web_page_id, clickable_dom_address, clickable_event, clickable_depth = None, clickable_type = None):
         search_doc = {}
@@ -484,17 +591,16 @@ class Database():
             
         set_doc["clicked"] = "False"
         set_doc = {"$set": set_doc}
-        result = self.clickables.update(search_doc, set_doc)
-        return result
+        self._update(self.clickables, search_doc, set_doc)
     
     def extend_ajax_requests_to_webpage(self, current_session, webpage, ajax_requests):
         ajax_requests_doc = []
         for r in ajax_requests:
             ajax_requests_doc.append(self.insert_asyncrequest(current_session, r, webpage.id))
         if not hasattr(webpage, 'parent_id'):
-            result = self.pages.update({"web_page_id": webpage.id, "session":current_session}, { "$addToSet" : {"ajax_requests": {"$each": ajax_requests_doc}}})
+            self._update(self.pages, {"web_page_id": webpage.id, "session":current_session}, { "$addToSet" : {"ajax_requests": {"$each": ajax_requests_doc}}})
         else:
-            result = self.delta_pages.update({"web_page_id": webpage.id, "session":current_session}, { "$addToSet" : {"ajax_requests": {"$each": ajax_requests_doc}}})
+            self._update(self.delta_pages, {"web_page_id": webpage.id, "session":current_session}, { "$addToSet" : {"ajax_requests": {"$each": ajax_requests_doc}}})
         
         
     def _clickable_type_to_num(self, clickable_type):
@@ -527,6 +633,7 @@ class Database():
         return clickable_types[num]
     
     def get_all_clickables_to_page_id_from_db(self, current_session, page_id):
+        self.flush(self.clickables)
         clickables = self.clickables.find({"web_page_id": page_id, "session": current_session})
         result = []
         for clickable in clickables:
@@ -538,6 +645,7 @@ class Database():
         return result
     
     def get_all_forms_to_page_id_from_db(self, current_session, page_id):
+        self.flush(self.forms)
         forms = self.forms.find({"web_page_id" : page_id, "session": current_session})
         result = []
         for form in forms:
@@ -554,6 +662,7 @@ class Database():
         return HtmlForm(parameters, action, form['method'], form["dom_address"])
     
     def get_all_crawled_deltapages_to_url_from_db(self, current_session, url):
+        self.flush(self.delta_pages)
         pages = self.delta_pages.find({"url":url, "session":current_session})
         result = []
         for page in pages:
@@ -619,6 +728,14 @@ class Database():
         self.clusters.remove({"session": current_session, "url_hash": url_hash})
         self.clusters.save({"session": current_session, "url_hash": url_hash, "clusters": clusters})
 
+    def add_cluster(self, current_session, url_hash, cluster):
+        self.clusters.update({"session": current_session, "url_hash": url_hash}, {"$push": {"clusters": cluster}},
+                             upsert=True)
+
+    def add_page_to_cluster(self, current_session, url_hash, cluster_index, page_id):
+        self.clusters.update({"session": current_session, "url_hash": url_hash},
+                             {"$push": {"clusters.{}".format(cluster_index): page_id}})
+
     def get_clusters(self, current_session, url_hash):
         result = self.clusters.find_one({"session": current_session, "url_hash": url_hash})
         try:
@@ -626,6 +743,97 @@ class Database():
         except TypeError:
             return None
 
+    def get_num_of_clusters_per_hash(self, current_session):
+        result = {}
+        for cluster in self.clusters.find({"session": current_session}):
+            result[cluster['url_hash']] = len(cluster['clusters'])
+        return result
+
+    def write_similarities(self, current_session, similarities):
+        """
+        :param similarities: dict packed page ids -> similarity, the bigger page id is in the upper 32 bits. A
+        similarity, that is computed again after it was evicted from the cache, replaces the stored one.
+        """
+        if len(similarities) == 0:
+            return
+        bulk = self.similarities.initialize_ordered_bulk_op()
+        for key, similarity in similarities.items():
+            bulk.find({"session": current_session, "key": key}).upsert().replace_one(
+                {"session": current_session, "key": key, "page_id": key >> 32, "similarity": similarity})
+        bulk.execute()
+
+    def get_similarities(self, current_session, page_ids):
+        result = {}
+        page_ids = set(page_ids)
+        for similarity in self.similarities.find({"session": current_session, "page_id": {"$in": list(page_ids)}}):
+            if similarity['key'] & 0xFFFFFFFF in page_ids:
+                result[similarity['key']] = similarity['similarity']
+        return result
+
+    def insert_waiting_delta_page(self, current_session, queue_key, page_id, data):
+        """
+        :param data: the pickled delta page, that waits to be crawled
+        """
+        self._insert(self.waiting_delta_pages, {"session": current_session, "queue_key": queue_key,
+                                                "web_page_id": page_id, "data": data})
+
+    def remove_waiting_delta_pages(self, current_session, page_ids):
+        if len(page_ids) == 0:
+            return
+        self._remove(self.waiting_delta_pages, {"session": current_session, "web_page_id": {"$in": list(page_ids)}})
+
+    def get_waiting_delta_pages(self, current_session):
+        """
+        :return: the pickled delta pages in the order they were queued
+        """
+        self.flush(self.waiting_delta_pages)
+        for waiting in self.waiting_delta_pages.find({"session": current_session}, sort=[("queue_key", pymongo.ASCENDING)]):
+            yield waiting["data"]
+
+    def write_checkpoint(self, current_session, checkpoint):
+        """
+        Buffered as barrier, so the checkpoint is never written before the pages, that it covers
+        """
+        self._update(self.checkpoints, {"session": current_session}, {"$set": checkpoint}, upsert=True, barrier=True)
+
+    def get_checkpoint(self, current_session):
+        self.flush()
+        return self.checkpoints.find_one({"session": current_session})
+
+    def remove_checkpoint(self, current_session):
+        self._remove(self.checkpoints, {"session": current_session}, barrier=True)
+
+    def rollback_to_checkpoint(self, current_session, page_id, in_progress_url=None, in_progress_page_id=None):
+        """
+        Removes everything, that was written after the checkpoint. Pages with an id >= page_id and the page that was
+        in progress are crawled again.
+        """
+        self.flush()
+        page_query = {"session": current_session, "web_page_id": {"$gte": page_id}}
+        if in_progress_page_id is not None:
+            page_query = {"session": current_session, "$or": [{"web_page_id": {"$gte": page_id}},
+                                                              {"web_page_id": in_progress_page_id}]}
+        self.pages.remove(page_query)
+        self.delta_pages.remove(page_query)
+        self.clickables.remove(page_query)
+        self.forms.remove(page_query)
+        self.async_requests.remove(page_query)
+        reset_doc = {"$set": {'response_code': None, 'visited': False, 'page_id': None, 'redirected_to': None}}
+        self.urls.update({"session": current_session, "page_id": {"$gte": page_id}}, reset_doc, multi=True)
+        # The ids are given to new pages again
+        self.similarities.remove({"session": current_session, "page_id": {"$gte": page_id}})
+        for cluster_doc in self.clusters.find({"session": current_session}):
+            # Older crawls stored single clusters as integers
+            clusters = [c if isinstance(c, list) else [c] for c in cluster_doc['clusters']]
+            clusters = [[p for p in c if p < page_id] for c in clusters]
+            clusters = [c for c in clusters if len(c) > 0]
+            if clusters != cluster_doc['clusters']:
+                self.clusters.update({"_id": cluster_doc['_id']}, {"$set": {"clusters": clusters}})
+        # Delta pages found by the page in progress are found again
+        self.waiting_delta_pages.remove({"session": current_session, "web_page_id": {"$gte": page_id}})
+        if in_progress_url is not None:
+            self.urls.update({"session": current_session, "url": in_progress_url}, reset_doc)
+
     def get_all_url_structures(self, current_session):
         raw_data = self.url_descriptions.find({"session": current_session})
         result = []
@@ -659,6 +867,7 @@ class Database():
 
     def get_asyncrequest_structure(self, current_session, structure_hash= None):
         if structure_hash is not None:
+            self.flush(self.async_request_structure)
             raw_data = self.async_request_structure.find_one({"session": current_session, "request_hash": structure_hash})
             if raw_data is None:
                 return None
@@ -668,6 +877,7 @@ class Database():
             #TODO: Implement if I need all
 
     def get_all_get_forms(self, current_session):
+        self.flush(self.forms)
         raw_data = self.forms.find({"session": current_session, "method": "get"})
         result = []
         for form in raw_data:
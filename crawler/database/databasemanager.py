@@ -17,20 +17,43 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 This Class is responsible for storage related things
 
 """
+import pickle
+import zlib
+
 from database.database import Database
+from database.urlfrontier import UrlFrontier
+from utils.similarityindex import SimilarityIndex
 from models.clickabletype import ClickableType
+from models.url import Url
 
 
 class DatabaseManager(object):
     
-    def __init__(self, user, dropping=True):
-        self._database = Database(user.username, dropping)
+    def __init__(self, user, dropping=True, slow_query_ms=None, write_behind=True):
+        """
+        :param slow_query_ms: queries, that take longer, are logged by report_slow_queries
+        :param write_behind: pages, clickables, forms and requests are written in batches by a background thread. Reads
+        of these collections write the pending batch first.
+        """
+        self._database = Database(user.username, dropping, slow_query_ms, write_behind)
         self._database.insert_user_into_db(user)
         self._web_page_cache = []
         self._deltapage_cache = []
         self._current_session = None
         self.MAX_CACHE_SIZE = 0
         self._current_session = user.session
+        self._url_frontier = None
+        self._delta_page_index = SimilarityIndex()
+        self._indexed_delta_page_urls = set()
+
+    def flush(self):
+        """
+        Writes everything, that is still buffered
+        """
+        self._database.flush()
+
+    def report_slow_queries(self):
+        return self._database.index_manager.report_slow_queries()
 
     def return_session_id_to_username(self, username):
         return self._database.get_user_to_username(username)
@@ -57,6 +80,8 @@ class DatabaseManager(object):
                 del self._deltapage_cache[-1]
             self._deltapage_cache.insert(0, delta_page)
         self._database.insert_delta_page_into_db(self._current_session, delta_page)
+        if delta_page.url in self._indexed_delta_page_urls:
+            self._delta_page_index.add(delta_page.id, delta_page)
 
     def get_page_to_url(self, url):
         try:
@@ -88,15 +113,46 @@ class DatabaseManager(object):
 
     def get_all_unvisited_urls_sorted_by_hash(self):
         return self._database.get_all_unvisited_urls_sorted_by_hash(self._current_session)
-    
+
+    def pop_next_url_from_frontier(self):
+        """
+        :return: the next unvisited url, chosen by the cluster ratio of its url hash. None if there is no url left
+        """
+        url = self._get_url_frontier().pop_url()
+        if url is not None:
+            url.url_structure = self.get_url_structure(url.url_hash)
+        return url
+
+    def _get_url_frontier(self):
+        if self._url_frontier is None:
+            # Loaded once, afterwards the frontier is kept up to date by the insert, visit and cluster calls
+            self._url_frontier = UrlFrontier()
+            for url_hash, num_of_clusters in self._database.get_num_of_clusters_per_hash(self._current_session).items():
+                self._url_frontier.set_num_of_clusters(url_hash, num_of_clusters)
+            for url_hash, num_of_visited_urls in self._database.count_visited_urls_of_all_hashes(self._current_session).items():
+                self._url_frontier.set_num_of_visited_urls(url_hash, num_of_visited_urls)
+            for url in self._database.get_all_unvisited_urls(self._current_session):
+                self._url_frontier.add_url(url)
+        return self._url_frontier
+
     def insert_url_into_db(self, url):
-        return self._database.insert_url_into_db(self._current_session, url)
+        inserted = self._database.insert_url_into_db(self._current_session, url)
+        if inserted and self._url_frontier is not None:
+            self._url_frontier.add_url(url)
+        return inserted
     
     def insert_redirected_url(self, url):
-        return self._database.insert_url_into_db(self._current_session, url, is_redirected_url=True)
+        inserted = self._database.insert_url_into_db(self._current_session, url, is_redirected_url=True)
+        if inserted and self._url_frontier is not None:
+            self._url_frontier.add_url(url)
+        return inserted
         
     def visit_url(self, url, webpage_id, response_code, redirected_to = None):
         self._database.visit_url(self._current_session, url, webpage_id, response_code, redirected_to)
+        if self._url_frontier is not None:
+            if not isinstance(url, Url):
+                url = Url(url)
+            self._url_frontier.visit_url(url.toString(), url.url_hash, response_code)
     
     def extend_ajax_requests_to_webpage(self, webpage, ajax_reuqests):
         self._database.extend_ajax_requests_to_webpage(self._current_session, webpage, ajax_reuqests)
@@ -104,6 +160,22 @@ class DatabaseManager(object):
     
     def get_all_crawled_delta_pages(self, url=None):
         return self._database.get_all_crawled_deltapages_to_url_from_db(self._current_session, url)
+
+    def get_similar_crawled_delta_pages(self, delta_page):
+        """
+        :return: the crawled delta pages, that may be similar to delta_page. The delta pages of an url are loaded only
+        once from the database, after that they are looked up in the similarity index.
+        """
+        if delta_page.url not in self._indexed_delta_page_urls:
+            for page in self.get_all_crawled_delta_pages(delta_page.url):
+                self._delta_page_index.add(page.id, page)
+            self._indexed_delta_page_urls.add(delta_page.url)
+        result = []
+        for page_id in sorted(self._delta_page_index.candidates(delta_page)):
+            page = self.get_delta_page_to_id(page_id)
+            if page is not None:
+                result.append(page)
+        return result
     
     
     def update_clickable(self, web_page_id, clickable):
@@ -132,6 +204,22 @@ class DatabaseManager(object):
 
     def write_clusters(self, url_hash, clusters):
         self._database.write_cluster(self._current_session, url_hash, clusters)
+        if self._url_frontier is not None:
+            self._url_frontier.set_num_of_clusters(url_hash, len(clusters))
+
+    def add_cluster(self, url_hash, cluster):
+        self._database.add_cluster(self._current_session, url_hash, cluster)
+        if self._url_frontier is not None:
+            self._url_frontier.add_cluster(url_hash)
+
+    def add_page_to_cluster(self, url_hash, cluster_index, page_id):
+        self._database.add_page_to_cluster(self._current_session, url_hash, cluster_index, page_id)
+
+    def write_similarities(self, similarities):
+        self._database.write_similarities(self._current_session, similarities)
+
+    def get_similarities(self, page_ids):
+        return self._database.get_similarities(self._current_session, page_ids)
 
     def get_clusters(self, url_hash):
         return self._database.get_clusters(self._current_session, url_hash)
@@ -170,4 +258,38 @@ class DatabaseManager(object):
         return self._database.get_id_to_url(self._current_session, url)
 
     def get_all_urls_to_domain(self, domain):
-        return self._database.get_all_urls_to_domain(self._current_session, domain)
\ No newline at end of file
+        return self._database.get_all_urls_to_domain(self._current_session, domain)
+
+    def store_waiting_delta_page(self, queue_key, delta_page):
+        """
+        Keeps a delta page, that waits to be crawled, until remove_waiting_delta_pages is called with its id
+        """
+        data = zlib.compress(pickle.dumps(delta_page, pickle.HIGHEST_PROTOCOL))
+        self._database.insert_waiting_delta_page(self._current_session, queue_key, delta_page.id, data)
+
+    def remove_waiting_delta_pages(self, delta_page_ids):
+        self._database.remove_waiting_delta_pages(self._current_session, delta_page_ids)
+
+    def get_waiting_delta_pages(self):
+        """
+        :return: generator of the waiting delta pages in the order they were stored
+        """
+        for data in self._database.get_waiting_delta_pages(self._current_session):
+            yield pickle.loads(zlib.decompress(data))
+
+    def write_checkpoint(self, checkpoint):
+        self._database.write_checkpoint(self._current_session, checkpoint)
+
+    def get_checkpoint(self):
+        return self._database.get_checkpoint(self._current_session)
+
+    def remove_checkpoint(self):
+        self._database.remove_checkpoint(self._current_session)
+
+    def rollback_to_checkpoint(self, page_id, in_progress_url=None, in_progress_page_id=None):
+        self._web_page_cache = []
+        self._deltapage_cache = []
+        self._delta_page_index = SimilarityIndex()
+        self._indexed_delta_page_urls = set()
+        self._url_frontier = None  # Loaded again with the visited urls and clusters after the rollback
+        self._database.rollback_to_checkpoint(self._current_session, page_id, in_progress_url, in_progress_page_id)
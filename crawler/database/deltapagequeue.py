@@ -0,0 +1,118 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Queue of the delta pages, that are waiting to be crawled. Only the position, the url and the similarity index keys of a
+page stay in memory for sure, the pages itself are kept in memory until the memory budget is used up and are spilled compressed to a temporary file after
+that. They are streamed back from the file when they are popped. A similarity index over the queued pages tells, which
+pages have to be loaded to find a similar one.
+'''
+
+import logging
+import pickle
+import tempfile
+import zlib
+from collections import deque
+
+from utils.similarityindex import SimilarityIndex
+
+__author__ = 'constantin'
+
+
+class DeltaPageQueue():
+
+    def __init__(self, memory_budget=100 * 1024 * 1024, spill_dir=None):
+        """
+        :param memory_budget: bytes of pickled delta pages, that are kept in memory
+        :param spill_dir: directory of the spill file, default is the temp directory of the system
+        """
+        self.memory_budget = memory_budget
+        self._spill_dir = spill_dir
+        self._spill_file = None
+        self._order = deque()  # (key, url) in the order the pages are crawled
+        self._similarity_index = SimilarityIndex()
+        self._in_memory = {}  # key -> (delta_page, size)
+        self._on_disk = {}  # key -> (offset, length)
+        self._memory_used = 0
+        self._next_key = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        for key, url in list(self._order):
+            yield self._load(key)
+
+    def push(self, delta_page):
+        key = self._next_key
+        self._next_key += 1
+        data = pickle.dumps(delta_page, pickle.HIGHEST_PROTOCOL)
+        if self._memory_used + len(data) <= self.memory_budget:
+            self._in_memory[key] = delta_page, len(data)
+            self._memory_used += len(data)
+        else:
+            self._on_disk[key] = self._write(zlib.compress(data))
+        self._order.append((key, delta_page.url))
+        self._similarity_index.add(key, delta_page)
+
+    def pop(self):
+        """
+        :return: the oldest delta page or None if the queue is empty
+        """
+        if len(self._order) == 0:
+            return None
+        key, url = self._order.popleft()
+        delta_page = self._load(key)
+        self._similarity_index.remove(key)
+        if key in self._in_memory:
+            self._memory_used -= self._in_memory.pop(key)[1]
+        else:
+            del self._on_disk[key]
+            if len(self._on_disk) == 0:
+                # Nothing left on disk, so the space of the popped pages can be reused
+                self._spill_file.seek(0)
+                self._spill_file.truncate()
+        return delta_page
+
+    def similar_pages(self, delta_page):
+        """
+        Loads only the queued pages, that may be similar to delta_page, the others stay on disk
+        """
+        for key in sorted(self._similarity_index.candidates(delta_page)):
+            yield self._load(key)
+
+    def num_of_spilled_pages(self):
+        return len(self._on_disk)
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def _write(self, data):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="jaek_deltapages_", dir=self._spill_dir)
+            logging.debug("Memory budget for deltapages is used up, spilling to disk...")
+        self._spill_file.seek(0, 2)
+        offset = self._spill_file.tell()
+        self._spill_file.write(data)
+        return offset, len(data)
+
+    def _load(self, key):
+        if key in self._in_memory:
+            return self._in_memory[key][0]
+        offset, length = self._on_disk[key]
+        self._spill_file.seek(offset)
+        return pickle.loads(zlib.decompress(self._spill_file.read(length)))
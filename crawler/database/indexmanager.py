@@ -0,0 +1,111 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The indexes of the collections. Every query of Database filters on the session and one or two other fields, so every
+query path gets a compound index on them. Indexes are unique where the code looks a document up before saving it, so
+there can only be one. The indexes are built on startup, building an existing index again does nothing.
+
+If slow_query_ms is set, MongoDB profiles the queries, that take longer, and report_slow_queries logs them, queries
+without index first.
+'''
+
+import logging
+
+import pymongo
+from pymongo.errors import OperationFailure
+
+__author__ = 'constantin'
+
+ASC = pymongo.ASCENDING
+DESC = pymongo.DESCENDING
+
+# collection name -> list of (keys, unique)
+INDEXES = {
+    "urls": [([("url", ASC)], True),
+             ([("session", ASC), ("visited", ASC), ("url_counter", ASC)], False),
+             ([("session", ASC), ("url_hash", ASC), ("visited", ASC)], False),
+             ([("session", ASC), ("page_id", ASC)], False),
+             ([("session", ASC), ("redirected_to", ASC)], False),
+             ([("url_counter", DESC)], False)],
+    "pages": [([("session", ASC), ("web_page_id", ASC)], False),
+              ([("session", ASC), ("url", ASC), ("visited", ASC)], False)],
+    "delta_pages": [([("session", ASC), ("web_page_id", ASC)], False),
+                    ([("session", ASC), ("url", ASC)], False)],
+    "clickables": [([("session", ASC), ("web_page_id", ASC), ("dom_address", ASC), ("event", ASC)], False)],
+    "forms": [([("session", ASC), ("web_page_id", ASC), ("form_hash", ASC)], False),
+              ([("session", ASC), ("method", ASC)], False)],
+    "url_describtion": [([("session", ASC), ("url_hash", ASC)], True)],
+    "asyncrequests": [([("session", ASC), ("web_page_id", ASC)], False)],
+    "asyncrequeststructure": [([("session", ASC), ("request_hash", ASC)], True)],
+    "clusters": [([("session", ASC), ("url_hash", ASC)], True)],
+    "checkpoints": [([("session", ASC)], True)],
+    "similarities": [([("session", ASC), ("page_id", ASC)], False),
+                     ([("session", ASC), ("key", ASC)], True)],
+    "waiting_delta_pages": [([("session", ASC), ("queue_key", ASC)], True),
+                            ([("session", ASC), ("web_page_id", ASC)], False)],
+    "users": [([("username", ASC), ("session", ASC)], True)],
+}
+
+
+class IndexManager():
+
+    def __init__(self, database, slow_query_ms=None):
+        """
+        :param database: pymongo database
+        """
+        self.database = database
+        self.slow_query_ms = slow_query_ms
+        self._reported_until = None
+
+    def create_indexes(self):
+        for collection_name, indexes in INDEXES.items():
+            collection = self.database[collection_name]
+            for keys, unique in indexes:
+                try:
+                    collection.create_index(keys, unique=unique)
+                except OperationFailure as err:
+                    # Documents of an older crawl break the uniqueness, the index is still needed for the queries
+                    logging.debug("Unique index {} on {} failed: {}".format(keys, collection_name, err))
+                    collection.create_index(keys)
+
+    def start_profiling(self):
+        if self.slow_query_ms is None:
+            return
+        self.database.set_profiling_level(pymongo.SLOW_ONLY, slow_ms=self.slow_query_ms)
+
+    def report_slow_queries(self):
+        """
+        Logs the slow queries since the last report
+        :return: list of (collection, milliseconds, query, uses index)
+        """
+        if self.slow_query_ms is None:
+            return []
+        search_doc = {"millis": {"$gte": self.slow_query_ms}}
+        if self._reported_until is not None:
+            search_doc["ts"] = {"$gt": self._reported_until}
+        result = []
+        for entry in self.database.system.profile.find(search_doc).sort([("ts", ASC)]):
+            self._reported_until = entry["ts"]
+            collection = entry.get("ns", "").split(".", 1)[-1]
+            if collection == "system.profile":
+                continue
+            uses_index = "COLLSCAN" not in entry.get("planSummary", "")
+            query = entry.get("query", entry.get("command"))
+            result.append((collection, entry["millis"], query, uses_index))
+        for collection, millis, query, uses_index in sorted(result, key=lambda slow_query: slow_query[3]):
+            logging.debug("Slow query{} on {} ({} ms): {}".format("" if uses_index else " without index", collection,
+                                                                 millis, query))
+        return result
@@ -0,0 +1,108 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+In-memory view of the unvisited urls. The urls are grouped in buckets per url hash and the buckets are ordered in a
+heap by their cluster ratio (clusters / visited urls), so the crawler gets the next url without asking the database.
+'''
+
+import heapq
+import random
+
+__author__ = 'constantin'
+
+
+class UrlFrontier():
+
+    def __init__(self):
+        self._buckets = {}  # url_hash -> list of unvisited urls
+        self._queued_urls = set()
+        self._visited_urls = set()
+        self._num_of_clusters = {}
+        self._num_of_visited_urls = {}
+        self._hash_order = {}  # Hashes seen first win on equal ratios
+        self._heap = []  # (-ratio, order, url_hash), outdated entries are skipped while popping
+
+    def __len__(self):
+        return len(self._queued_urls)
+
+    def add_url(self, url):
+        url_string = url.toString()
+        if url_string in self._queued_urls or url_string in self._visited_urls:
+            return
+        if url.url_hash not in self._hash_order:
+            self._hash_order[url.url_hash] = len(self._hash_order)
+        bucket = self._buckets.setdefault(url.url_hash, [])
+        bucket.append(url)
+        self._queued_urls.add(url_string)
+        if len(bucket) == 1:
+            self._push(url.url_hash)
+
+    def visit_url(self, url_string, url_hash, response_code):
+        self._queued_urls.discard(url_string)
+        if url_string in self._visited_urls:
+            return
+        self._visited_urls.add(url_string)
+        if response_code is not None and 100 < response_code < 1000:
+            self._num_of_visited_urls[url_hash] = self._num_of_visited_urls.get(url_hash, 0) + 1
+            self._push(url_hash)
+
+    def set_num_of_visited_urls(self, url_hash, num_of_visited_urls):
+        self._num_of_visited_urls[url_hash] = num_of_visited_urls
+        self._push(url_hash)
+
+    def set_num_of_clusters(self, url_hash, num_of_clusters):
+        self._num_of_clusters[url_hash] = num_of_clusters
+        self._push(url_hash)
+
+    def add_cluster(self, url_hash):
+        self._num_of_clusters[url_hash] = self._num_of_clusters.get(url_hash, 0) + 1
+        self._push(url_hash)
+
+    def cluster_per_visited_urls(self, url_hash):
+        """
+        Same ratio as ClusterManager.calculate_cluster_per_visited_urls, but without database access
+        """
+        num_of_visited_urls = self._num_of_visited_urls.get(url_hash, 0)
+        if num_of_visited_urls == 0:
+            return 1.0
+        return self._num_of_clusters.get(url_hash, 1.0) / num_of_visited_urls
+
+    def pop_url(self):
+        """
+        :return: a random url of the hash with the highest cluster ratio, None if the frontier is empty
+        """
+        while len(self._heap) > 0:
+            negative_ratio, order, url_hash = self._heap[0]
+            bucket = self._buckets.get(url_hash)
+            if not bucket or -negative_ratio != self.cluster_per_visited_urls(url_hash):
+                heapq.heappop(self._heap)
+                continue
+            index = random.randint(0, len(bucket) - 1)
+            bucket[index], bucket[-1] = bucket[-1], bucket[index]
+            url = bucket.pop()
+            url_string = url.toString()
+            if url_string in self._visited_urls:  # Visited without being popped, e.g. redirects
+                continue
+            self._queued_urls.discard(url_string)
+            return url
+        return None
+
+    def _push(self, url_hash):
+        if not self._buckets.get(url_hash):
+            return
+        if url_hash not in self._hash_order:
+            self._hash_order[url_hash] = len(self._hash_order)
+        heapq.heappush(self._heap, (-self.cluster_per_visited_urls(url_hash), self._hash_order[url_hash], url_hash))
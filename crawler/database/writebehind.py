@@ -0,0 +1,206 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Write behind buffer for the documents of pages, clickables, forms and requests. The writes are queued and a background
+thread writes them as one ordered bulk operation per collection, as soon as max_operations are queued or the oldest
+write waits for flush_interval seconds. Batches are written one after another, so the order of the writes is kept
+within every collection. A barrier, like a checkpoint, is written after all operations, that were queued before it.
+
+Documents, that are not written yet, can be looked up by a key. Everything else must flush the collections, that it
+reads and that have pending writes.
+'''
+
+import copy
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+__author__ = 'constantin'
+
+
+class WriteBehindBuffer():
+
+    def __init__(self, database, max_operations=1000, flush_interval=1.0):
+        """
+        :param database: the pymongo database, the collections are looked up by their names
+        """
+        self._database = database
+        self.max_operations = max_operations
+        self.flush_interval = flush_interval
+        self._operations = []  # (collection name, kind, query, document, key, barrier)
+        self._first_queued_at = None
+        self._pending = {}  # key -> document, that is not written yet
+        self._pending_collections = Counter()  # collection name -> queued or currently written operations
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()  # held while a batch is written
+        self._error = None
+        self._closed = False
+        self.num_of_batches = 0
+        self.num_of_operations = 0
+        self._thread = threading.Thread(target=self._run, name="jaek-write-behind")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def insert(self, collection_name, document, key=None):
+        """
+        :param key: the document can be looked up with pending(key), until it is written. If there is already a pending
+        document with that key, that one is kept, as find_one would return the older one.
+        """
+        self._queue(collection_name, "insert", None, document, key, replace_pending=False)
+
+    def replace(self, collection_name, query, document, key=None):
+        """
+        Replaces the first document matching query or inserts document, if there is none.
+        """
+        self._queue(collection_name, "replace", query, document, key, replace_pending=True)
+
+    def update(self, collection_name, query, update, upsert=False, barrier=False):
+        """
+        Updates the first document matching query.
+        :param barrier: the update is written after all operations, that are queued before it
+        """
+        self._queue(collection_name, "upsert" if upsert else "update", query, update, None, replace_pending=False,
+                    barrier=barrier)
+
+    def remove(self, collection_name, query, barrier=False):
+        """
+        Removes all documents matching query.
+        """
+        self._queue(collection_name, "remove", query, None, None, replace_pending=False, barrier=barrier)
+
+    def pending(self, key):
+        with self._lock:
+            return self._pending.get(key)
+
+    def has_pending(self, *collection_names):
+        """
+        :return: True, if one of the collections, or any collection if none is given, has writes that are not done yet
+        """
+        with self._lock:
+            if len(collection_names) == 0:
+                return sum(self._pending_collections.values()) > 0
+            return any(self._pending_collections[name] > 0 for name in collection_names)
+
+    def flush(self, *collection_names):
+        """
+        Writes the queued operations of the collections, or of all collections if none is given, and waits for the
+        batch, that the background thread is writing.
+        """
+        self._write_queued(collection_names)
+        self._raise_error()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join()
+        self._raise_error()
+
+    def _queue(self, collection_name, kind, query, document, key, replace_pending, barrier=False):
+        self._raise_error()
+        document = copy.deepcopy(document)  # The models may change, before the document is written
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write behind buffer is closed")
+            if key is not None and (replace_pending or key not in self._pending):
+                self._pending[key] = document
+            if len(self._operations) == 0:
+                self._first_queued_at = time.time()
+            self._operations.append((collection_name, kind, query, document, key, barrier))
+            self._pending_collections[collection_name] += 1
+            if len(self._operations) == 1 or len(self._operations) >= self.max_operations:
+                # The first operation starts the timer of the background thread
+                self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed and len(self._operations) < self.max_operations:
+                    if len(self._operations) == 0:
+                        self._wakeup.wait()
+                        continue
+                    remaining = self._first_queued_at + self.flush_interval - time.time()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                if self._closed and len(self._operations) == 0:
+                    return
+            self._write_queued()
+
+    def _write_queued(self, collection_names=()):
+        with self._write_lock:
+            with self._lock:
+                operations = self._operations
+                self._operations = []
+                if len(collection_names) > 0:
+                    selected = [operation for operation in operations if operation[0] in collection_names]
+                    # A barrier can not be written before the operations queued in front of it
+                    if not any(operation[5] for operation in selected):
+                        self._operations = [operation for operation in operations
+                                            if operation[0] not in collection_names]
+                        operations = selected
+            if len(operations) == 0:
+                return
+            try:
+                self._write(operations)
+            except Exception as err:
+                logging.error("Write behind buffer failed to write {} operations: {}".format(len(operations), err))
+                if self._error is None:
+                    self._error = err
+            finally:
+                with self._lock:
+                    for collection_name, kind, query, document, key, barrier in operations:
+                        self._pending_collections[collection_name] -= 1
+                        if key is not None and self._pending.get(key) is document:
+                            del self._pending[key]
+
+    def _write(self, operations):
+        per_collection = OrderedDict()
+        for operation in operations:
+            if operation[5]:
+                self._write_per_collection(per_collection)
+                per_collection = OrderedDict()
+                self._write_per_collection({operation[0]: [operation]})
+            else:
+                per_collection.setdefault(operation[0], []).append(operation)
+        self._write_per_collection(per_collection)
+        self.num_of_batches += 1
+        self.num_of_operations += len(operations)
+        logging.debug("Wrote {} operations".format(len(operations)))
+
+    def _write_per_collection(self, per_collection):
+        for collection_name, collection_operations in per_collection.items():
+            bulk = self._database[collection_name].initialize_ordered_bulk_op()
+            for collection_name, kind, query, document, key, barrier in collection_operations:
+                if kind == "insert":
+                    bulk.insert(document)
+                elif kind == "replace":
+                    bulk.find(query).upsert().replace_one(document)
+                elif kind == "upsert":
+                    bulk.find(query).upsert().update_one(document)
+                elif kind == "remove":
+                    bulk.find(query).remove()
+                else:
+                    bulk.find(query).update_one(document)
+            bulk.execute()
+
+    def _raise_error(self):
+        if self._error is not None:
+            err = self._error
+            self._error = None
+            raise err
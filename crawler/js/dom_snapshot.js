@@ -0,0 +1,169 @@
+/*
+ *Copyright (C) 2015 Constantin Tschuertz
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * any later version.
+ *
+ *This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+
+// Records every change after a snapshot (DOM mutations, primitive globals and added event listeners), so that the
+// changes of an event can be undone instead of reloading the page and replaying all pre clicks. Timers started after
+// the snapshot are cleared on restore. If a request started after the snapshot is still running, the page can not be
+// restored, because its callbacks would change the restored page.
+var jaek_snapshot = {
+	observer : null,
+	records : [],
+	globals : null,
+	listeners : [],
+	timeouts : [],
+	intervals : [],
+	requests : [],
+	recording : false,
+
+	take : function() {
+		if (typeof MutationObserver === "undefined") {
+			return false
+		}
+		var self = this
+		this.globals = {}
+		for (var key in window) {
+			try {
+				var value = window[key]
+				if (value === null || (typeof value !== "object" && typeof value !== "function")) {
+					this.globals[key] = value
+				}
+			} catch (err) {
+			}
+		}
+		if (this.observer === null) {
+			this.observer = new MutationObserver(function(mutations) {
+				for (var i = 0; i < mutations.length; i++) {
+					self.records.push(mutations[i])
+				}
+			})
+			var original = Element.prototype.addEventListener
+			Element.prototype.addEventListener = function() {
+				if (self.recording) {
+					self.listeners.push([ this, arguments[0], arguments[1], arguments[2] ])
+				}
+				return original.apply(this, arguments)
+			}
+			var original_set_timeout = window.setTimeout
+			window.setTimeout = function() {
+				var id = original_set_timeout.apply(window, arguments)
+				if (self.recording) {
+					self.timeouts.push(id)
+				}
+				return id
+			}
+			var original_set_interval = window.setInterval
+			window.setInterval = function() {
+				var id = original_set_interval.apply(window, arguments)
+				if (self.recording) {
+					self.intervals.push(id)
+				}
+				return id
+			}
+			var original_send = XMLHttpRequest.prototype.send
+			XMLHttpRequest.prototype.send = function() {
+				if (self.recording) {
+					self.requests.push(this)
+				}
+				return original_send.apply(this, arguments)
+			}
+		}
+		this.observe()
+		return true
+	},
+
+	observe : function() {
+		this.records = []
+		this.listeners = []
+		this.timeouts = []
+		this.intervals = []
+		this.requests = []
+		this.recording = true
+		this.observer.observe(document, {
+			childList : true,
+			attributes : true,
+			characterData : true,
+			subtree : true,
+			attributeOldValue : true,
+			characterDataOldValue : true
+		})
+	},
+
+	restore : function() {
+		if (this.globals === null) {
+			return false
+		}
+		for (var i = 0; i < this.requests.length; i++) {
+			var state = this.requests[i].readyState
+			if (state > 0 && state < 4) {
+				return false
+			}
+		}
+		for (var i = 0; i < this.timeouts.length; i++) {
+			window.clearTimeout(this.timeouts[i])
+		}
+		for (var i = 0; i < this.intervals.length; i++) {
+			window.clearInterval(this.intervals[i])
+		}
+		var records = this.records.concat(this.observer.takeRecords())
+		this.observer.disconnect()
+		this.recording = false
+		try {
+			for (var i = records.length - 1; i >= 0; i--) {
+				var r = records[i]
+				if (r.type == "attributes") {
+					if (r.oldValue === null) {
+						r.target.removeAttribute(r.attributeName)
+					} else {
+						r.target.setAttribute(r.attributeName, r.oldValue)
+					}
+				} else if (r.type == "characterData") {
+					r.target.data = r.oldValue
+				} else {
+					for (var j = 0; j < r.addedNodes.length; j++) {
+						if (r.addedNodes[j].parentNode === r.target) {
+							r.target.removeChild(r.addedNodes[j])
+						}
+					}
+					for (var j = 0; j < r.removedNodes.length; j++) {
+						r.target.insertBefore(r.removedNodes[j], r.nextSibling)
+					}
+				}
+			}
+			for (var i = 0; i < this.listeners.length; i++) {
+				var l = this.listeners[i]
+				l[0].removeEventListener(l[1], l[2], l[3])
+			}
+			for (var key in window) {
+				if (!(key in this.globals)) {
+					continue
+				}
+				try {
+					if (window[key] !== this.globals[key]) {
+						window[key] = this.globals[key]
+					}
+				} catch (err) {
+				}
+			}
+		} catch (err) {
+			console.log("Restoring snapshot failed: " + err)
+			return false
+		}
+		this.observe()
+		return true
+	}
+}
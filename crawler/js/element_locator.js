@@ -0,0 +1,66 @@
+/*
+ *Copyright (C) 2015 Constantin Tschuertz
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * any later version.
+ *
+ *This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+
+// Resolves a dom address, as getXPath builds it, inside the page. The element is marked with the attribute
+// data-jaek-locate and the crawler gets its value or null. So the crawler finds the element with one selector instead of
+// walking the DOM element by element, it removes the mark afterwards.
+var jaek_locate_counter = 0
+
+function jaek_locate(dom_address, html_class) {
+	var steps = dom_address.split("/")
+	var element = document
+	for (var i = 0; i < steps.length && element !== null; i++) {
+		if (steps[i].length == 0) {
+			continue
+		}
+		var tag = steps[i]
+		var index = 1
+		var bracket = tag.indexOf("[")
+		if (bracket > 0) {
+			index = parseInt(tag.substring(bracket + 1, tag.length - 1))
+			tag = tag.substring(0, bracket)
+		}
+		var children = element.childNodes
+		var next = null
+		for (var j = 0; j < children.length; j++) {
+			if (children[j].nodeType == 1 && children[j].tagName.toLowerCase() == tag) {
+				index--
+				if (index == 0) {
+					next = children[j]
+					break
+				}
+			}
+		}
+		element = next
+	}
+	if (element === null || element === document || getXPath(element) !== dom_address) {
+		return null
+	}
+	if (html_class) {
+		var classes = html_class.split(" ")
+		var own_classes = " " + element.className + " "
+		for (var i = 0; i < classes.length; i++) {
+			if (classes[i].length > 0 && own_classes.indexOf(" " + classes[i] + " ") == -1) {
+				return null
+			}
+		}
+	}
+	jaek_locate_counter++
+	element.setAttribute("data-jaek-locate", "" + jaek_locate_counter)
+	return "" + jaek_locate_counter
+}
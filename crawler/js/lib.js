@@ -162,6 +162,51 @@ function callInterceptionWrapper(object, property, argumentIndex,
 	return original;
 }
 
+// Buffers the messages to the crawler and sends them with one call to jswrapper.batch. The buffer is sent, when it is
+// full, after the current task (as microtask) or when the crawler drains it.
+var jaek_channel = {
+	max_size : 200,
+	buffer : [],
+	scheduled : false,
+	// Taken before quiescence.js and timing_wrapper.js wrap it, flushing must not count as timeout of the page
+	set_timeout : window.setTimeout,
+
+	send : function(type, msg) {
+		this.buffer.push({
+			"type" : type,
+			"msg" : msg
+		})
+		if (this.buffer.length >= this.max_size) {
+			this.flush()
+		} else if (!this.scheduled) {
+			this.scheduled = true
+			if (typeof Promise !== "undefined") {
+				Promise.resolve().then(function() {
+					jaek_channel.flush()
+				})
+			} else {
+				this.set_timeout.call(window, function() {
+					jaek_channel.flush()
+				}, 0)
+			}
+		}
+	},
+
+	flush : function() {
+		this.scheduled = false
+		if (this.buffer.length == 0) {
+			return
+		}
+		var batch = JSON.stringify(this.buffer)
+		this.buffer = []
+		jswrapper.batch(batch)
+	}
+}
+
+window.addEventListener("pagehide", function() {
+	jaek_channel.flush()
+})
+
 function XMLHTTPObserverOpen(elem, args) {
 	resp = {
 		"url" : args[1],
@@ -170,8 +215,7 @@ function XMLHTTPObserverOpen(elem, args) {
 	random_num =  Math.floor((Math.random() * 10000) + 1);
 	//console.log("Uniq Id set: " + random_num);
 	elem.jaeks_id = random_num;
-	resp = JSON.stringify(resp);
-	jswrapper.xmlHTTPRequestOpen(resp)
+	jaek_channel.send("xmlHTTPRequestOpen", resp)
 }
 
 function XMLHTTPObserverSend(elem, args) {
@@ -183,8 +227,7 @@ function XMLHTTPObserverSend(elem, args) {
 		"parameters" : elems
 	};
 	//console.log("Uniq Id: " + elem.jaeks_id);
-	resp = JSON.stringify(resp)
-	jswrapper.xmlHTTPRequestSend(resp)
+	jaek_channel.send("xmlHTTPRequestSend", resp)
 }
 
 function timeoutWrapper(elem, args) {
@@ -193,8 +236,7 @@ function timeoutWrapper(elem, args) {
 		"function_id" : function_id,
 		"time" : args[1]
 	};
-	resp = JSON.stringify(resp)
-	jswrapper.timeout(resp)
+	jaek_channel.send("timeout", resp)
 }
 
 function intervallWrapper(elem, args) {
@@ -203,8 +245,7 @@ function intervallWrapper(elem, args) {
 		"function_id" : function_id,
 		"time" : args[1]
 	};
-	resp = JSON.stringify(resp)
-	jswrapper.intervall(resp)
+	jaek_channel.send("intervall", resp)
 }
 
 function getXPath(element) {
@@ -251,8 +292,7 @@ function addEventListenerWrapper(elem, args) {
 		"class" : html_class
 	}
 	//console.log(resp)
-	resp = JSON.stringify(resp)
-	jswrapper.add_eventListener_to_element(resp)
+	jaek_channel.send("add_eventListener_to_element", resp)
 	if (args[0] == "change") {
 		inputs = elem.querySelectorAll("input");
 		selects = elem.querySelectorAll("select");
@@ -275,8 +315,7 @@ function addEventListenerWrapper(elem, args) {
 					"tag" : tag,
 					"class" : html_class
 				}
-				resp = JSON.stringify(resp)
-				jswrapper.add_eventListener_to_element(resp)
+				jaek_channel.send("add_eventListener_to_element", resp)
 			}
 		}
 		for (i = 0; i < selects.length; i++) {
@@ -294,8 +333,7 @@ function addEventListenerWrapper(elem, args) {
 				"tag" : tag,
 				"class" : html_class
 			}
-			resp = JSON.stringify(resp)
-			jswrapper.add_eventListener_to_element(resp)
+			jaek_channel.send("add_eventListener_to_element", resp)
 		}
 		for (xx = 0; xx < options.length; xx++) {
 			element = options[i]
@@ -312,8 +350,7 @@ function addEventListenerWrapper(elem, args) {
 				"tag" : tag,
 				"class" : html_class
 			}
-			resp = JSON.stringify(resp)
-			jswrapper.add_eventListener_to_element(resp)
+			jaek_channel.send("add_eventListener_to_element", resp)
 		}
 	}
     if (tag == "TABLE" && args[0] == "click"){
@@ -333,10 +370,7 @@ function addEventListenerWrapper(elem, args) {
                 "tag": tag,
                 "class": html_class
             };
-            resp = JSON.stringify(resp);
-            //console.log("Hello " + resp)
-            //console.log(element.click)
-            jswrapper.add_eventListener_to_element(resp);
+            jaek_channel.send("add_eventListener_to_element", resp);
         };
     }
 }
@@ -356,8 +390,7 @@ function bodyAddEventListenerWrapper(elem, args) {
 		"tag" : tag,
 		"class" : html_class
 	}
-	resp = JSON.stringify(resp)
-	jswrapper.add_eventListener_to_element(resp)
+	jaek_channel.send("add_eventListener_to_element", resp)
 
 }
 
@@ -0,0 +1,125 @@
+/*
+ *Copyright (C) 2015 Constantin Tschuertz
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * any later version.
+ *
+ *This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+
+// Walks the DOM once and collects everything the link, form and property helpers need. The xpaths are built during
+// the walk the same way getXPath builds them. The result is one JSON string with the elements in document order.
+var jaek_extractor = {
+	// Elements with one of these attributes are clickables
+	properties : [ "onclick", "onmouseover", "onabort", "onblur", "onchange", "onblclick", "onerror", "onfocus",
+			"onkeydown", "onkeypress", "onkeyup", "onmousedown", "onmousemove", "onmouseout", "onmouseup" ],
+	// Tag names -> attributes, that are sent for these elements. Missing attributes are sent as null. The tag names are
+	// upper case, as in HTML documents. XHTML documents have lower case tag names, they are normalized.
+	collected : {
+		"A" : [ "href", "id", "class" ],
+		"IFRAME" : [ "src", "id", "class" ],
+		"FRAME" : [ "src", "id", "class" ],
+		"FORM" : [ "action", "method" ],
+		"INPUT" : [ "type", "name", "value" ],
+		"BUTTON" : [ "type", "name", "value" ],
+		"SELECT" : [ "name" ],
+		"OPTION" : [ "value" ]
+	},
+
+	extract : function() {
+		var result = {
+			"A" : [],
+			"IFRAME" : [],
+			"FRAME" : [],
+			"FORM" : [],
+			"properties" : []
+		}
+		if (document.documentElement) {
+			this.walk(document.documentElement, "/" + document.documentElement.tagName.toLowerCase(), result, [], [])
+		}
+		return JSON.stringify(result)
+	},
+
+	record : function(element, xpath, attributes) {
+		var record = {
+			"tag" : element.tagName.toUpperCase(),
+			"dom_address" : xpath,
+			"attributes" : {}
+		}
+		for (var i = 0; i < attributes.length; i++) {
+			record.attributes[attributes[i]] = element.getAttribute(attributes[i])
+		}
+		return record
+	},
+
+	walk : function(element, xpath, result, forms, selects) {
+		var tag = element.tagName.toUpperCase()
+		var record = null
+		if (this.collected.hasOwnProperty(tag)) {
+			var attributes = this.collected[tag]
+			record = this.record(element, xpath, attributes)
+			if (tag == "FORM") {
+				record["INPUT"] = []
+				record["BUTTON"] = []
+				record["SELECT"] = []
+			} else if (tag == "SELECT") {
+				record["OPTION"] = []
+			}
+			if (result.hasOwnProperty(tag)) {
+				result[tag].push(record)
+			}
+			if (tag == "INPUT" || tag == "BUTTON" || tag == "SELECT") {
+				for (var i = 0; i < forms.length; i++) {
+					forms[i][tag].push(record)
+				}
+			} else if (tag == "OPTION") {
+				for (var i = 0; i < selects.length; i++) {
+					selects[i]["OPTION"].push(record)
+				}
+			}
+		}
+		var properties = []
+		for (var i = 0; i < this.properties.length; i++) {
+			if (element.hasAttribute(this.properties[i])) {
+				properties.push(this.properties[i])
+			}
+		}
+		if (properties.length > 0) {
+			var property_record = this.record(element, xpath, [ "id", "class" ])
+			property_record["properties"] = properties
+			result["properties"].push(property_record)
+		}
+
+		if (tag == "FORM") {
+			forms.push(record)
+		} else if (tag == "SELECT") {
+			selects.push(record)
+		}
+		var counts = Object.create(null)
+		var children = element.childNodes
+		for (var i = 0; i < children.length; i++) {
+			var child = children[i]
+			if (child.nodeType != 1) {
+				continue
+			}
+			var count = (counts[child.tagName] || 0) + 1
+			counts[child.tagName] = count
+			var child_xpath = xpath + "/" + child.tagName.toLowerCase() + (count > 1 ? "[" + count + "]" : "")
+			this.walk(child, child_xpath, result, forms, selects)
+		}
+		if (tag == "FORM") {
+			forms.pop()
+		} else if (tag == "SELECT") {
+			selects.pop()
+		}
+	}
+}
@@ -88,8 +88,7 @@ for (my_counter_i = 0; my_counter_i < elems.length; my_counter_i++) {
 				"addr" : dom_adress,
 				"class" : html_class
 			}
-			resp = JSON.stringify(resp);
-			jswrapper.add_eventlistener_to_element(resp)
+			jaek_channel.send("add_eventlistener_to_element", resp)
 		}
 	}
 
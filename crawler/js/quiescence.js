@@ -0,0 +1,73 @@
+/*
+ *Copyright (C) 2015 Constantin Tschuertz
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * any later version.
+ *
+ *This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+
+// Counts pending timeouts and DOM mutations, so that the crawler can stop waiting as soon as the page is idle.
+var jaek_activity = {
+	pending_timers : 0,
+	mutations : 0,
+	timers : {},
+	max_tracked_delay : 1000, // Longer timeouts are not waited for
+
+	state : function() {
+		return {
+			"timers" : this.pending_timers,
+			"mutations" : this.mutations
+		}
+	},
+
+	timer_done : function(id) {
+		if (this.timers[id]) {
+			delete this.timers[id]
+			this.pending_timers--
+		}
+	}
+}
+
+!function() {
+	var original_set_timeout = window.setTimeout
+	var original_clear_timeout = window.clearTimeout
+	window.setTimeout = function(callback, delay) {
+		if (typeof callback !== "function" || delay > jaek_activity.max_tracked_delay) {
+			return original_set_timeout.apply(this, arguments)
+		}
+		var id
+		var args = Array.prototype.slice.call(arguments)
+		args[0] = function() {
+			jaek_activity.timer_done(id)
+			return callback.apply(this, arguments)
+		}
+		id = original_set_timeout.apply(this, args)
+		jaek_activity.timers[id] = true
+		jaek_activity.pending_timers++
+		return id
+	}
+	window.clearTimeout = function(id) {
+		jaek_activity.timer_done(id)
+		return original_clear_timeout.apply(this, arguments)
+	}
+	if (typeof MutationObserver !== "undefined") {
+		new MutationObserver(function(mutations) {
+			jaek_activity.mutations += mutations.length
+		}).observe(document, {
+			childList : true,
+			attributes : true,
+			characterData : true,
+			subtree : true
+		})
+	}
+}()
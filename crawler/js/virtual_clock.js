@@ -0,0 +1,110 @@
+/*
+ *Copyright (C) 2015 Constantin Tschuertz
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * any later version.
+ *
+ *This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+// Virtual time for the timers of the page. setTimeout and setInterval only queue their callbacks, the crawler runs
+// them in the order they are due with jaek_clock.run_next(), without waiting for them. Must be injected before
+// timing_wrapper.js, so the timers are still reported.
+var jaek_clock = {
+	now : 0,
+	next_id : 1,
+	timers : [], // sorted by due time, timers with the same due time in the order they were set
+
+	add : function(callback, args, delay, type) {
+		delay = Number(delay)
+		if (!(delay > 0)) {
+			delay = 0
+		}
+		var timer = {
+			"id" : this.next_id++,
+			"callback" : callback,
+			"args" : args,
+			"delay" : delay,
+			"due" : this.now + delay,
+			"type" : type
+		}
+		this.insert(timer)
+		return timer.id
+	},
+
+	insert : function(timer) {
+		var i = this.timers.length
+		while (i > 0 && this.timers[i - 1].due > timer.due) {
+			i--
+		}
+		this.timers.splice(i, 0, timer)
+	},
+
+	remove : function(id) {
+		for (var i = 0; i < this.timers.length; i++) {
+			if (this.timers[i].id === id) {
+				this.timers.splice(i, 1)
+				return
+			}
+		}
+	},
+
+	// The next timer, that is due, or null
+	peek : function() {
+		if (this.timers.length == 0) {
+			return null
+		}
+		var timer = this.timers[0]
+		return {
+			"time" : timer.due,
+			"type" : timer.type,
+			"function_id" : MD5(String(timer.callback))
+		}
+	},
+
+	run_next : function() {
+		if (this.timers.length == 0) {
+			return false
+		}
+		var timer = this.timers.shift()
+		this.now = Math.max(this.now, timer.due)
+		if (timer.type == "intervall") {
+			// Queued again before running, so the callback can clear its own interval
+			timer.due = this.now + Math.max(timer.delay, 1)
+			this.insert(timer)
+		}
+		try {
+			if (typeof timer.callback === "function") {
+				timer.callback.apply(window, timer.args)
+			} else {
+				(0, eval)(String(timer.callback))
+			}
+		} catch (e) {
+			console.log("Error in timer: " + e)
+		}
+		return true
+	}
+}
+
+!function() {
+	window.setTimeout = function(callback, delay) {
+		return jaek_clock.add(callback, Array.prototype.slice.call(arguments, 2), delay, "timeout")
+	}
+	window.setInterval = function(callback, delay) {
+		return jaek_clock.add(callback, Array.prototype.slice.call(arguments, 2), delay, "intervall")
+	}
+	window.clearTimeout = function(id) {
+		jaek_clock.remove(id)
+	}
+	window.clearInterval = function(id) {
+		jaek_clock.remove(id)
+	}
+}()
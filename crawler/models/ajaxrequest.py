@@ -47,6 +47,20 @@ class AjaxRequest(AsyncRequests):
 
         return self.method == other.method and url == o_url and self.trigger == other.trigger
 
+    def identity_key(self):
+        try:
+            url = self.url.complete_url
+        except AttributeError:
+            url = self.url
+        try:
+            trigger = self.trigger.identity_key()
+        except AttributeError:
+            trigger = self.trigger
+        return self.method, url, trigger
+
+    def __hash__(self):
+        return hash(self.identity_key())
+
     def __neg__(self):
         return not  self.__eq__()
 
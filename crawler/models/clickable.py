@@ -80,9 +80,14 @@ class Clickable():
         else:
             return self.dom_address == other.dom_address and self.event == other.event and self.links_to == other.links_to
 
+    def identity_key(self):
+        """
+        Equal clickables have equal keys, the clickable type is left out, because an unknown type is equal to every type
+        """
+        return self.dom_address, self.event, self.links_to
+
     def __hash__(self):
-        s_to_hash = self.toString()
-        return hash(s_to_hash)
+        return hash(self.identity_key())
 
 
     def __ne__(self, other):
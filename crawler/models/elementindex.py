@@ -0,0 +1,51 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+__author__ = 'constantin'
+
+
+class ElementIndex():
+    """
+    Identity keys of the links, forms and clickables of a page, so a page diff is a set lookup instead of a loop over
+    all elements of the other page. Clickables are grouped by dom address and event, the rest of Clickable.__eq__
+    (links_to and the clickable type) can change while crawling and is compared within the group.
+    """
+
+    def __init__(self, page):
+        self._lists = page.links, page.forms, page.clickables
+        self._sizes = len(page.links), len(page.forms), len(page.clickables)
+        self.links = set(link.url.toString() for link in page.links)
+        self.forms = set((form.form_hash, form.action.abstract_url) for form in page.forms)
+        self.clickables = {}
+        for clickable in page.clickables:
+            self.clickables.setdefault((clickable.dom_address, clickable.event), []).append(clickable)
+
+    def is_valid_for(self, page):
+        lists = page.links, page.forms, page.clickables
+        return all(a is b for a, b in zip(lists, self._lists)) and self._sizes == tuple(len(l) for l in lists)
+
+    def contains_link(self, link):
+        return link.url.toString() in self.links
+
+    def contains_form(self, form):
+        return (form.form_hash, form.action.abstract_url) in self.forms
+
+    def equal_clickables(self, clickable):
+        """
+        :return: the clickables of the page, that are equal to clickable, in the order of the page
+        """
+        return [c for c in self.clickables.get((clickable.dom_address, clickable.event), []) if clickable == c]
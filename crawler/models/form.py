@@ -51,6 +51,12 @@ class HtmlForm():
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def identity_key(self):
+        return self.get_hash()
+
+    def __hash__(self):
+        return hash(self.identity_key())
+
     def get_hash(self):
         s_to_hash = self.action.abstract_url + ";" + self.method + ";"
         for p in self.parameter:
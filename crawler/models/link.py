@@ -39,6 +39,15 @@ class Link():
             return False
         return self.url == other.url
 
+    def identity_key(self):
+        try:
+            return self.url.toString()
+        except AttributeError:
+            return self.url
+
+    def __hash__(self):
+        return hash(self.identity_key())
+
     def __ne__(self, other):
         return not self.__eq__(other) 
   
\ No newline at end of file
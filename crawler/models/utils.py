@@ -47,8 +47,20 @@ class CrawlSpeed(Enum):
         
 
 def purge_dublicates(X):
+    """
+    Keeps the last of equal elements, in the order of X. Elements with an identity_key are only compared with elements
+    with the same key, so this is linear as long as there are not many equal keys.
+    """
     unique_X = []
-    for i, row in enumerate(X):
-        if row not in X[i + 1:]:
+    later_rows = {}  # identity key -> rows after the current one
+    for row in reversed(X):
+        try:
+            key = row.identity_key()
+        except AttributeError:
+            key = None
+        rows_with_key = later_rows.setdefault(key, [])
+        if not any(row == later_row for later_row in rows_with_key):
             unique_X.append(row)
+        rows_with_key.append(row)
+    unique_X.reverse()
     return unique_X
\ No newline at end of file
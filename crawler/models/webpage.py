@@ -14,6 +14,8 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
+from models.elementindex import ElementIndex
+
 
 class WebPage:
     
@@ -29,6 +31,21 @@ class WebPage:
         self.current_depth = depth
         self.ajax_requests = []
         self.base_url = None # Defines if a page contains a <base> tag
+        self._element_index = None
+
+    def element_index(self):
+        """
+        :return: ElementIndex of the page, it is built again as soon as elements are added or removed
+        """
+        # Pages pickled before the index existed have no _element_index
+        if getattr(self, "_element_index", None) is None or not self._element_index.is_valid_for(self):
+            self._element_index = ElementIndex(self)
+        return self._element_index
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_element_index'] = None
+        return state
         
     def toString(self):
         try:
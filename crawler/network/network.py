@@ -13,45 +13,99 @@ GNU General Public License for more details.
 
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Network access manager with a disk cache, that is shared by all pages of the crawler or attacker. Static resources
+like scripts, style sheets, fonts and images are taken from the cache, if they are there, even if the server does not
+allow caching, because every template page of an application loads the same ones. Pages itself are always requested.
+Requests, that the RequestFilter blocks, are not sent, they fail at once.
 '''
 
-from PyQt5.Qt import QNetworkAccessManager, QDesktopServices, QNetworkDiskCache
 import logging
-from PyQt5.QtNetwork import QHttpMultiPart, QHttpPart
+
+from PyQt5.QtCore import QUrl
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkDiskCache, QNetworkRequest
+
+from network.requestfilter import RequestFilter, ResourceType, resource_type
+
+__author__ = 'constantin'
+
+STATIC_RESOURCE_TYPES = (ResourceType.Script, ResourceType.Stylesheet, ResourceType.Image, ResourceType.Font)
+
+
+def is_static_resource(url):
+    return resource_type(url) in STATIC_RESOURCE_TYPES
+
+
+class CacheStatistics():
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        if self.hits + self.misses == 0:
+            return 0.0
+        return self.hits / (self.hits + self.misses)
 
 
 class NetWorkAccessManager(QNetworkAccessManager):
-    
-    def __init__(self, parent, cache_size = 100, cache_dir='.webkit_cache'):
+
+    def __init__(self, parent, cache_size=100, cache_dir='.webkit_cache', cache=None, statistics=None,
+                 request_filter=None):
+        """
+        :param cache_size: size of the disk cache in MB
+        :param cache: cache to take over instead of creating one, cache_size and cache_dir are ignored then
+        :param request_filter: RequestFilter, default is a filter, that blocks nothing
+        """
         super(NetWorkAccessManager, self).__init__(parent)
-        self.finished.connect(self._finished) 
-        cache = QNetworkDiskCache()
-        cache.setCacheDirectory(cache_dir)
-        cache.setMaximumCacheSize(cache_size * 1024 * 1024) # need to convert cache value to bytes
+        self.finished.connect(self._finished)
+        if cache is None:
+            cache = QNetworkDiskCache()
+            cache.setCacheDirectory(cache_dir)
+            cache.setMaximumCacheSize(cache_size * 1024 * 1024)  # need to convert cache value to bytes
         self.setCache(cache)
-        
-    def _finished(self, reply):
-        reply.deleteLater()
-        
-    def createRequest(self, op, req, device=None):
-        self.reply = None
+        self.statistics = statistics if statistics is not None else CacheStatistics()
+        self.request_filter = request_filter if request_filter is not None else RequestFilter(blocked_types=())
+
+    def renew(self, parent):
         """
-        if op == 1:
-            logging.debug("NetworkAccessManager: Request created - Operation: {}, Url: {}".format("Head",req.url().toString()))
-        elif op == 2:
-            logging.debug("NetworkAccessManager: Request created - Operation: {}, Url: {}".format("GET",req.url().toString()))
-        elif op == 3:
-            logging.debug("NetworkAccessManager: Request created - Operation: {}, Url: {}".format("PUT",req.url().toString()))
-        elif op == 4:
-            logging.debug("NetworkAccessManager: Request created - Operation: {}, Url: {}".format("POST",req.url().toString()))
-        elif op == 5:
-            logging.debug("NetworkAccessManager: Request created - Operation: {}, Url: {}".format("Delete",req.url().toString()))
-        else:
-            logging.debug("NetworkAccessManager: Request created - Operation: {}, Url: {}".format("CUSTOM",req.url().toString()))
+        :return: a new manager with the cookie jar, the cache, the statistics and the request filter of this one. The
+        cache is reparented to the new manager, so it survives the deletion of this one.
         """
-        reply = QNetworkAccessManager.createRequest(self, op, req, device)
-        #reply = NetworkReply(self, reply)
-        return reply
+        manager = NetWorkAccessManager(parent, cache=self.cache(), statistics=self.statistics,
+                                       request_filter=self.request_filter)
+        manager.setCookieJar(self.cookieJar())
+        return manager
 
-    def __del__(self):
-        self = None
+    def reset_statistics(self):
+        self.statistics.reset()
+        self.request_filter.reset()
+
+    def log_statistics(self):
+        logging.debug("Network cache: {} hits, {} misses ({:.0%} hit rate)".format(
+            self.statistics.hits, self.statistics.misses, self.statistics.hit_rate()))
+        if len(self.request_filter.blocked) > 0:
+            logging.debug("Blocked requests: {}".format(self.request_filter.summary()))
+
+    def _finished(self, reply):
+        # WebKit deletes its replies itself, so they are only counted here
+        if reply.operation() != QNetworkAccessManager.GetOperation or reply.url().scheme() not in ("http", "https"):
+            return
+        if reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            self.statistics.hits += 1
+        else:
+            self.statistics.misses += 1
+
+    def createRequest(self, op, req, device=None):
+        url = req.url().toString()
+        if op == QNetworkAccessManager.GetOperation and self.request_filter.blocks(url):
+            # A request without url fails at once, so the page sees a failed load as for an unreachable resource
+            return QNetworkAccessManager.createRequest(self, op, QNetworkRequest(QUrl()), device)
+        if op == QNetworkAccessManager.GetOperation and is_static_resource(url):
+            req = QNetworkRequest(req)
+            req.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.PreferCache)
+        return QNetworkAccessManager.createRequest(self, op, req, device)
@@ -0,0 +1,91 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Decides, which requests of a page are not sent at all. Images, media, fonts and plugin content are not needed to find
+the clickables, links and forms of a page, neither are the hosts, that are blocked in the configuration. Scripts and
+style sheets are never blocked by type, the crawler needs the scripts to be executed and instrumented.
+'''
+
+from collections import Counter
+from enum import Enum
+from urllib.parse import urlparse
+
+__author__ = 'constantin'
+
+
+class ResourceType(Enum):
+    Other = 0
+    Script = 1
+    Stylesheet = 2
+    Image = 3
+    Media = 4
+    Font = 5
+    Plugin = 6
+
+
+_EXTENSIONS = {ResourceType.Script: ["js"],
+               ResourceType.Stylesheet: ["css"],
+               ResourceType.Image: ["png", "jpg", "jpeg", "gif", "svg", "ico", "bmp", "webp"],
+               ResourceType.Media: ["mp4", "webm", "ogg", "ogv", "oga", "mp3", "wav", "m4a", "avi", "mov", "flv"],
+               ResourceType.Font: ["woff", "woff2", "ttf", "eot", "otf"],
+               ResourceType.Plugin: ["swf", "jar", "class", "xap"]}
+_TYPE_OF_EXTENSION = {extension: resource_type for resource_type, extensions in _EXTENSIONS.items()
+                      for extension in extensions}
+
+DEFAULT_BLOCKED_TYPES = (ResourceType.Image, ResourceType.Media, ResourceType.Font, ResourceType.Plugin)
+
+
+def resource_type(url):
+    """
+    :return: the ResourceType of url, guessed from the extension of its path. Pages are ResourceType.Other.
+    """
+    path = urlparse(url).path
+    extension = path.rsplit(".", 1)[-1].lower() if "." in path.rsplit("/", 1)[-1] else ""
+    return _TYPE_OF_EXTENSION.get(extension, ResourceType.Other)
+
+
+class RequestFilter():
+
+    def __init__(self, blocked_types=DEFAULT_BLOCKED_TYPES, blocked_hosts=()):
+        """
+        :param blocked_hosts: requests to these hosts and their subdomains are blocked, whatever their type is
+        """
+        self.blocked_types = set(blocked_types)
+        self.blocked_hosts = [host.lower() for host in blocked_hosts]
+        self.blocked = Counter()  # resource type -> number of blocked requests
+
+    def blocks(self, url):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return False
+        url_type = resource_type(url)
+        if url_type in self.blocked_types or self._is_blocked_host(parsed.hostname):
+            self.blocked[url_type] += 1
+            return True
+        return False
+
+    def reset(self):
+        self.blocked = Counter()
+
+    def summary(self):
+        return ", ".join("{} {}".format(count, url_type.name.lower()) for url_type, count in sorted(
+            self.blocked.items(), key=lambda item: item[0].value))
+
+    def _is_blocked_host(self, hostname):
+        if hostname is None:
+            return False
+        hostname = hostname.lower()
+        return any(hostname == host or hostname.endswith("." + host) for host in self.blocked_hosts)
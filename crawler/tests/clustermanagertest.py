@@ -0,0 +1,120 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from core.clustermanager import ClusterManager
+from models.clickable import Clickable
+from models.webpage import WebPage
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class PagesInMemory():
+    """
+    Keeps pages and clusters like the DatabaseManager, but in memory
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.clusters = {}
+        self.similarities = {}
+
+    def get_web_page_to_id(self, page_id):
+        return self.pages[page_id]
+
+    def get_clusters(self, url_hash):
+        return self.clusters.get(url_hash)
+
+    def write_clusters(self, url_hash, clusters):
+        self.clusters[url_hash] = clusters
+
+    def add_cluster(self, url_hash, cluster):
+        self.clusters.setdefault(url_hash, []).append(cluster)
+
+    def add_page_to_cluster(self, url_hash, cluster_index, page_id):
+        self.clusters[url_hash][cluster_index].append(page_id)
+
+    def write_similarities(self, similarities):
+        self.similarities.update(similarities)
+
+    def get_similarities(self, page_ids):
+        return {key: similarity for key, similarity in self.similarities.items()
+                if key >> 32 in page_ids and key & 0xFFFFFFFF in page_ids}
+
+
+class ClusterManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pages = PagesInMemory()
+        self.cluster_manager = ClusterManager(self.pages)
+
+    def _add_page(self, id, clickables):
+        page = WebPage(id, "http://example.com/index.php?id={}".format(id))
+        page.clickables = [Clickable("click", "a", dom_address) for dom_address in clickables]
+        self.pages.pages[id] = page
+        self.cluster_manager.add_webpage_to_cluster(page)
+        return page
+
+    def _stored_clusters(self):
+        url_hash = list(self.pages.clusters.keys())[0]
+        return sorted(sorted(c) for c in self.pages.clusters[url_hash])
+
+    def _dom_addresses(self, first, last):
+        return ["/html/body/a[{}]".format(i) for i in range(first, last + 1)]
+
+    def test_new_cluster_and_join(self):
+        self._add_page(1, self._dom_addresses(0, 9))
+        self._add_page(2, self._dom_addresses(20, 29))
+        self._add_page(3, self._dom_addresses(0, 8))
+        self.assertEqual(self._stored_clusters(), [[1, 3], [2]])
+
+    def test_page_merges_clusters(self):
+        self._add_page(1, self._dom_addresses(0, 9))
+        self._add_page(2, self._dom_addresses(2, 11))
+        self.assertEqual(self._stored_clusters(), [[1], [2]])
+        # Close enough to both pages
+        self._add_page(3, self._dom_addresses(1, 10))
+        self.assertEqual(self._stored_clusters(), [[1, 2, 3]])
+        self.assertEqual(self.cluster_manager.num_of_clusters(list(self.pages.clusters.keys())[0]), 1)
+
+    def test_clusters_are_loaded_from_database(self):
+        self._add_page(1, self._dom_addresses(0, 9))
+        self.cluster_manager = ClusterManager(self.pages)
+        self._add_page(2, self._dom_addresses(0, 8))
+        self._add_page(3, self._dom_addresses(20, 29))
+        self.assertEqual(self._stored_clusters(), [[1, 2], [3]])
+
+    def test_stored_similarities_are_reused(self):
+        self._add_page(1, self._dom_addresses(0, 9))
+        self._add_page(2, self._dom_addresses(20, 29))
+        self.cluster_manager.flush_similarities()
+        self.assertEqual(len(self.pages.similarities), 1)
+        self.cluster_manager = ClusterManager(self.pages)
+        self._add_page(3, self._dom_addresses(0, 8))
+        self.assertEqual(self._stored_clusters(), [[1, 3], [2]])
+        self.assertEqual(self.cluster_manager._similarity_cache.hits, 1)
+
+    def test_num_of_clusters(self):
+        self._add_page(1, ["/a"])
+        self._add_page(2, ["/b"])
+        url_hash = list(self.pages.clusters.keys())[0]
+        self.assertEqual(self.cluster_manager.num_of_clusters(url_hash), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -44,6 +44,16 @@ class DataBaseTests(unittest.TestCase):
     def setUp(self):
         self.database = Database("DataBaseUnit")
 
+    def tearDown(self):
+        self.database.close_write_buffer()
+
+
+    def test_indexes(self):
+        index_keys = [index['key'] for index in self.database.urls.index_information().values()]
+        self.assertIn([("session", 1), ("visited", 1), ("url_counter", 1)], index_keys)
+        index_info = self.database.clusters.index_information()
+        self.assertTrue(any(index.get('unique') for index in index_info.values()
+                            if index['key'] == [("session", 1), ("url_hash", 1)]))
 
     def test_url_set_and_get(self):
         url = Url(TEST_URL1, depth_of_finding=3)
@@ -110,28 +120,40 @@ class DataBaseTests(unittest.TestCase):
         form = HtmlForm([form_input1,form_input2], TEST_URL1, "POST", dom_address= None)
 
         self.database.insert_form(SESSION,form, WEBPAGE_ID)
+        self.database.flush()
         self.assertEqual(self.database.forms.count(), 1)
         form1 = self.database.get_all_forms_to_page_id_from_db(SESSION,WEBPAGE_ID)
         self.assertEqual(form, form1[0])
         self.assertEqual(form.toString(), form1[0].toString())
 
+    def test_form_without_write_behind(self):
+        database = Database("DataBaseUnitDirect", write_behind=False)
+        form = HtmlForm([FormInput("INPUT", "Username", input_type="text", values=None)], TEST_URL1, "POST", dom_address= None)
+        database.insert_form(SESSION, form, WEBPAGE_ID)
+        self.assertEqual(database.forms.count(), 1)
+        database.insert_form(SESSION, form, WEBPAGE_ID)
+        self.assertEqual(database.forms.count(), 1)
+
     def test_similar_forms(self):
         form_input1 = FormInput("INPUT", "Test1", input_type="text", values=["Thomas"])
         form_input2 = FormInput("INPUT", "Test2", input_type="text", values=["Mueller"])
         form = HtmlForm([form_input1,form_input2], TEST_URL1, "POST", dom_address= None)
         self.database.insert_form(SESSION,form, WEBPAGE_ID)
+        self.database.flush()
         self.assertEqual(self.database.forms.count(), 1)
 
         form_input1 = FormInput("INPUT", "Test1", input_type="text", values=["Edgar"])
         form_input2 = FormInput("INPUT", "Test2", input_type="text", values=["Mueller"])
         form = HtmlForm([form_input1,form_input2], TEST_URL1, "POST", dom_address= None)
         self.database.insert_form(SESSION,form, WEBPAGE_ID)
+        self.database.flush()
         self.assertEqual(self.database.forms.count(), 1)
 
         form_input1 = FormInput("INPUT", "Test1", input_type="text", values=["Thomas, Edgar"])
         form_input2 = FormInput("INPUT", "Test2", input_type="text", values=["Mueller"])
         form = HtmlForm([form_input1,form_input2], TEST_URL1, "POST", dom_address= None)
         self.database.insert_form(SESSION,form, WEBPAGE_ID)
+        self.database.flush()
         self.assertEqual(self.database.forms.count(), 1)
 
 
@@ -144,14 +166,39 @@ class DataBaseTests(unittest.TestCase):
         form_input2 = FormInput("INPUT", "Test3", input_type="text", values=["Mueller"])
         form = HtmlForm([form_input1,form_input2], TEST_URL1, "POST", dom_address= None)
         self.database.insert_form(SESSION,form, WEBPAGE_ID)
+        self.database.flush()
         self.assertEqual(self.database.forms.count(), 1)
 
         form_input1 = FormInput("INPUT", "Test1", input_type="text", values=["Edgar"])
         form_input2 = FormInput("INPUT", "Test2", input_type="text", values=["Mueller"])
         form = HtmlForm([form_input1,form_input2], TEST_URL1, "POST", dom_address= None)
         self.database.insert_form(SESSION,form, WEBPAGE_ID)
+        self.database.flush()
         self.assertEqual(self.database.forms.count(), 2)
 
+    def test_similarities(self):
+        self.database.write_similarities(SESSION, {(2 << 32) | 1: 0.5, (3 << 32) | 1: 0.6})
+        self.database.write_similarities(SESSION, {(2 << 32) | 1: 0.5})
+        self.assertEqual(self.database.similarities.count(), 2)
+        self.assertEqual(self.database.get_similarities(SESSION, [1, 2]), {(2 << 32) | 1: 0.5})
+
+    def test_waiting_delta_pages(self):
+        self.database.insert_waiting_delta_page(SESSION, 0, 5, b"first")
+        self.database.insert_waiting_delta_page(SESSION, 1, 7, b"second")
+        self.database.insert_waiting_delta_page(SESSION, 2, 6, b"third")
+        self.database.remove_waiting_delta_pages(SESSION, {7})
+        self.assertEqual(list(self.database.get_waiting_delta_pages(SESSION)), [b"first", b"third"])
+        self.database.rollback_to_checkpoint(SESSION, 6)
+        self.assertEqual(list(self.database.get_waiting_delta_pages(SESSION)), [b"first"])
+
+    def test_rollback_to_checkpoint(self):
+        self.database.write_cluster(SESSION, "hash", [[1, 2, 7], [8], 3])
+        self.database.insert_asyncrequest(SESSION, deepcopy(AJAXREQUEST), 3)
+        self.database.insert_asyncrequest(SESSION, deepcopy(AJAXREQUEST), 3, 6)
+        self.database.rollback_to_checkpoint(SESSION, 5)
+        self.assertEqual(self.database.get_clusters(SESSION, "hash"), [[1, 2], [3]])
+        self.assertEqual([r['web_page_id'] for r in self.database.async_requests.find({"session": SESSION})], [3])
+
     def test_web_page_extend_ajax(self):
         web_page = deepcopy(WEBPAGE)
         clickable = deepcopy(CLICKABLE)
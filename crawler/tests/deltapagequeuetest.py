@@ -0,0 +1,66 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from database.deltapagequeue import DeltaPageQueue
+from models.clickable import Clickable
+from models.deltapage import DeltaPage
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class DeltaPageQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = DeltaPageQueue(memory_budget=2000)
+
+    def tearDown(self):
+        self.queue.close()
+
+    def _delta_page(self, id, url="http://example.com/"):
+        return DeltaPage(id, url, html="<html>" + "x" * 500 + "</html>", parent_id=0)
+
+    def test_pop_empty(self):
+        self.assertIsNone(self.queue.pop())
+
+    def test_fifo_with_spilled_pages(self):
+        for i in range(10):
+            self.queue.push(self._delta_page(i))
+        self.assertGreater(self.queue.num_of_spilled_pages(), 0)
+        self.assertEqual([p.id for p in self.queue], list(range(10)))
+        ids = []
+        while len(self.queue) > 0:
+            ids.append(self.queue.pop().id)
+        self.assertEqual(ids, list(range(10)))
+        self.assertEqual(self.queue.num_of_spilled_pages(), 0)
+
+    def test_similar_pages(self):
+        for i in range(6):
+            page = self._delta_page(i, "http://example.com/{}".format(i % 2))
+            page.clickables = [Clickable("click", "a", "/html/body/a[{}]".format(i % 3 == 0))]
+            self.queue.push(page)
+        other = self._delta_page(6, "http://example.com/1")
+        other.clickables = [Clickable("click", "a", "/html/body/a[True]")]
+        self.assertEqual([p.id for p in self.queue.similar_pages(other)], [3])
+        for i in range(4):
+            self.queue.pop()
+        self.assertEqual(list(self.queue.similar_pages(other)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
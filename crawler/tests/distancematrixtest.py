@@ -0,0 +1,49 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from core.distancematrix import DistanceMatrix
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class DistanceMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = DistanceMatrix()
+        self.matrix.add_page(10, "f10", [])
+        self.matrix.add_page(11, "f11", [0.5])
+        self.matrix.add_page(12, "f12", [0.1, 0.2])
+
+    def test_distance_is_symmetric(self):
+        self.assertEqual(self.matrix.distance(12, 10), 0.1)
+        self.assertEqual(self.matrix.distance(10, 12), 0.1)
+        self.assertEqual(self.matrix.distance(11, 12), 0.2)
+        self.assertEqual(self.matrix.distance(11, 11), 0.0)
+
+    def test_row(self):
+        self.assertEqual(list(self.matrix.row(12)), [0.1, 0.2])
+        self.assertEqual(list(self.matrix.row(10)), [])
+        self.assertEqual(self.matrix.features_of(11), "f11")
+
+    def test_row_must_match(self):
+        self.assertRaises(ValueError, self.matrix.add_page, 13, "f13", [0.3])
+
+
+if __name__ == '__main__':
+    unittest.main()
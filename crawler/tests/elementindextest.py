@@ -0,0 +1,65 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import pickle
+
+from models.clickable import Clickable
+from models.clickabletype import ClickableType
+from models.link import Link
+from models.url import Url
+from models.webpage import WebPage
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class ElementIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.page = WebPage(1, "http://example.com/")
+        self.page.clickables = [Clickable("click", "a", "/html/body/a[1]"), Clickable("click", "a", "/html/body/a[2]")]
+        self.page.links = [Link(Url("http://example.com/a.php"), "/html/body/a[3]")]
+
+    def test_lookup(self):
+        index = self.page.element_index()
+        self.assertTrue(index.contains_link(Link(Url("http://example.com/a.php"), "/html/body/div")))
+        self.assertFalse(index.contains_link(Link(Url("http://example.com/b.php"), "/html/body/a[3]")))
+        self.assertEqual(index.equal_clickables(Clickable("click", "div", "/html/body/a[1]")), [self.page.clickables[0]])
+        self.assertEqual(index.equal_clickables(Clickable("mouseover", "a", "/html/body/a[1]")), [])
+
+    def test_clickable_type_is_compared_when_known(self):
+        clickable = Clickable("click", "a", "/html/body/a[1]")
+        clickable.clickable_type = ClickableType.UIChange
+        self.assertEqual(len(self.page.element_index().equal_clickables(clickable)), 1)
+        self.page.clickables[0].clickable_type = ClickableType.SendingAjax
+        self.assertEqual(len(self.page.element_index().equal_clickables(clickable)), 0)
+
+    def test_index_is_cached_until_elements_change(self):
+        index = self.page.element_index()
+        self.assertIs(self.page.element_index(), index)
+        self.page.clickables.append(Clickable("click", "a", "/html/body/a[4]"))
+        self.assertIsNot(self.page.element_index(), index)
+        self.assertEqual(len(self.page.element_index().equal_clickables(self.page.clickables[-1])), 1)
+
+    def test_index_is_not_pickled(self):
+        self.page.element_index()
+        self.assertIsNone(pickle.loads(pickle.dumps(self.page))._element_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
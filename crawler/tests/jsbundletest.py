@@ -0,0 +1,55 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from core.jsbundle import BundleMode, get_bundle, read_script, clear_cache
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class JsBundleTest(unittest.TestCase):
+
+    def tearDown(self):
+        clear_cache()
+
+    def test_bundle_contains_scripts_in_order(self):
+        bundle = get_bundle(BundleMode.ExecutorInterceptXHR)
+        positions = [bundle.source.index(read_script(file_name)) for file_name in bundle.file_names]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn("ajax_interceptor.js", bundle.file_names)
+        self.assertNotIn("ajax_observer.js", bundle.file_names)
+
+    def test_virtual_clock_before_timing_wrapper(self):
+        # The timing wrapper has to wrap the virtual timers, otherwise the timers would not be reported
+        file_names = get_bundle(BundleMode.AnalyzerVirtualTime).file_names
+        self.assertLess(file_names.index("virtual_clock.js"), file_names.index("timing_wrapper.js"))
+        self.assertNotIn("virtual_clock.js", get_bundle(BundleMode.Analyzer).file_names)
+
+    def test_bundle_is_cached(self):
+        self.assertIs(get_bundle(BundleMode.Analyzer), get_bundle(BundleMode.Analyzer))
+        self.assertIs(read_script("lib.js"), read_script("lib.js"))
+
+    def test_hash_in_source_url(self):
+        bundle = get_bundle(BundleMode.FormHandler)
+        self.assertEqual(len(bundle.hash), 32)
+        self.assertIn("sourceURL=jaek-formhandler-{}.js".format(bundle.hash), bundle.source)
+        self.assertNotEqual(bundle.hash, get_bundle(BundleMode.Executor).hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
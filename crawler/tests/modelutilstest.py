@@ -0,0 +1,56 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from models.clickable import Clickable
+from models.clickabletype import ClickableType
+from models.link import Link
+from models.url import Url
+from models.utils import purge_dublicates
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class PurgeDublicatesTest(unittest.TestCase):
+
+    def test_keeps_last_of_equal_elements(self):
+        a1 = Clickable("click", "a", "/html/body/a[1]")
+        b = Clickable("click", "a", "/html/body/a[2]")
+        a2 = Clickable("click", "div", "/html/body/a[1]")
+        self.assertEqual([id(c) for c in purge_dublicates([a1, b, a2])], [id(b), id(a2)])
+
+    def test_unknown_clickable_type(self):
+        a1 = Clickable("click", "a", "/html/body/a[1]")
+        a1.clickable_type = ClickableType.UIChange
+        a2 = Clickable("click", "a", "/html/body/a[1]")
+        a2.clickable_type = ClickableType.SendingAjax
+        a3 = Clickable("click", "a", "/html/body/a[1]")
+        # a3 is equal to both, but a1 and a2 are different
+        self.assertEqual([id(c) for c in purge_dublicates([a1, a2, a3])], [id(a3)])
+        self.assertEqual([id(c) for c in purge_dublicates([a3, a1, a2])], [id(a1), id(a2)])
+
+    def test_elements_without_identity_key(self):
+        self.assertEqual(purge_dublicates([1, 2, 1, 3]), [2, 1, 3])
+
+    def test_equal_elements_have_equal_hashes(self):
+        self.assertEqual(hash(Clickable("click", "a", "/a")), hash(Clickable("click", "div", "/a")))
+        self.assertEqual(len({Link(Url("http://example.com/"), "/a"), Link(Url("http://example.com/"), "/b")}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from analyzer.helper.formhelper import extract_forms
+from analyzer.helper.linkhelper import extract_links
+from analyzer.helper.pageextractor import PageExtraction
+from analyzer.helper.propertyhelper import property_helper
+
+__author__ = 'constantin'
+
+import unittest
+
+
+def record(tag, dom_address, attributes, **children):
+    result = {"tag": tag, "dom_address": dom_address, "attributes": attributes}
+    result.update(children)
+    return result
+
+
+class PageExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        inputs = [record("INPUT", "/html/body/form/input", {"type": "text", "name": "q", "value": None}),
+                  record("INPUT", "/html/body/form/input[2]", {"type": "radio", "name": "r", "value": "1"}),
+                  record("INPUT", "/html/body/form/input[3]", {"type": "radio", "name": "r", "value": "2"})]
+        options = [record("OPTION", "/html/body/form/select/option", {"value": "o"})]
+        selects = [record("SELECT", "/html/body/form/select", {"name": "s"}, OPTION=options)]
+        form = record("FORM", "/html/body/form", {"action": "/search", "method": "post"}, INPUT=inputs, BUTTON=[],
+                      SELECT=selects)
+        self.extraction = PageExtraction({
+            "A": [record("A", "/html/body/a", {"href": "/a.php", "id": "l", "class": None}),
+                  record("A", "/html/body/a[2]", {"href": "javascript:go()", "id": None, "class": None})],
+            "IFRAME": [record("IFRAME", "/html/body/iframe", {"src": "/frame.php", "id": None, "class": None})],
+            "FRAME": [],
+            "FORM": [form],
+            "properties": [record("DIV", "/html/body/div", {"id": "d", "class": None},
+                                  properties=["onclick", "onmouseover"])]})
+
+    def test_links(self):
+        links, clickables = extract_links(self.extraction, "http://example.com/")
+        self.assertEqual([link.dom_address for link in links], ["/html/body/a", "/html/body/iframe"])
+        self.assertEqual(links[0].html_id, "l")
+        self.assertEqual(links[0].html_class, "")
+        self.assertEqual([(c.event, c.dom_address) for c in clickables], [("javascript:go()", "/html/body/a[2]")])
+
+    def test_forms(self):
+        forms = extract_forms(self.extraction)
+        self.assertEqual(len(forms), 1)
+        self.assertEqual(forms[0].dom_address, "/html/body/form")
+        self.assertEqual(forms[0].method, "post")
+        parameters = {p.name: (p.input_type, p.values) for p in forms[0].parameter}
+        self.assertEqual(parameters, {"q": ("text", [None]), "r": ("radio", ["1", "2"]), "s": (None, ["o"])})
+
+    def test_properties(self):
+        clickables = property_helper(self.extraction)
+        self.assertEqual([(c.event, c.dom_address, c.id) for c in clickables],
+                         [("onclick", "/html/body/div", "d"), ("onmouseover", "/html/body/div", "d")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from models.clickable import Clickable
+from models.link import Link
+from models.url import Url
+from models.webpage import WebPage
+from utils.pagesimilarity import PageFeatures, similarity_of_features, similarities_to_pages
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class PageSimilarityTest(unittest.TestCase):
+
+    def _page(self, id, clickables=(), links=()):
+        page = WebPage(id, "http://example.com/")
+        page.clickables = [Clickable("click", "a", dom_address) for dom_address in clickables]
+        page.links = []
+        for url in links:
+            link = Link(Url(url), "/html/body/a")
+            link.url.abstract_url = url
+            page.links.append(link)
+        return page
+
+    def test_empty_pages_are_equal(self):
+        self.assertEqual(similarity_of_features(PageFeatures(self._page(1)), PageFeatures(self._page(2))), 1)
+
+    def test_partial_overlap(self):
+        page1 = self._page(1, clickables=["/a", "/b", "/c"], links=["x", "y"])
+        page2 = self._page(2, clickables=["/a", "/b", "/d"], links=["x", "z"])
+        # Clickables: 2 / (6 - 2), links: 1 / (4 - 1)
+        self.assertAlmostEqual(similarity_of_features(PageFeatures(page1), PageFeatures(page2)), (0.5 + 1 / 3.0) / 2)
+
+    def test_unknown_clickable_type_matches_every_type(self):
+        page1 = self._page(1, clickables=["/a"])
+        page2 = self._page(2, clickables=["/a"])
+        page1.clickables[0].clickable_type = 1
+        self.assertEqual(similarity_of_features(PageFeatures(page1), PageFeatures(page2)), 1.0)
+        page2.clickables[0].clickable_type = 2
+        self.assertEqual(similarity_of_features(PageFeatures(page1), PageFeatures(page2)), 0.0)
+
+    def test_similarities_to_pages(self):
+        page = self._page(1, clickables=["/a", "/b"])
+        others = [self._page(2, clickables=["/a", "/b"]), self._page(3, clickables=["/c"])]
+        self.assertEqual(similarities_to_pages(page, others), [1.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
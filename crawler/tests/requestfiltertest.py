@@ -0,0 +1,60 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from network.requestfilter import RequestFilter, ResourceType, resource_type
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class RequestFilterTest(unittest.TestCase):
+
+    def test_resource_type(self):
+        self.assertEqual(resource_type("http://example.com/static/app.min.js?v=3"), ResourceType.Script)
+        self.assertEqual(resource_type("http://example.com/logo.PNG"), ResourceType.Image)
+        self.assertEqual(resource_type("http://example.com/fonts/a.woff2#iefix"), ResourceType.Font)
+        self.assertEqual(resource_type("http://example.com/index.php?file=a.png"), ResourceType.Other)
+        self.assertEqual(resource_type("http://example.com/v1.2/users"), ResourceType.Other)
+        self.assertEqual(resource_type("http://example.com/"), ResourceType.Other)
+
+    def test_blocks_types(self):
+        request_filter = RequestFilter()
+        self.assertTrue(request_filter.blocks("http://example.com/a.png"))
+        self.assertTrue(request_filter.blocks("http://example.com/b.jpg"))
+        self.assertTrue(request_filter.blocks("http://example.com/movie.mp4"))
+        self.assertFalse(request_filter.blocks("http://example.com/app.js"))
+        self.assertFalse(request_filter.blocks("http://example.com/style.css"))
+        self.assertFalse(request_filter.blocks("http://example.com/index.php"))
+        self.assertFalse(request_filter.blocks("data:image/png;base64,AAAA"))
+        self.assertEqual(request_filter.blocked[ResourceType.Image], 2)
+        self.assertEqual(request_filter.blocked[ResourceType.Media], 1)
+        self.assertEqual(request_filter.summary(), "2 image, 1 media")
+        request_filter.reset()
+        self.assertEqual(len(request_filter.blocked), 0)
+
+    def test_blocks_hosts(self):
+        request_filter = RequestFilter(blocked_types=(), blocked_hosts=["tracker.com"])
+        self.assertTrue(request_filter.blocks("http://tracker.com/t.js"))
+        self.assertTrue(request_filter.blocks("https://cdn.Tracker.com/t.js"))
+        self.assertFalse(request_filter.blocks("http://nottracker.com/t.js"))
+        self.assertFalse(request_filter.blocks("http://example.com/a.png"))
+        self.assertEqual(request_filter.blocked[ResourceType.Script], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
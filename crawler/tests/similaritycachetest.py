@@ -0,0 +1,81 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from core.similaritycache import SimilarityCache, similarity_key
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class SimilarityCacheTest(unittest.TestCase):
+
+    def test_key_is_symmetric(self):
+        self.assertEqual(similarity_key(3, 17), similarity_key(17, 3))
+        self.assertEqual(similarity_key(3, 17), (17 << 32) | 3)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = SimilarityCache(max_entries=2)
+        cache.put(1, 2, 0.5)
+        cache.put(1, 3, 0.6)
+        self.assertEqual(cache.get(2, 1), 0.5)
+        cache.put(1, 4, 0.7)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(1, 3))
+        self.assertEqual(cache.get(1, 2), 0.5)
+        self.assertEqual(cache.get(4, 1), 0.7)
+
+    def test_flush_and_load(self):
+        persistence_manager = DictPersistenceManager()
+        cache = SimilarityCache(persistence_manager, max_entries=2, batch_size=2)
+        cache.put(1, 2, 0.5)
+        self.assertEqual(persistence_manager.similarities, {})
+        cache.put(1, 3, 0.6)
+        self.assertEqual(persistence_manager.similarities, {similarity_key(1, 2): 0.5, similarity_key(1, 3): 0.6})
+        cache.put(1, 4, 0.7)
+        cache.flush()
+        self.assertEqual(persistence_manager.num_of_writes, 2)
+        self.assertIsNone(cache.get(1, 2))
+
+        # Evicted similarities are loaded again and a recomputed one replaces the stored one
+        cache.load([1, 2, 4])
+        self.assertEqual(cache.get(2, 1), 0.5)
+        self.assertEqual(cache.get(1, 4), 0.7)
+        cache.put(1, 3, 0.6)
+        cache.flush()
+        self.assertEqual(len(persistence_manager.similarities), 3)
+        cache.flush()
+        self.assertEqual(persistence_manager.num_of_writes, 3)
+
+
+class DictPersistenceManager():
+
+    def __init__(self):
+        self.similarities = {}
+        self.num_of_writes = 0
+
+    def write_similarities(self, similarities):
+        self.similarities.update(similarities)
+        self.num_of_writes += 1
+
+    def get_similarities(self, page_ids):
+        return {key: similarity for key, similarity in self.similarities.items()
+                if key >> 32 in page_ids and key & 0xFFFFFFFF in page_ids}
+
+
+if __name__ == '__main__':
+    unittest.main()
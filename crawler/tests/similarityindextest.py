@@ -0,0 +1,87 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from models.clickable import Clickable
+from models.deltapage import DeltaPage
+from models.link import Link
+from models.url import Url
+from utils.pagesimilarity import PageFeatures, similarity_of_features
+from utils.similarityindex import SimilarityIndex
+
+__author__ = 'constantin'
+
+import random
+import unittest
+
+
+class SimilarityIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SimilarityIndex()
+
+    def _page(self, id, clickables, links=0, url="http://example.com/"):
+        page = DeltaPage(id, url)
+        page.clickables = [Clickable("click", "a", "/html/body/a[{}]".format(i)) for i in clickables]
+        page.links = [Link(Url("http://example.com/page{}.php".format(i)), "/html/body/div/a") for i in range(links)]
+        return page
+
+    def test_similar_page_is_candidate(self):
+        self.index.add(1, self._page(1, range(20)))
+        self.assertEqual(self.index.candidates(self._page(2, range(19))), {1})
+
+    def test_different_pages_are_no_candidates(self):
+        self.index.add(1, self._page(1, range(20)))
+        self.assertEqual(self.index.candidates(self._page(2, range(20, 40))), set())
+
+    def test_other_url_is_no_candidate(self):
+        self.index.add(1, self._page(1, range(20)))
+        self.assertEqual(self.index.candidates(self._page(2, range(20), url="http://example.com/other")), set())
+
+    def test_repeated_links_are_candidates(self):
+        stored = self._page(1, [])
+        stored.links = [Link(Url("http://example.com/{}".format(c)), "/html/body/a") for c in "abcdefghij"]
+        page = self._page(2, [])
+        page.links = [Link(Url("http://example.com/{}".format(c)), "/html/body/a") for c in "aaaaaaaaab"]
+        self.assertEqual(similarity_of_features(PageFeatures(page), PageFeatures(stored)), 1.0)
+        self.index.add(1, stored)
+        self.assertEqual(self.index.candidates(page), {1})
+
+    def test_no_similar_page_is_missed(self):
+        rand = random.Random(7)
+        pages = []
+        for i in range(150):
+            page = self._page(i, [rand.randrange(12) for j in range(rand.randrange(4))])
+            page.links = [Link(Url("http://example.com/page{}.php".format(rand.randrange(8))), "/html/body/a")
+                          for j in range(rand.randrange(6))]
+            pages.append(page)
+            self.index.add(i, page)
+        for page in pages:
+            features = PageFeatures(page)
+            candidates = self.index.candidates(page)
+            for other in pages:
+                if similarity_of_features(features, PageFeatures(other)) >= 0.9:
+                    self.assertIn(other.id, candidates)
+
+    def test_remove(self):
+        self.index.add(1, self._page(1, range(20)))
+        self.index.remove(1)
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.candidates(self._page(1, range(20))), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
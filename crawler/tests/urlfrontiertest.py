@@ -0,0 +1,64 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from database.urlfrontier import UrlFrontier
+from models.url import Url
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class UrlFrontierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frontier = UrlFrontier()
+
+    def test_pop_empty(self):
+        self.assertIsNone(self.frontier.pop_url())
+
+    def test_no_duplicates(self):
+        self.frontier.add_url(Url("http://example.com/a.php?id=1"))
+        self.frontier.add_url(Url("http://example.com/a.php?id=1"))
+        self.assertEqual(len(self.frontier), 1)
+        self.assertIsNotNone(self.frontier.pop_url())
+        self.assertIsNone(self.frontier.pop_url())
+
+    def test_highest_ratio_first(self):
+        url_a = Url("http://example.com/a.php?id=1")
+        url_b = Url("http://example.com/b.php?id=1")
+        self.frontier.add_url(url_a)
+        self.frontier.add_url(url_b)
+        self.frontier.set_num_of_visited_urls(url_a.url_hash, 4)
+        self.assertEqual(self.frontier.pop_url().toString(), url_b.toString())
+
+        self.frontier.add_url(Url("http://example.com/b.php?id=2"))
+        self.frontier.visit_url(url_b.toString(), url_b.url_hash, 200)
+        self.frontier.set_num_of_clusters(url_b.url_hash, 1)
+        self.frontier.set_num_of_clusters(url_a.url_hash, 8)
+        self.assertEqual(self.frontier.pop_url().toString(), url_a.toString())
+
+    def test_visited_urls_are_skipped(self):
+        url = Url("http://example.com/a.php?id=1")
+        self.frontier.add_url(url)
+        self.frontier.visit_url(url.toString(), url.url_hash, 200)
+        self.assertIsNone(self.frontier.pop_url())
+        self.assertAlmostEqual(self.frontier.cluster_per_visited_urls(url.url_hash), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
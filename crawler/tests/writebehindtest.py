@@ -0,0 +1,179 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import threading
+import time
+
+from database.writebehind import WriteBehindBuffer
+
+__author__ = 'constantin'
+
+import unittest
+
+
+class RecordingBulk():
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._operations = []
+        self._query = None
+
+    def insert(self, document):
+        self._operations.append(("insert", None, document))
+
+    def find(self, query):
+        self._query = query
+        return self
+
+    def upsert(self):
+        return self
+
+    def replace_one(self, document):
+        self._operations.append(("replace", self._query, document))
+
+    def update_one(self, update):
+        self._operations.append(("update", self._query, update))
+
+    def remove(self):
+        self._operations.append(("remove", self._query, None))
+
+    def execute(self):
+        with self._collection.lock:
+            self._collection.batches.append(self._operations)
+            self._collection.log.append(self._collection.name)
+            self._collection.written.set()
+
+
+class RecordingCollection():
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self.batches = []
+        self.lock = threading.Lock()
+        self.written = threading.Event()
+
+    def initialize_ordered_bulk_op(self):
+        return RecordingBulk(self)
+
+
+class RecordingDatabase(dict):
+
+    def __init__(self):
+        super(RecordingDatabase, self).__init__()
+        self.log = []  # names of the collections in the order their bulk operations were executed
+
+    def __missing__(self, name):
+        self[name] = RecordingCollection(name, self.log)
+        return self[name]
+
+
+class WriteBehindBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.database = RecordingDatabase()
+
+    def test_flush_writes_one_ordered_batch_per_collection(self):
+        buffer = WriteBehindBuffer(self.database, max_operations=100, flush_interval=60)
+        buffer.insert("clickables", {"_id": 1})
+        buffer.insert("forms", {"_id": 2})
+        buffer.update("clickables", {"_id": 1}, {"$set": {"clicked": True}})
+        self.assertTrue(buffer.has_pending("clickables"))
+        self.assertEqual(len(self.database), 0)
+        buffer.flush()
+        self.assertFalse(buffer.has_pending())
+        self.assertEqual(self.database["clickables"].batches, [[("insert", None, {"_id": 1}),
+                                                               ("update", {"_id": 1}, {"$set": {"clicked": True}})]])
+        self.assertEqual(self.database["forms"].batches, [[("insert", None, {"_id": 2})]])
+        buffer.close()
+
+    def test_flush_of_some_collections(self):
+        buffer = WriteBehindBuffer(self.database, max_operations=100, flush_interval=60)
+        buffer.insert("clickables", {"_id": 1})
+        buffer.insert("pages", {"_id": 2})
+        buffer.flush("pages")
+        self.assertEqual(self.database.log, ["pages"])
+        self.assertTrue(buffer.has_pending("clickables"))
+        self.assertFalse(buffer.has_pending("pages"))
+        buffer.close()
+        self.assertEqual(self.database.log, ["pages", "clickables"])
+
+    def test_barrier_is_written_after_the_operations_before_it(self):
+        buffer = WriteBehindBuffer(self.database, max_operations=100, flush_interval=60)
+        buffer.insert("pages", {"_id": 1})
+        buffer.update("checkpoints", {"session": 1}, {"$set": {"page_id": 2}}, upsert=True, barrier=True)
+        buffer.insert("pages", {"_id": 2})
+        buffer.remove("clickables", {"web_page_id": 2})
+        # The barrier can not be written alone, so everything is written
+        buffer.flush("checkpoints")
+        self.assertFalse(buffer.has_pending())
+        self.assertEqual(self.database.log, ["pages", "checkpoints", "pages", "clickables"])
+        self.assertEqual(self.database["clickables"].batches, [[("remove", {"web_page_id": 2}, None)]])
+        buffer.close()
+
+    def test_size_threshold(self):
+        buffer = WriteBehindBuffer(self.database, max_operations=3, flush_interval=60)
+        for i in range(3):
+            buffer.insert("pages", {"_id": i})
+        self.assertTrue(self.database["pages"].written.wait(5))
+        self.assertEqual(len(self.database["pages"].batches[0]), 3)
+        buffer.close()
+
+    def test_time_threshold(self):
+        buffer = WriteBehindBuffer(self.database, max_operations=100, flush_interval=0.05)
+        start = time.time()
+        buffer.insert("pages", {"_id": 1})
+        self.assertTrue(self.database["pages"].written.wait(5))
+        self.assertGreaterEqual(time.time() - start, 0.05)
+        buffer.close()
+
+    def test_pending_documents(self):
+        buffer = WriteBehindBuffer(self.database, max_operations=100, flush_interval=60)
+        document = {"_id": 1, "values": ["a"]}
+        buffer.insert("clickables", document, key="c")
+        buffer.insert("clickables", {"_id": 2}, key="c")
+        document["values"].append("b")
+        self.assertEqual(buffer.pending("c"), {"_id": 1, "values": ["a"]})
+        buffer.replace("forms", {"_id": 3}, {"_id": 3, "v": 1}, key="f")
+        buffer.replace("forms", {"_id": 3}, {"_id": 3, "v": 2}, key="f")
+        self.assertEqual(buffer.pending("f")["v"], 2)
+        buffer.flush()
+        self.assertIsNone(buffer.pending("c"))
+        self.assertIsNone(buffer.pending("f"))
+        buffer.close()
+
+    def test_close_writes_pending(self):
+        buffer = WriteBehindBuffer(self.database, max_operations=100, flush_interval=60)
+        buffer.insert("pages", {"_id": 1})
+        buffer.close()
+        self.assertEqual(len(self.database["pages"].batches), 1)
+        self.assertRaises(RuntimeError, buffer.insert, "pages", {"_id": 2})
+
+    def test_error_is_raised_on_flush(self):
+        class FailingCollection():
+            def initialize_ordered_bulk_op(self):
+                raise ValueError("connection lost")
+        self.database["pages"] = FailingCollection()
+        buffer = WriteBehindBuffer(self.database, max_operations=100, flush_interval=60)
+        buffer.insert("pages", {"_id": 1})
+        self.assertRaises(ValueError, buffer.flush)
+        self.assertFalse(buffer.has_pending())
+        buffer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,18 +20,45 @@ This class contains everything that is important for a crawl session:
     - max_depth - How deep the crawler should go
     - max_click_depth - How deep a crawler should click
     - speed - interaction speed between Jäk and JS
+    - num_workers - How many browser processes crawl in parallel (1 means no worker pool)
+    - num_event_executors - How many pages execute the events of one page at the same time (1 means one after another)
+    - recycle_rss_growth - Renew the browser objects, if the memory grew more than this (in MB) since the last renewal
+    - recycle_max_qobjects - Renew the browser objects, if one page has more QObjects than this
+    - delta_page_memory - Memory (in MB) for the deltapages waiting to be crawled, the rest goes to a temporary file
+    - similarity_cache_size - Number of page similarities the cluster manager keeps in memory
+    - network_cache_size - Size (in MB) of the disk cache for the requests of the pages
+    - network_cache_dir - Directory of the disk cache
+    - blocked_resource_types - Resource types (network.requestfilter.ResourceType), that the pages do not request
+    - blocked_hosts - Hosts, that the pages do not request
+    - virtual_time - Run the timers of a page one after another instead of waiting for them
 
 '''
 from models.utils import CrawlSpeed
+from network.requestfilter import DEFAULT_BLOCKED_TYPES
 
 class CrawlConfig():
     
-    def __init__(self, name, start_page, max_depth = 5, max_click_depth = 5, crawl_speed=CrawlSpeed.Medium):
+    def __init__(self, name, start_page, max_depth = 5, max_click_depth = 5, crawl_speed=CrawlSpeed.Medium, num_workers = 1,
+                 num_event_executors = 1, recycle_rss_growth = 500, recycle_max_qobjects = 20000,
+                 delta_page_memory = 100, similarity_cache_size = 100000, network_cache_size = 100,
+                 network_cache_dir = ".webkit_cache", blocked_resource_types = DEFAULT_BLOCKED_TYPES,
+                 blocked_hosts = (), virtual_time = False):
         self.name = name
         self.max_depth = max_depth
         self.max_click_depth = max_click_depth
         self.start_page_url = start_page
         self.process_speed = crawl_speed
+        self.num_workers = num_workers
+        self.num_event_executors = num_event_executors
+        self.recycle_rss_growth = recycle_rss_growth
+        self.recycle_max_qobjects = recycle_max_qobjects
+        self.delta_page_memory = delta_page_memory
+        self.similarity_cache_size = similarity_cache_size
+        self.network_cache_size = network_cache_size
+        self.network_cache_dir = network_cache_dir
+        self.blocked_resource_types = blocked_resource_types
+        self.blocked_hosts = blocked_hosts
+        self.virtual_time = virtual_time
 
 
 
@@ -39,8 +66,18 @@ class AttackConfig():
     """
     Right now more a dummy than something usefull
     """
-    def __init__(self, start_page_url, crawl_speed=CrawlSpeed.Medium):
+    def __init__(self, start_page_url, crawl_speed=CrawlSpeed.Medium, network_cache_size=100,
+                 network_cache_dir=".webkit_cache", blocked_resource_types=(), blocked_hosts=(),
+                 virtual_time=False):
+        """
+        Nothing is blocked by default: attack vectors may be loaded as images or media
+        """
         attack = "XSS"
         self.start_page_url = start_page_url
         self.process_speed = crawl_speed
+        self.network_cache_size = network_cache_size
+        self.network_cache_dir = network_cache_dir
+        self.blocked_resource_types = blocked_resource_types
+        self.blocked_hosts = blocked_hosts
+        self.virtual_time = virtual_time
 
@@ -0,0 +1,47 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Helpers to measure the memory of the crawler process.
+'''
+
+import resource
+
+from PyQt5.QtCore import QObject
+
+__author__ = 'constantin'
+
+
+def current_rss():
+    """
+    :return: resident set size of the process in bytes
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (IOError, ValueError, IndexError):
+        # No procfs, take the peak size instead. Linux reports kilobytes, but we only get here on other systems
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def count_qobjects(qobject):
+    """
+    :return: number of QObjects that live below qobject, e.g. frames, replies and js bridges of a page
+    """
+    return len(qobject.findChildren(QObject))
+
+
+def to_mb(num_bytes):
+    return num_bytes / (1024.0 * 1024.0)
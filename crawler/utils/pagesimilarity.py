@@ -0,0 +1,113 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Similarity between pages. Every page is turned once into counted, hashable features, so that a pair is scored with
+dictionary lookups instead of comparing every element of one page with every element of the other.
+'''
+
+from collections import Counter
+
+__author__ = 'constantin'
+
+
+class PageFeatures():
+    """
+    Two forms are equal, if their hash and the abstract url of the action are equal. Two links are equal, if the
+    abstract urls are equal. Two clickables are equal, if event, dom address and tag are equal and the clickable types
+    are equal, as long as both are known.
+    """
+
+    def __init__(self, page):
+        self.forms = Counter((form.form_hash, form.action.abstract_url) for form in page.forms)
+        self.links = Counter(link.url.abstract_url for link in page.links)
+        self.clickables = {}  # (event, dom address, tag) -> Counter of the clickable types
+        for clickable in page.clickables:
+            key = clickable.event, clickable.dom_address, clickable.tag
+            self.clickables.setdefault(key, Counter())[clickable.clickable_type] += 1
+        self.num_of_forms = len(page.forms)
+        self.num_of_links = len(page.links)
+        self.num_of_clickables = len(page.clickables)
+
+    def identical_forms(self, other):
+        """
+        :return: number of own forms, that are also in other
+        """
+        return sum(count for key, count in self.forms.items() if key in other.forms)
+
+    def identical_links(self, other):
+        return sum(count for key, count in self.links.items() if key in other.links)
+
+    def identical_clickables(self, other):
+        result = 0
+        for key, types in self.clickables.items():
+            other_types = other.clickables.get(key)
+            if other_types is None:
+                continue
+            for clickable_type, count in types.items():
+                if clickable_type is None or None in other_types or clickable_type in other_types:
+                    result += count
+        return result
+
+
+def similarity_of_features(features1, features2, clickable_weight=1.0, form_weight=1.0, link_weight=1.0):
+    return similarity_details(features1, features2, clickable_weight, form_weight, link_weight)[0]
+
+
+def similarity_details(features1, features2, clickable_weight=1.0, form_weight=1.0, link_weight=1.0):
+    """
+    :return: (similarity, form_similarity, link_similarity, clickable_similarity)
+    """
+    form_similarity = 0.0
+    form_counter = features1.num_of_forms + features2.num_of_forms
+    if form_counter > 0:
+        identical_forms = float(features1.identical_forms(features2))
+        form_similarity = identical_forms / (form_counter - identical_forms)
+    else:
+        form_weight = 0.0
+
+    link_similarity = 0.0
+    link_counter = features1.num_of_links + features2.num_of_links
+    if link_counter > 0:
+        identical_links = float(features1.identical_links(features2))
+        link_similarity = identical_links / (link_counter - identical_links)
+    else:
+        link_weight = 0.0
+
+    clickable_similarity = 0.0
+    clickable_counter = features1.num_of_clickables + features2.num_of_clickables
+    if clickable_counter > 0:
+        identical_clickables = float(features1.identical_clickables(features2))
+        clickable_similarity = identical_clickables / (clickable_counter - identical_clickables)
+    else:
+        clickable_weight = 0
+
+    sum_weight = clickable_weight + form_weight + link_weight
+    similarity = clickable_weight * clickable_similarity + form_weight * form_similarity + link_weight * link_similarity
+    if sum_weight > 0:
+        result = similarity / sum_weight
+    else:
+        result = 1
+    return result, form_similarity, link_similarity, clickable_similarity
+
+
+def similarities_to_pages(page, pages, clickable_weight=1.0, form_weight=1.0, link_weight=1.0):
+    """
+    Scores one page against many, the features of page are computed only once
+    :return: list of similarities in the order of pages
+    """
+    features = PageFeatures(page)
+    return [similarity_of_features(features, PageFeatures(other), clickable_weight, form_weight, link_weight)
+            for other in pages]
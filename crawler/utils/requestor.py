@@ -15,7 +15,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
-from time import time, sleep
+from time import time
 import logging
 
 from PyQt5.Qt import QEventLoop, QTimer, QUrl
@@ -66,14 +66,6 @@ class Requestor(InteractionCore):
         self.mainFrame().setHtml(None)
         return parsed_html
     
-    def _wait(self, timeout=1, pattern=None):
-        """Wait for delay time
-        """
-        deadline = time() + timeout
-        while time() < deadline:
-            sleep(0)
-            self.app.processEvents()
-      
     def javaScriptConsoleMessage(self, message, lineNumber, sourceID):
         logging.debug("Console: " + message + " at: " + str(lineNumber))
         
@@ -0,0 +1,97 @@
+'''
+Copyright (C) 2015 Constantin Tschuertz
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Index over the clickables, links and forms of pages. It finds the pages, that may be similar to a given one, without
+comparing them all. The candidates must still be scored with similarity_of_features, with the given page as first page.
+
+The score of a category counts the items of the first page, whose key is also in the other page, duplicates included.
+A score of at least t needs at least one category with a score of at least t, and there at least t / (1 + t) of the
+items of the first page must have a key of the other page. So every page, that reaches t, contains one of the keys of
+the first page, that hold more than 1 / (1 + t) of its items in some category. Only the pages with these keys are
+candidates, the rarest keys are chosen first. No page, that reaches the threshold, is missed.
+'''
+
+from utils.pagesimilarity import PageFeatures
+
+__author__ = 'constantin'
+
+
+def page_features(page):
+    """
+    :return: dict category -> Counter of the keys of PageFeatures. The clickable types are left out, because unknown
+    types are equal to every type.
+    """
+    page_features = PageFeatures(page)
+    clickables = {key: sum(types.values()) for key, types in page_features.clickables.items()}
+    return {"c": clickables, "l": page_features.links, "f": page_features.forms}
+
+
+class SimilarityIndex():
+
+    def __init__(self, threshold=0.9):
+        """
+        :param threshold: the candidates include every page, that has at least this similarity
+        """
+        self.threshold = threshold
+        self._postings = {}  # (url, category, feature key) -> set of keys, category None for pages without features
+        self._posting_keys = {}  # key -> posting keys of that key, needed for removing
+
+    def __len__(self):
+        return len(self._posting_keys)
+
+    def __contains__(self, key):
+        return key in self._posting_keys
+
+    def add(self, key, page):
+        if key in self._posting_keys:
+            self.remove(key)
+        posting_keys = [(page.url, category, feature) for category, counts in page_features(page).items()
+                        for feature in counts]
+        if len(posting_keys) == 0:
+            posting_keys = [(page.url, None, None)]
+        for posting_key in posting_keys:
+            self._postings.setdefault(posting_key, set()).add(key)
+        self._posting_keys[key] = posting_keys
+
+    def remove(self, key):
+        for posting_key in self._posting_keys.pop(key, []):
+            posting = self._postings[posting_key]
+            posting.discard(key)
+            if len(posting) == 0:
+                del self._postings[posting_key]
+
+    def candidates(self, page):
+        """
+        :return: keys of the pages with the same url, that may have a similarity of at least threshold to page
+        """
+        features = page_features(page)
+        if all(len(counts) == 0 for counts in features.values()):
+            # Only pages without features are equal to a page without features
+            return set(self._postings.get((page.url, None, None), ()))
+        result = set()
+        for category, counts in features.items():
+            total = sum(counts.values())
+            chosen = 0
+            postings = [(self._postings.get((page.url, category, feature), ()), count)
+                        for feature, count in counts.items()]
+            postings.sort(key=lambda item: (len(item[0]), -item[1]))
+            for posting, count in postings:
+                # The tolerance makes rounding add a key too many, never one too few
+                if chosen * (1 + self.threshold) > total + 1e-9:
+                    break
+                result.update(posting)
+                chosen += count
+        return result
@@ -24,6 +24,7 @@ from PyQt5.QtNetwork import QNetworkCookie
 
 from models.deltapage import DeltaPage
 from models.parametertype import ParameterType
+from utils.pagesimilarity import PageFeatures, similarity_details
 
 
 def form_to_dict(form, key_values = None):
@@ -43,114 +44,39 @@ def form_to_dict(form, key_values = None):
 def subtract_parent_from_delta_page(parent_page, delta_page):
     result = DeltaPage(delta_page.id, delta_page.url, delta_page.html, cookiesjar=delta_page.cookiejar, depth=delta_page.current_depth, generator=delta_page.generator, parent_id=delta_page.parent_id)
     result.delta_depth = delta_page.delta_depth
+    parent_index = parent_page.element_index()
     for link in delta_page.links:
-        if link not in parent_page.links:
+        if not parent_index.contains_link(link):
             result.links.append(link)
-        
+
     for d_clickable in delta_page.clickables:
-        clickable_is_already_in_main = False
-        for m_clickable in parent_page.clickables:
-            if d_clickable == m_clickable:
-                clickable_is_already_in_main = True
-                break
-        if clickable_is_already_in_main == False:
-                result.clickables.append(d_clickable)
-    
+        if len(parent_index.equal_clickables(d_clickable)) == 0:
+            result.clickables.append(d_clickable)
+
     for d_form in delta_page.forms:
-        form_is_already_in_main = False
-        for m_form in parent_page.forms:
-            if two_forms_are_equal(d_form, m_form):
-                form_is_already_in_main = True
-                break
-        if form_is_already_in_main == False:
+        if not parent_index.contains_form(d_form):
             result.forms.append(d_form)
 
     result.ajax_requests = delta_page.ajax_requests # They are just capturing the new one
     return result
     
 def transfer_clicked_from_parent_to_delta(parent_page, delta_page):
+    parent_index = parent_page.element_index()
     for d_clickabe in delta_page.clickables:
         if not d_clickabe.clicked:
-            for p_clickable in parent_page.clickables:
-                if d_clickabe == p_clickable:
-                    d_clickabe.clicked = p_clickable.clicked # If both are equel, transfer the clickstate from parent to child
+            equal_clickables = parent_index.equal_clickables(d_clickabe)
+            if len(equal_clickables) > 0:
+                d_clickabe.clicked = equal_clickables[-1].clicked # If both are equel, transfer the clickstate from parent to child
 
     return delta_page
 
-def calculate_similarity_between_pages(page1, page2, clickable_weight = 1.0, form_weight = 1.0, link_weight = 1.0, verbose= True):
-
-    if page1.toString() == page2.toString():
-        return 1.0
-
-    form_similarity = 0.0
-    identical_forms = 0.0
-    form_counter = len(page1.forms) + len(page2.forms)
-    if form_counter > 0:
-        for p1_form in page1.forms:
-            is_in_other = False
-            for p2_form in page2.forms:
-                if two_forms_are_equal(p1_form, p2_form):
-                    is_in_other = True
-                    break
-            if is_in_other:
-                identical_forms += 1.0
-                form_counter -= 1.0
-        form_similarity = identical_forms / form_counter
-    else:
-        form_weight = 0.0
-
-    link_similarity = 0.0
-    identical_links = 0.0
-    link_counter = len(page1.links) + len(page2.links)
-    if link_counter > 0:
-        for p1_link in page1.links:
-            is_in_other = False
-            for p2_link in page2.links:
-                if p1_link.url.abstract_url == p2_link.url.abstract_url:
-                    is_in_other = True
-                    break
-            if is_in_other:
-                identical_links += 1.0
-                link_counter -= 1.0
-        link_similarity = identical_links / link_counter
-    else:
-        #logging.debug("Linkweight is 0.0")
-        link_weight = 0.0
-
-    clickable_similarity = 0.0
-    identical_clickables = 0.0
-    clickable_counter = len(page1.clickables) + len(page2.clickables)
-    if clickable_counter > 0:
-        for p1_clickable in page1.clickables:
-            is_in_other = False
-            for p2_clickable in page2.clickables:
-                if two_clickables_are_equal(p1_clickable, p2_clickable):
-                    is_in_other = True
-                    break
-            if is_in_other:
-                identical_clickables += 1.0
-                clickable_counter -= 1.0
-        clickable_similarity = identical_clickables / clickable_counter
-    else:
-        clickable_weight = 0
-
-    sum_weight = clickable_weight + form_weight + link_weight
-    similarity= clickable_weight * clickable_similarity + form_weight * form_similarity + link_weight * link_similarity
-    if sum_weight > 0:
-        result = similarity / sum_weight
-    else:
-        result = 1
+def calculate_similarity_between_pages(page1, page2, clickable_weight = 1.0, form_weight = 1.0, link_weight = 1.0, verbose= False):
+    result, form_similarity, link_similarity, clickable_similarity = similarity_details(
+        PageFeatures(page1), PageFeatures(page2), clickable_weight, form_weight, link_weight)
     if verbose:
-        f = open("similarities/" + str(page1.id) + " - " + str(page2.id) + ".txt", "w")
-        f.write(page1.toString())
-        f.write(" \n \n ======================================================= \n \n")
-        f.write(page2.toString())
-        f.write("\n \n ====================Result=========================== \n \n")
-        f.write("Similarity = " + str(result) + " - Formsimilarity: " + str(form_similarity) + " - Linksimilarity: " + str(link_similarity) + " - Clickablesimilarity: " + str(clickable_similarity))
-        f.write("\n Formweight: "+ str(form_weight) + " Formnum: " +str(form_counter) + " - Linkweight: " + str(link_weight) + " Linknum: " + str(link_counter) + " - Clickableweight: " + str(clickable_weight) + " Clickablenum: " + str(clickable_counter) )
-        f.close()
-        #logging.debug("PageID: " + str(page1.id) + " and PageID: " + str(page2.id) + " has a similarity from: " + str(result))
-
+        logging.debug("PageID: {} and PageID: {} has a similarity from: {} - Formsimilarity: {} - Linksimilarity: {} - "
+                      "Clickablesimilarity: {}".format(page1.id, page2.id, result, form_similarity, link_similarity,
+                                                       clickable_similarity))
     return result
 
 def two_clickables_are_equal(c1, c2):